@@ -2,4 +2,6 @@ from .scenes import intro
 from .scenes import game
 from .scenes import lobby
 
-from .util import next_frame, show_text, start_timer
\ No newline at end of file
+from .util import next_frame, show_text, start_timer
+from .profiler import frame_profiler, toggle_hud
+from .card_pool import card_back_pool
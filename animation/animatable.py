@@ -1,11 +1,11 @@
 import pygame
-import math
 import copy
-from queue import Queue
+from collections import deque
 from numpy import arange
 from .shared_objects import SharedObjects
 from .constants import FPS
-from .helpers import circle_transform
+from .transform_cache import transform_cache
+from . import tween
 
 
 class Animatable:
@@ -20,11 +20,18 @@ class Animatable:
         hidden: whether or not the surface is displayed on screen
         chain_movements: if True, movements will be queued, otherwise, new
             movement requests will interrupt the current movement
+
+        The surface is not copied: it is shared with the caller (and any other
+        animatables made from it) until a color transformation needs to draw
+        on it, at which point this animatable makes a private copy.
         """
-        self.surface = surface.copy()
-        self.original_surface = surface.copy()
+        self.surface = surface
+        self.original_surface = surface
         self.rect = surface.get_rect()
 
+        # The copy of the surface this animatable owns (see _make_surface_private)
+        self.private_surface = None
+
         self.rect.centerx = centerx  # x position for top left corner
         self.rect.centery = centery  # y position for top left corner
 
@@ -32,19 +39,32 @@ class Animatable:
 
         self.chain_movements = chain_movements
 
-        self.position_animation_queue = Queue()
+        # Pending position animations as (function, args, time queued) tuples,
+        # where function(*args, start_time) returns a Tween
+        self.position_animation_queue = deque()
 
-        self.position_queue = Queue()
+        # The Tween currently driving the position of this animatable
+        self.current_tween = None
 
         self.rotozoom_generators = []
         self.color_generators = []
 
         self.current_scale = 1
 
-    def get_frame(self):
+        # Screen state as of the last time this animatable was drawn, used to
+        # work out which regions of the display need repainting
+        self.previous_rect = None
+        self.previous_surface = None
+
+    def get_frame(self, now=None):
         """
         Returns a blit pair indication what the surface is for this Animatable
         and where the surface should be displayed.
+        Parameters:
+        -----------
+        now: (optional) the animation time of the frame (see tween.get_time);
+            pass the time the tween store was last evaluated at to use its
+            precomputed positions
         """
         # 1. Apply transformations in scale or tilt (rotation/zoom)
         if len(self.rotozoom_generators):
@@ -63,19 +83,48 @@ class Animatable:
                         g for g in self.color_generators if not generator]
 
         # 3. Apply changes in position
-        if not self.position_queue.empty():
-            self.rect.center = self.position_queue.get()
-        elif not self.position_animation_queue.empty():
-            args, function = self.position_animation_queue.get()
-            items = function(*args)
-            for item in items:
-                self.position_queue.put(item)
+        if self.current_tween is not None or len(self.position_animation_queue):
+            if now is None:
+                now = tween.get_time()
+            self._update_position(now)
 
         if not self.hidden:
             return (self.surface, self.rect)
         else:
             return None
 
+    def get_dirty_rects(self):
+        """
+        Returns a list of the screen regions this animatable has changed since
+        the last call (its previous and its current rect). An empty list means
+        the animatable looks exactly as it did on the previous frame. Should be
+        called once per frame after get_frame.
+        """
+        if self.hidden:
+            current_rect = None
+        else:
+            # The surface is drawn at the rect's top left corner, but some
+            # transformations (e.g. rotate) change its size without the rect
+            current_rect = self.surface.get_rect(topleft=self.rect.topleft)
+
+        unchanged = (
+            current_rect == self.previous_rect
+            and self.surface is self.previous_surface
+            and not len(self.color_generators)
+        )
+
+        dirty_rects = []
+        if not unchanged:
+            if self.previous_rect is not None:
+                dirty_rects.append(self.previous_rect)
+            if current_rect is not None:
+                dirty_rects.append(current_rect)
+
+        self.previous_rect = current_rect
+        self.previous_surface = self.surface
+
+        return dirty_rects
+
     def hide(self):
         """
         Makes the card invisible on the screen.
@@ -99,13 +148,24 @@ class Animatable:
         orig_w = self.original_surface.get_rect().w
         orig_h = self.original_surface.get_rect().h
         w, h = (int(round(orig_w * scale)), int(round(orig_h * scale)))
-        self.surface = pygame.transform.smoothscale(
+        self.surface = transform_cache.smoothscale(
             self.original_surface, (w, h))
         self.rect = self.surface.get_rect()
         self.instant_move(x, y)
 
         self.current_scale = scale
 
+    def _make_surface_private(self):
+        """
+        Internal function which must be called before drawing on self.surface.
+        Surfaces are shared (with assets, mipmaps, the transform cache and
+        other animatables), so the surface is copied unless this animatable
+        already owns it.
+        """
+        if self.surface is not self.private_surface:
+            self.surface = self.surface.copy()
+            self.private_surface = self.surface
+
     def instant_move(self, x, y):
         """
         Instantly move the animatable to the given position.
@@ -120,6 +180,7 @@ class Animatable:
         RGB: (r, g, b, a) tuple representing the color of the background (a is
             the alpha value)
         """
+        self._make_surface_private()
         original_surf = self.surface
         orig_rect = original_surf.get_rect()
         flash_surf = pygame.Surface((orig_rect.w, orig_rect.h))
@@ -127,6 +188,8 @@ class Animatable:
         r, g, b, a = RGB
         flash_surf.fill((r, g, b, a))
         self.surface.blit(flash_surf, (0, 0))
+        # The surface may have been drawn on in place, so it must be redrawn
+        self.previous_surface = None
 
     def instant_rotate(self, angle):
         """
@@ -136,7 +199,7 @@ class Animatable:
         angle: degrees to rotate
         """
         x, y = self.rect.center
-        self.surface = pygame.transform.rotate(self.surface, angle)
+        self.surface = transform_cache.rotate(self.surface, angle)
         self.rect = self.surface.get_rect()
         self.instant_move(x, y)
 
@@ -161,10 +224,9 @@ class Animatable:
             """
             Generator function that alters this animatable's tilt.
             """
-            original_surf = surface.copy()
             for angle in angles:
                 x, y = self.rect.center
-                self.surface = pygame.transform.rotate(original_surf, angle)
+                self.surface = transform_cache.rotate(surface, angle)
                 self.instant_move(x, y)
                 yield True
 
@@ -193,11 +255,9 @@ class Animatable:
             """
             Generator function that alters this animatable's size.
             """
-            original_surf = surface.copy()
             for dimension in dimensions:
                 x, y = self.rect.center
-                self.surface = pygame.transform.smoothscale(
-                    original_surf, dimension)
+                self.surface = transform_cache.smoothscale(surface, dimension)
                 self.rect = self.surface.get_rect()
                 self.instant_move(x, y)
                 yield True
@@ -250,11 +310,9 @@ class Animatable:
             """
             Generator function that alters this animatable's size.
             """
-            original_surf = surface.copy()
             for angle, scale in args:
                 x, y = self.rect.center
-                self.surface = pygame.transform.rotozoom(
-                    original_surf, angle, scale)
+                self.surface = transform_cache.rotozoom(surface, angle, scale)
                 self.rect = self.surface.get_rect()
                 self.instant_move(x, y)
                 yield True
@@ -324,6 +382,7 @@ class Animatable:
             intensities.append(intensity*step)
         intensities.append(0)
 
+        self._make_surface_private()
         self.color_generators.append(generator(self.surface, intensities))
 
     def fade_to_color(self, RGB, from_alpha, to_alpha, duration):
@@ -341,6 +400,7 @@ class Animatable:
             """
             Generator function that alters this animatable's surface.
             """
+            self._make_surface_private()
             original_surf = self.surface
             r, g, b = RGB
             original_surf.fill((r, g, b))      
@@ -376,6 +436,68 @@ class Animatable:
     # Position-Related Animation Functions
     ###########################################################################
 
+    def _update_position(self, now):
+        """
+        Moves the animatable to where its position animations place it at the
+        given time. Finished tweens are replaced by the next queued animation,
+        which starts from where the previous one ended.
+        Parameters:
+        -----------
+        now: the current animation time (see tween.get_time)
+        """
+        while True:
+            if self.current_tween is not None:
+                if now < self.current_tween.end_time:
+                    self.rect.center = self.current_tween.position(now)
+                    return
+                # Land exactly on the end of the finished tween
+                self.rect.center = self.current_tween.position(
+                    self.current_tween.end_time)
+                previous_end = self.current_tween.end_time
+                tween.tween_store.remove(self.current_tween)
+                self.current_tween = None
+            else:
+                previous_end = now
+
+            if not len(self.position_animation_queue):
+                return
+
+            function, args, queued_at = \
+                self.position_animation_queue.popleft()
+            # Chained animations start exactly when the previous one ended so
+            # that timing does not depend on the frame rate
+            start_time = max(previous_end, queued_at)
+            self.current_tween = function(*args, start_time)
+            tween.tween_store.add(self.current_tween)
+
+    def stop_animations(self):
+        """
+        Cancels every running and queued animation (position, scale/rotation
+        and color). The animatable stays where and how it currently is.
+        """
+        if self.current_tween is not None:
+            tween.tween_store.remove(self.current_tween)
+            self.current_tween = None
+        self.position_animation_queue = deque()
+        self.rotozoom_generators = []
+        self.color_generators = []
+
+    def _queue_position_animation(self, function, args):
+        """
+        Internal function used to queue up a position animation.
+        Parameters:
+        -----------
+        function: called as function(*args, start_time) when the animation
+            starts and must return a Tween
+        args: tuple of arguments for function
+        """
+        if not self.chain_movements:
+            self.position_animation_queue = deque()
+
+        self.position_animation_queue.append(
+            (function, args, tween.get_time())
+        )
+
     def move(self, new_centerx, new_centery, duration=0.5, steady=False):
         """
         Moves a card from one position to another.
@@ -391,55 +513,34 @@ class Animatable:
             # No movement required
             return None
 
-        if not self.chain_movements:
-            self.position_animation_queue = Queue()
-
-        args = (self.surface, new_centerx, new_centery, duration, steady)
-        self.position_animation_queue.put(
-            (args, self._calculate_move_positions)
-        )
+        args = (new_centerx, new_centery, duration, steady)
+        self._queue_position_animation(self._make_move_tween, args)
 
-    def _calculate_move_positions(self, surface, end_centerx, end_centery, duration, steady):
+    def _make_move_tween(self, end_centerx, end_centery, duration, steady, start_time):
         """
-        Calculates a list of positions (x-, y-coordinates) which a surface
-        should take to get from one point to another.
+        Creates the tween which moves the surface from its current position to
+        another.
         Parameters:
         -----------
-        surface: the pygame.Surface to move
         end_centerx: the ending x-coordinate
         end_centery: the ending y-coordinate
         duration: how long in seconds that the animation should take
+        steady: if True, the surface moves at a constant speed, otherwise it
+            slows down as it approaches the end
+        start_time: animation time at which the movement starts
         """
-        rect = self.rect
-        start_centerx, start_centery = rect.center
-        x_diff, y_diff = (start_centerx - end_centerx,
-                          start_centery - end_centery)
-        if x_diff == 0 and y_diff == 0:
-            return []
-
-        # Distance between the two points (start and end)
-        magnitude = math.sqrt(x_diff**2 + y_diff**2)
-        # Unit vector
-        x_unit, y_unit = (x_diff/magnitude, y_diff/magnitude)
-
-        # Function to determine velocity of moving surface
         if steady:
-            def mvt_fun(x): return 1 - x
+            easing = tween.LINEAR
         else:
-            def mvt_fun(x): return -x**2 + 1
-
-        step_size = 1 / (duration * FPS)
-        steps = [
-            mvt_fun(x) for x in arange(0, 1 - step_size, step_size)
-        ][::-1]
-
-        positions = []
-        for step in steps:
-            step_x = start_centerx + (-x_unit * magnitude * step)
-            step_y = start_centery + (-y_unit * magnitude * step)
-            positions.append((step_x, step_y))
-
-        return positions
+            easing = tween.EASE_OUT
+
+        return tween.MoveTween(
+            self.rect.center,
+            (end_centerx, end_centery),
+            start_time,
+            duration,
+            easing
+        )
 
     def circle(self, center_x, center_y, angle, duration=0.25):
         """
@@ -453,74 +554,44 @@ class Animatable:
         duration: how long the animation should take
         """
         args = (center_x, center_y, angle, duration)
+        self._queue_position_animation(self._make_circle_tween, args)
 
-        if not self.chain_movements:
-            self.position_animation_queue = Queue()
-
-        self.position_animation_queue.put(
-            (args, self._calculate_circle_positions)
-        )
-
-    def _calculate_circle_positions(self, center_x, center_y, angle, duration):
+    def _make_circle_tween(self, center_x, center_y, angle, duration, start_time):
         """
-        Calculates a list of positions (x-, y-coordinates) which a surface
-        should take to move around circle.
+        Creates the tween which moves the surface around a circle, starting at
+        its current position.
         Parameters:
         -----------
         center_x: x-coordinate of the center of circle being rotated around
         center_x: y-coordinate of the center of circle being rotated around
-        radius: how far away from the circle to rotate
         angle: how many degrees to rotate around circle
         duration: how long the animation should take
-        """
-        rect = self.rect
-        point_x, point_y = rect.center
-
-        angles = []
-        angle_delta = (angle / duration) / FPS
-        for a in arange(0, angle, angle_delta):
-            angles.append(a)
-        angles.append(angle)
-
-        positions = []
-        for a in angles:
-            position = circle_transform(
-                point_x, point_y, center_x, center_y, a)
-            positions.append(position)
-
-        return positions
+        start_time: animation time at which the movement starts
+        """
+        return tween.CircleTween(
+            self.rect.center,
+            (center_x, center_y),
+            angle,
+            start_time,
+            duration
+        )
 
     def freeze(self, duration=0.5):
-            """
-            Card stays in place. Useful for chained animations.
-            Parameters:
-            -----------
-            duration: indicates how long in seconds that the
-                animation should last.
-            """
-            if duration == 0:
-                return
-                
-            if not self.chain_movements:
-                self.position_animation_queue = Queue()
-
-            args = (self.surface, duration)
-            self.position_animation_queue.put(
-                (args, self._calc_freeze_positions)
-            )
-
-    def _calc_freeze_positions(self, surface, duration):
         """
-        Calculates a list of positions (x-, y-coordinates).
+        Card stays in place. Useful for chained animations.
+        Parameters:
+        -----------
+        duration: indicates how long in seconds that the
+            animation should last.
         """
-        rect = self.rect
-
-        step_size = 1 / (duration * FPS)
+        if duration == 0:
+            return
 
-        x, y = rect.center
+        args = (duration,)
+        self._queue_position_animation(self._make_freeze_tween, args)
 
-        positions = [
-            (x, y) for i in arange(0, 1 - step_size, step_size)
-        ]
-
-        return positions
\ No newline at end of file
+    def _make_freeze_tween(self, duration, start_time):
+        """
+        Creates the tween which keeps the surface at its current position.
+        """
+        return tween.FreezeTween(self.rect.center, start_time, duration)
@@ -1,97 +1,152 @@
+"""
+This file loads the image assets of the game. Every image is converted to the
+pixel format of the display once, so that blitting and transforming it does not
+require a conversion every time. The card faces (and backs) are packed into a
+single atlas surface and handed out as subsurfaces of it. Large or rarely used
+images (e.g. CS_PROFS, the instructions and the wildcard wheel) are only loaded
+the first time they are accessed.
+"""
+
+import math
 import pygame
 from pkg_resources import resource_filename
+
+from .shared_objects import SharedObjects
+
 assets_path = resource_filename('animation', 'assets')
-LOGO = pygame.image.load(assets_path + '/Logo.png')
-DASH = pygame.image.load(assets_path + '/Dashed_Border.png')
-DECK = pygame.image.load(assets_path + '/Deck.png')
-BDECK = pygame.image.load(assets_path + '/Bordered_Deck.png')
-BLANK = pygame.image.load(assets_path + '/Blank.png')
-FELT = pygame.image.load(assets_path + '/Green_Felt.jpg')
-INSTRUCTIONS_LEFT = pygame.image.load(assets_path + '/instructions_left.png')
-INSTRUCTIONS_RIGHT = pygame.image.load(assets_path + '/instructions_right.png')
-
-CS_PROFS = [
-    pygame.image.load(assets_path + '/gosnell.png'),
-    pygame.image.load(assets_path + '/markowsky.png'),
-    pygame.image.load(assets_path + '/mcmillin.png'),
-    pygame.image.load(assets_path + '/morales.png'),
-    pygame.image.load(assets_path + '/price.png'),
-    pygame.image.load(assets_path + '/sabharwal.png')
-]
-
-# Used for choosing wildcard color
-WILDWHEEL = {
-    'BLUE': pygame.image.load(assets_path + '/Wildwheel_Blue.png'),
-    'RED':  pygame.image.load(assets_path + '/Wildwheel_Red.png'),
-    'YELLOW': pygame.image.load(assets_path + '/Wildwheel_Yellow.png'),
-    'GREEN': pygame.image.load(assets_path + '/Wildwheel_Green.png')
+
+# Converting images requires the display to be initialized
+SharedObjects.get_surface()
+
+
+def load(filename, alpha=True):
+    """
+    Loads an image from the assets directory and converts it to the pixel
+    format of the display.
+    Parameters:
+    -----------
+    filename: name of the file in the assets directory
+    alpha: whether the image has transparent pixels which must be kept
+    """
+    surface = pygame.image.load(assets_path + '/' + filename)
+    if alpha:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+def build_atlas(files):
+    """
+    Packs images of identical size into a single surface laid out as a grid.
+    Returns a dictionary mapping each key to a subsurface of the atlas (the
+    subsurfaces share pixels with the atlas, so they must not be drawn on).
+    Parameters:
+    -----------
+    files: dictionary mapping key => filename
+    """
+    images = {key: load(filename) for key, filename in files.items()}
+
+    w, h = next(iter(images.values())).get_size()
+    columns = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+
+    atlas = pygame.Surface((columns * w, rows * h), pygame.SRCALPHA)
+    atlas = atlas.convert_alpha()
+
+    # Images and atlas share the display pixel format, so pixels can be
+    # copied directly (a blit would blend them and is much slower)
+    atlas_pixels = pygame.surfarray.pixels2d(atlas)
+
+    subsurfaces = {}
+    for i, (key, image) in enumerate(images.items()):
+        if image.get_size() != (w, h):
+            raise ValueError("Atlas images must all have the same size")
+        x, y = (i % columns) * w, (i // columns) * h
+        atlas_pixels[x:x + w, y:y + h] = pygame.surfarray.pixels2d(image)
+        subsurfaces[key] = atlas.subsurface(pygame.Rect(x, y, w, h))
+
+    # Unlock the atlas
+    del atlas_pixels
+
+    return subsurfaces
+
+
+###############################################################################
+# Card atlas
+###############################################################################
+
+_CARD_FILES = {
+    # Card backs
+    'DECK': 'Deck.png',
+    'BDECK': 'Bordered_Deck.png',
+    'BLANK': 'Blank.png',
+    # Used for morphing wildcards into their chosen color
+    'BLUE_WILD': 'Blue_Wild.png',
+    'RED_WILD': 'Red_Wild.png',
+    'GREEN_WILD': 'Green_Wild.png',
+    'YELLOW_WILD': 'Yellow_Wild.png',
+    # Other Cards
+    'WILD_WILD': 'Wild.png',
+    'WILD_WILD_DRAW': 'Wild_Draw.png',
 }
 
+for _color in ['Blue', 'Green', 'Red', 'Yellow']:
+    for _value in [str(i) for i in range(10)] + ['Draw', 'Reverse', 'Skip']:
+        _key = _color.upper() + '_' + _value.upper()
+        _CARD_FILES[_key] = _color + '_' + _value + '.png'
+
+CARD_ATLAS = build_atlas(_CARD_FILES)
+
+DECK = CARD_ATLAS['DECK']
+BDECK = CARD_ATLAS['BDECK']
+BLANK = CARD_ATLAS['BLANK']
+
 WILDMORPH = {
-    'BLUE_WILD': pygame.image.load(assets_path + '/Blue_Wild.png'),
-    'RED_WILD': pygame.image.load(assets_path + '/Red_Wild.png'),
-    'GREEN_WILD': pygame.image.load(assets_path + '/Green_Wild.png'),
-    'YELLOW_WILD': pygame.image.load(assets_path + '/Yellow_Wild.png'),
+    key: CARD_ATLAS[key]
+    for key in ['BLUE_WILD', 'RED_WILD', 'GREEN_WILD', 'YELLOW_WILD']
 }
 
 CARDS = {
-    # Blue Cards
-    'BLUE_0': pygame.image.load(assets_path + '/Blue_0.png'),
-    'BLUE_1': pygame.image.load(assets_path + '/Blue_1.png'),
-    'BLUE_2': pygame.image.load(assets_path + '/Blue_2.png'),
-    'BLUE_3': pygame.image.load(assets_path + '/Blue_3.png'),
-    'BLUE_4': pygame.image.load(assets_path + '/Blue_4.png'),
-    'BLUE_5': pygame.image.load(assets_path + '/Blue_5.png'),
-    'BLUE_6': pygame.image.load(assets_path + '/Blue_6.png'),
-    'BLUE_7': pygame.image.load(assets_path + '/Blue_7.png'),
-    'BLUE_8': pygame.image.load(assets_path + '/Blue_8.png'),
-    'BLUE_9': pygame.image.load(assets_path + '/Blue_9.png'),
-    'BLUE_DRAW': pygame.image.load(assets_path + '/Blue_Draw.png'),
-    'BLUE_REVERSE': pygame.image.load(assets_path + '/Blue_Reverse.png'),
-    'BLUE_SKIP': pygame.image.load(assets_path + '/Blue_Skip.png'),
-    # Green Cards
-    'GREEN_0': pygame.image.load(assets_path + '/Green_0.png'),
-    'GREEN_1': pygame.image.load(assets_path + '/Green_1.png'),
-    'GREEN_2': pygame.image.load(assets_path + '/Green_2.png'),
-    'GREEN_3': pygame.image.load(assets_path + '/Green_3.png'),
-    'GREEN_4': pygame.image.load(assets_path + '/Green_4.png'),
-    'GREEN_5': pygame.image.load(assets_path + '/Green_5.png'),
-    'GREEN_6': pygame.image.load(assets_path + '/Green_6.png'),
-    'GREEN_7': pygame.image.load(assets_path + '/Green_7.png'),
-    'GREEN_8': pygame.image.load(assets_path + '/Green_8.png'),
-    'GREEN_9': pygame.image.load(assets_path + '/Green_9.png'),
-    'GREEN_DRAW': pygame.image.load(assets_path + '/Green_Draw.png'),
-    'GREEN_REVERSE': pygame.image.load(assets_path + '/Green_Reverse.png'),
-    'GREEN_SKIP': pygame.image.load(assets_path + '/Green_Skip.png'),
-    # Red Cards
-    'RED_0': pygame.image.load(assets_path + '/Red_0.png'),
-    'RED_1': pygame.image.load(assets_path + '/Red_1.png'),
-    'RED_2': pygame.image.load(assets_path + '/Red_2.png'),
-    'RED_3': pygame.image.load(assets_path + '/Red_3.png'),
-    'RED_4': pygame.image.load(assets_path + '/Red_4.png'),
-    'RED_5': pygame.image.load(assets_path + '/Red_5.png'),
-    'RED_6': pygame.image.load(assets_path + '/Red_6.png'),
-    'RED_7': pygame.image.load(assets_path + '/Red_7.png'),
-    'RED_8': pygame.image.load(assets_path + '/Red_8.png'),
-    'RED_9': pygame.image.load(assets_path + '/Red_9.png'),
-    'RED_DRAW': pygame.image.load(assets_path + '/Red_Draw.png'),
-    'RED_REVERSE': pygame.image.load(assets_path + '/Red_Reverse.png'),
-    'RED_SKIP': pygame.image.load(assets_path + '/Red_Skip.png'),
-    # Yellow Cards
-    'YELLOW_0': pygame.image.load(assets_path + '/Yellow_0.png'),
-    'YELLOW_1': pygame.image.load(assets_path + '/Yellow_1.png'),
-    'YELLOW_2': pygame.image.load(assets_path + '/Yellow_2.png'),
-    'YELLOW_3': pygame.image.load(assets_path + '/Yellow_3.png'),
-    'YELLOW_4': pygame.image.load(assets_path + '/Yellow_4.png'),
-    'YELLOW_5': pygame.image.load(assets_path + '/Yellow_5.png'),
-    'YELLOW_6': pygame.image.load(assets_path + '/Yellow_6.png'),
-    'YELLOW_7': pygame.image.load(assets_path + '/Yellow_7.png'),
-    'YELLOW_8': pygame.image.load(assets_path + '/Yellow_8.png'),
-    'YELLOW_9': pygame.image.load(assets_path + '/Yellow_9.png'),
-    'YELLOW_DRAW': pygame.image.load(assets_path + '/Yellow_Draw.png'),
-    'YELLOW_REVERSE': pygame.image.load(assets_path + '/Yellow_Reverse.png'),
-    'YELLOW_SKIP': pygame.image.load(assets_path + '/Yellow_Skip.png'),
-    # Other Cards
-    'WILD_WILD': pygame.image.load(assets_path + '/Wild.png'),
-    'WILD_WILD_DRAW': pygame.image.load(assets_path + '/Wild_Draw.png')
+    key: surface for key, surface in CARD_ATLAS.items()
+    if key not in ['DECK', 'BDECK', 'BLANK'] and key not in WILDMORPH
 }
+
+###############################################################################
+# Other assets
+###############################################################################
+
+FELT = load('Green_Felt.jpg', alpha=False)
+
+# Maps name => function loading the asset. These are loaded on first access.
+_LAZY_ASSETS = {
+    'LOGO': lambda: load('Logo.png'),
+    'DASH': lambda: load('Dashed_Border.png'),
+    'INSTRUCTIONS_LEFT': lambda: load('instructions_left.png'),
+    'INSTRUCTIONS_RIGHT': lambda: load('instructions_right.png'),
+    'CS_PROFS': lambda: [
+        load('gosnell.png'),
+        load('markowsky.png'),
+        load('mcmillin.png'),
+        load('morales.png'),
+        load('price.png'),
+        load('sabharwal.png')
+    ],
+    # Used for choosing wildcard color
+    'WILDWHEEL': lambda: {
+        'BLUE': load('Wildwheel_Blue.png'),
+        'RED': load('Wildwheel_Red.png'),
+        'YELLOW': load('Wildwheel_Yellow.png'),
+        'GREEN': load('Wildwheel_Green.png')
+    },
+}
+
+
+def __getattr__(name):
+    """
+    Loads lazy assets the first time they are accessed as module attributes.
+    """
+    if name not in _LAZY_ASSETS:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name))
+    asset = _LAZY_ASSETS[name]()
+    globals()[name] = asset
+    return asset
@@ -3,6 +3,7 @@ import copy
 
 from .animatable import Animatable
 from .assets import DECK
+from . import mipmaps
 
 from . import constants as c
 
@@ -40,10 +41,32 @@ class Card(Animatable):
         self.face_up = not self.face_up
 
         if self.face_up:
-            self.original_surface = self.face_surface.copy()
+            self.original_surface = self.face_surface
             self.instant_scale(self.current_scale)
         else:
-            self.original_surface = DECK.copy()
+            self.original_surface = DECK
             self.instant_scale(self.current_scale)
-            
 
+    def instant_scale(self, scale):
+        """
+        Instantly changes the scale of the surface (no animation). Uses the
+        pre-rendered card mipmap for the scale if there is one.
+        Parameters:
+        scale: proportion of original surface the surface should now be
+        """
+        if self.face_up:
+            source = self.face_surface
+        else:
+            source = DECK
+
+        mipmap = mipmaps.get(source, scale)
+        if mipmap is None:
+            super(Card, self).instant_scale(scale)
+            return
+
+        x, y = self.rect.center
+        self.surface = mipmap
+        self.rect = self.surface.get_rect()
+        self.instant_move(x, y)
+
+        self.current_scale = scale
@@ -0,0 +1,111 @@
+"""
+This file contains the pool of card backs shown in the opponents' hands. An
+opponent's cards are never shown face up, so every card they hold is drawn as
+an identical dummy card. Rather than creating a new Card every time an opponent
+draws and throwing it away when they play, the dummy cards are recycled.
+"""
+
+from .card import Card
+from .assets import DECK
+
+from . import constants as c
+
+
+class CardBackPool:
+    """
+    Hands out Card objects showing the card back and takes them back once
+    they are no longer displayed. Shared by every OpponentHand.
+    """
+
+    def __init__(self, max_size=c.CARD_BACK_POOL_SIZE):
+        """
+        Parameters:
+        -----------
+        max_size: most released cards kept for reuse; cards released while the
+            pool is full are left to the garbage collector
+        """
+        self.max_size = max_size
+        self.free_cards = []
+
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.discarded = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def acquire(self, scale=c.DEFAULT_CARD_SCALE):
+        """
+        Returns a visible card back with no running animations, reusing a
+        released card if there is one.
+        Parameters:
+        -----------
+        scale: proportion of the card back asset size the card should be
+        """
+        if len(self.free_cards):
+            card = self.free_cards.pop()
+            card.stop_animations()
+            card.face_surface = DECK
+            card.face_up = True
+            card.original_surface = DECK
+            card.private_surface = None
+            card.instant_scale(scale)
+            card.show()
+            # Force the card to be redrawn wherever it appears next
+            card.previous_surface = None
+            self.reused += 1
+        else:
+            card = Card(DECK, scale)
+            self.created += 1
+
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return card
+
+    def release(self, card):
+        """
+        Gives a card back to the pool. The card must no longer be in any list
+        of animatables.
+        Parameters:
+        -----------
+        card: a Card returned by acquire
+        """
+        self.in_use -= 1
+        self.released += 1
+        card.stop_animations()
+        if len(self.free_cards) < self.max_size:
+            self.free_cards.append(card)
+        else:
+            self.discarded += 1
+
+    def get_stats(self):
+        """
+        Returns a dictionary of pool statistics: how many cards were created,
+        reused, released and discarded, how many are in use (and the most that
+        were in use at once) and how many are waiting to be reused.
+        """
+        return dict(
+            created=self.created,
+            reused=self.reused,
+            released=self.released,
+            discarded=self.discarded,
+            in_use=self.in_use,
+            peak_in_use=self.peak_in_use,
+            available=len(self.free_cards),
+        )
+
+    def clear(self):
+        """
+        Forgets every card waiting to be reused and resets the statistics
+        (cards currently in use are still counted).
+        """
+        self.free_cards = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.discarded = 0
+        self.peak_in_use = self.in_use
+
+
+# Pool shared by every OpponentHand
+card_back_pool = CardBackPool()
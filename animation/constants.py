@@ -10,6 +10,37 @@ surf = SharedObjects.get_surface()
 # Frames per second (animation speed)
 FPS = 30
 
+# If True, next_frame waits so that frames are not drawn faster than FPS
+LIMIT_FRAME_RATE = True
+
+# If True, only the regions of the display which changed are repainted each
+# frame; otherwise the whole display is repainted every frame
+DIRTY_RECT_RENDERING = True
+
+# Most bytes of pixel data the scale/rotation transform cache may hold
+TRANSFORM_CACHE_BYTES = 64 * 1024 * 1024
+
+# Rotation angles are rounded to a multiple of this many degrees when cached
+TRANSFORM_CACHE_ANGLE_STEP = 1
+
+# Rotozoom scales are rounded to a multiple of this value when cached
+TRANSFORM_CACHE_SCALE_STEP = 0.001
+
+# How many threads pre-render the card mipmaps
+MIPMAP_WORKERS = 4
+
+# Most opponent card backs kept for reuse by the card back pool
+CARD_BACK_POOL_SIZE = 108
+
+# How many of the most recent frames the frame profiler keeps
+FRAME_PROFILER_SIZE = 600
+
+# If True, frame time percentiles are shown in the top left corner
+SHOW_FRAME_HUD = False
+
+# How many frames pass between refreshes of the frame time overlay
+FRAME_HUD_REFRESH_FRAMES = 15
+
 # Width of the game window in pixels
 WINWIDTH = surf.get_rect().w
 
@@ -131,4 +162,10 @@ LOBBY_WAITING_BACKGROUND_COLOR = Color("seashell4")
 # How long to wait before morphing wildcard color
 WILDCARD_MORPH_WAIT_TIME = MOVE_CARD_ANI_DURATION
 
-RANDOM_PLAY_OFFSET_RANGE = 10
\ No newline at end of file
+RANDOM_PLAY_OFFSET_RANGE = 10
+
+# Text color of the frame time overlay
+FRAME_HUD_TEXT_COLOR = Color("yellow")
+
+# Background color of the frame time overlay
+FRAME_HUD_BACKGROUND_COLOR = Color("black")
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+This file contains the card mipmaps: every card surface pre-rendered at each of
+the fixed scales cards are displayed at, so that a Card can switch between
+those scales with a lookup instead of resampling the full resolution asset.
+"""
+
+import pygame
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .assets import CARDS, WILDMORPH, DECK
+
+from . import constants as c
+
+# Scales cards are displayed at when they are not being animated
+CARD_SCALES = (
+    c.DEFAULT_CARD_SCALE,
+    c.FOCUS_CARD_SCALE,
+    c.DRAW_DECK_SCALE,
+    c.PLAY_DECK_SCALE,
+    c.OPPONENT_SPREAD_DECK_CARD_SCALE,
+)
+
+# Maps (source surface, (w, h)) => pre-rendered surface
+_mipmaps = {}
+_lock = threading.Lock()
+
+
+def get_size(surface, scale):
+    """
+    Returns the (w, h) size of the surface at the given scale (rounded the same
+    way as Animatable.instant_scale).
+    """
+    w, h = surface.get_size()
+    return (int(round(w * scale)), int(round(h * scale)))
+
+
+def build(surfaces, scales=CARD_SCALES, workers=c.MIPMAP_WORKERS):
+    """
+    Renders every surface at every scale on a thread pool. Surfaces and sizes
+    which were already rendered are skipped.
+    Parameters:
+    -----------
+    surfaces: iterable of source pygame.Surface objects
+    scales: iterable of scales to render each surface at
+    workers: how many threads render at the same time
+    """
+    jobs = set()
+    for surface in surfaces:
+        for scale in scales:
+            key = (surface, get_size(surface, scale))
+            if key not in _mipmaps:
+                jobs.add(key)
+
+    def render(key):
+        surface, size = key
+        return key, pygame.transform.smoothscale(surface, size)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for key, mipmap in executor.map(render, jobs):
+            with _lock:
+                _mipmaps[key] = mipmap
+
+
+def build_card_mipmaps():
+    """
+    Renders every card face, the card back and the wildcard morph faces at
+    every card scale. Should be called at the start of a game.
+    """
+    surfaces = list(CARDS.values()) + list(WILDMORPH.values()) + [DECK]
+    build(surfaces)
+
+
+def get(surface, scale):
+    """
+    Returns the surface pre-rendered at the given scale, or None if it was not
+    rendered. The returned surface is shared and must not be drawn on.
+    Parameters:
+    -----------
+    surface: the source pygame.Surface
+    scale: proportion of the source surface size
+    """
+    return _mipmaps.get((surface, get_size(surface, scale)))
+
+
+def clear():
+    """
+    Forgets every pre-rendered surface.
+    """
+    with _lock:
+        _mipmaps.clear()
@@ -1,8 +1,7 @@
 import copy
 import pygame
-import random
 
-from .card import Card
+from .card_pool import card_back_pool
 from .shared_objects import SharedObjects
 from .util import bring_to_front
 from .assets import DECK
@@ -32,7 +31,7 @@ class OpponentHand():
         self.x = x
         self.y = y
         self.spread = spread
-        self.surface = card_surf.copy()
+        self.surface = card_surf
         self.scale = scale
 
         # Stores a list of dummy cards which represent the real cards (since
@@ -43,7 +42,7 @@ class OpponentHand():
         """
         A card moves from the draw deck to this opponent's hand.
         """
-        card = Card(DECK)
+        card = card_back_pool.acquire()
 
         # Append the real card to the real list of cards
         self.cards.append(card)
@@ -90,6 +89,7 @@ class OpponentHand():
 
         animatables.remove(old_card)
         self.cards.remove(old_card)
+        card_back_pool.release(old_card)
 
         if card in animatables:
             animatables.remove(card)
@@ -98,10 +98,11 @@ class OpponentHand():
         disposable_animatables.append(card)
 
         if (random_offset):
-            x_offset = random.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
-                                      c.RANDOM_PLAY_OFFSET_RANGE)
-            y_offset = random.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
-                                      c.RANDOM_PLAY_OFFSET_RANGE)
+            rng = SharedObjects.get_random()
+            x_offset = rng.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
+                                   c.RANDOM_PLAY_OFFSET_RANGE)
+            y_offset = rng.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
+                                   c.RANDOM_PLAY_OFFSET_RANGE)
         else:
             x_offset = 0
             y_offset = 0
@@ -120,6 +121,18 @@ class OpponentHand():
 
         self.animate_move_cards(self.cards)
 
+    def release_cards(self):
+        """
+        Removes every card from this hand and the screen and gives them back
+        to the card back pool. Should be called when the hand is discarded.
+        """
+        animatables = SharedObjects.get_animatables()
+        for card in self.cards:
+            if card in animatables:
+                animatables.remove(card)
+            card_back_pool.release(card)
+        self.cards = []
+
     def get_position_for_card(self, position, num_cards):
         """
         Given a position of the card and the total number of cards in the deck,
@@ -4,7 +4,6 @@ from . import constants as c
 from .shared_objects import SharedObjects
 
 import time
-import random
 
 
 class PrimaryHand():
@@ -156,10 +155,11 @@ class PrimaryHand():
             raise Exception
 
         if (random_offset):
-            x_offset = random.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
-                                      c.RANDOM_PLAY_OFFSET_RANGE)
-            y_offset = random.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
-                                      c.RANDOM_PLAY_OFFSET_RANGE)
+            rng = SharedObjects.get_random()
+            x_offset = rng.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
+                                   c.RANDOM_PLAY_OFFSET_RANGE)
+            y_offset = rng.randint(-c.RANDOM_PLAY_OFFSET_RANGE,
+                                   c.RANDOM_PLAY_OFFSET_RANGE)
         else:
             x_offset = 0
             y_offset = 0
@@ -0,0 +1,195 @@
+"""
+This file contains the frame profiler, which records how long every phase of
+next_frame takes so that slow frames can be traced back to their cause.
+"""
+
+import csv
+import json
+import time
+import numpy as np
+
+from .animatable import Animatable
+from .shared_objects import SharedObjects
+
+from . import constants as c
+
+# Phases of a frame, in the order they happen in next_frame
+PHASES = ("animate", "blit", "update", "tick")
+
+# Columns recorded for every frame
+COLUMNS = PHASES + ("total", "animatables", "transforms")
+
+
+class FrameProfiler:
+    """
+    Records per-phase timings of the most recent frames in a ring buffer,
+    along with the number of animatables drawn and transforms run per frame.
+    """
+
+    def __init__(self, size=c.FRAME_PROFILER_SIZE):
+        """
+        Parameters:
+        -----------
+        size: how many of the most recent frames to keep
+        """
+        self.size = size
+        self.samples = np.zeros((size, len(COLUMNS)))
+        # Total number of frames recorded (the buffer holds the last size)
+        self.count = 0
+
+        self.current = [0.0] * len(COLUMNS)
+        self.frame_start = None
+        self.last_mark = None
+
+        self.hud = None
+        self.show_hud = c.SHOW_FRAME_HUD
+
+    def begin_frame(self):
+        """
+        Marks the beginning of a frame.
+        """
+        self.frame_start = self.last_mark = time.perf_counter()
+        self.current = [0.0] * len(COLUMNS)
+
+    def mark(self, phase):
+        """
+        Attributes the time since the previous mark to the given phase.
+        Parameters:
+        -----------
+        phase: one of PHASES
+        """
+        now = time.perf_counter()
+        self.current[COLUMNS.index(phase)] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self, num_animatables, num_transforms):
+        """
+        Marks the end of a frame and stores its sample in the ring buffer.
+        Parameters:
+        -----------
+        num_animatables: how many animatables were drawn this frame
+        num_transforms: how many scale/rotate transforms were run this frame
+        """
+        if self.frame_start is None:
+            return
+        current = self.current
+        current[COLUMNS.index("total")] = time.perf_counter() - self.frame_start
+        current[COLUMNS.index("animatables")] = num_animatables
+        current[COLUMNS.index("transforms")] = num_transforms
+
+        self.samples[self.count % self.size] = current
+        self.count += 1
+        self.frame_start = None
+
+    def get_samples(self):
+        """
+        Returns the recorded frames, oldest first, as an array with one row
+        per frame and one column per entry of COLUMNS.
+        """
+        if self.count <= self.size:
+            return self.samples[:self.count].copy()
+        start = self.count % self.size
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def get_summary(self):
+        """
+        Returns a dictionary mapping every column to its mean and its p50, p95
+        and p99 values over the recorded frames (times are in milliseconds).
+        """
+        samples = self.get_samples()
+        summary = {"frames": len(samples)}
+        if not len(samples):
+            return summary
+
+        for i, column in enumerate(COLUMNS):
+            values = samples[:, i]
+            if column in PHASES or column == "total":
+                values = values * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[column] = dict(
+                mean=float(values.mean()),
+                p50=float(p50),
+                p95=float(p95),
+                p99=float(p99)
+            )
+        return summary
+
+    def export_csv(self, path):
+        """
+        Writes the recorded frames to a CSV file (times are in seconds).
+        Parameters:
+        -----------
+        path: path of the file to write
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(self.get_samples().tolist())
+
+    def export_json(self, path):
+        """
+        Writes the summary and the recorded frames to a JSON file (times are in
+        seconds for frames and milliseconds for the summary).
+        Parameters:
+        -----------
+        path: path of the file to write
+        """
+        frames = [dict(zip(COLUMNS, row))
+                  for row in self.get_samples().tolist()]
+        with open(path, "w") as f:
+            json.dump(dict(summary=self.get_summary(), frames=frames), f)
+
+    def reset(self):
+        """
+        Forgets all recorded frames.
+        """
+        self.count = 0
+
+    def get_overlays(self):
+        """
+        Returns a list of animatables to draw on top of everything else (the
+        HUD if it is shown, otherwise nothing).
+        """
+        if not self.show_hud:
+            return []
+
+        # Refresh the text a few times a second so that it stays readable
+        if self.hud is None or self.count % c.FRAME_HUD_REFRESH_FRAMES == 0:
+            self._update_hud()
+        return [self.hud]
+
+    def _update_hud(self):
+        """
+        Internal function which renders the latest frame time percentiles.
+        """
+        summary = self.get_summary()
+        if "total" in summary:
+            total = summary["total"]
+            text = "frame ms p50 {:.1f} p95 {:.1f} p99 {:.1f} | {:.0f} anim".format(
+                total["p50"], total["p95"], total["p99"],
+                summary["animatables"]["p50"])
+        else:
+            text = "frame ms -"
+
+        font = SharedObjects.get_small_font()
+        text_surf = font.render(text, True, c.FRAME_HUD_TEXT_COLOR,
+                                c.FRAME_HUD_BACKGROUND_COLOR)
+        rect = text_surf.get_rect()
+
+        if self.hud is None:
+            self.hud = Animatable(text_surf, hidden=False)
+        self.hud.original_surface = text_surf
+        self.hud.surface = text_surf
+        self.hud.rect = rect
+        self.hud.rect.topleft = (0, 0)
+
+
+# Profiler used by next_frame
+frame_profiler = FrameProfiler()
+
+
+def toggle_hud():
+    """
+    Shows the frame time overlay if it is hidden, otherwise hides it.
+    """
+    frame_profiler.show_hud = not frame_profiler.show_hud
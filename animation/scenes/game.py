@@ -8,12 +8,14 @@ from .. import constants as c
 from ..shared_objects import SharedObjects
 from ..opponent_hand import OpponentHand
 from ..primary_hand import PrimaryHand
-from ..assets import WILDWHEEL
+from .. import assets
 from ..assets import WILDMORPH
 from ..assets import DECK, CARDS, BDECK
 from ..card import Card
+from .. import mipmaps
 from ..animatable import Animatable
 from ..helpers import put_felt_background
+from ..util import request_full_redraw
 
 # Maps id => Card
 cards = {}
@@ -26,6 +28,15 @@ wildcard_quadrants = []
 wildcard_background = None
 
 
+def load_card_mipmaps():
+    """
+    Pre-renders every card at each of the scales cards are displayed at, so
+    that cards change between those scales without resampling. Should be
+    called at the start of a game, before cards are tracked.
+    """
+    mipmaps.build_card_mipmaps()
+
+
 def track_card(surface, id):
     """
     This function can be used to tell the animation module to start tracking a
@@ -330,6 +341,9 @@ def reset():
 
     wildcard_quadrants.clear()
     cards.clear()
+    for opponent_hand in opponents.values():
+        if opponent_hand is not None:
+            opponent_hand.release_cards()
     opponents.clear()
     hand = PrimaryHand()
 
@@ -349,6 +363,7 @@ def show():
 
     base_surf = SharedObjects.get_base_surface()
     base_surf = put_felt_background(base_surf)
+    request_full_redraw()
 
     large_font = SharedObjects.get_large_font()
 
@@ -359,6 +374,8 @@ def show():
         # xy tuple for position of opponent hand
         x = (i+1)/(num_opponents+1) * c.WINWIDTH
         y = (1/10) * c.WINHEIGHT
+        if opponents[name] is not None:
+            opponents[name].release_cards()
         opponents[name] = OpponentHand(x, y + (1/10) * c.WINHEIGHT)
         name_surf = large_font.render(name, True, (255, 255, 255))
         name_rect = name_surf.get_rect()
@@ -378,10 +395,10 @@ def show():
     base_surf.blit(draw_deck.surface, rect)
 
     colors = [
-        WILDWHEEL["BLUE"],
-        WILDWHEEL["RED"],
-        WILDWHEEL["YELLOW"],
-        WILDWHEEL["GREEN"]
+        assets.WILDWHEEL["BLUE"],
+        assets.WILDWHEEL["RED"],
+        assets.WILDWHEEL["YELLOW"],
+        assets.WILDWHEEL["GREEN"]
     ]
 
     # Initalize wildcard wheel quadrants
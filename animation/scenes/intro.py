@@ -6,6 +6,7 @@ from .. import constants as c
 from ..shared_objects import SharedObjects
 from ..animatable import Animatable
 from ..helpers import put_felt_background
+from ..util import request_full_redraw
 
 _start_card = None
 _exit_card = None
@@ -67,6 +68,7 @@ def show():
     # Make background black (clean slate)
     base_surf = SharedObjects.get_base_surface()
     base_surf.fill(pygame.Color("black"))
+    request_full_redraw()
 
     # Get animatables and clear any previous items
     animatables = SharedObjects.get_animatables()
@@ -3,12 +3,12 @@ import random
 import string
 
 from ..assets import BDECK as DECK
-from ..assets import INSTRUCTIONS_LEFT, INSTRUCTIONS_RIGHT, CS_PROFS
+from .. import assets
 from .. import constants as c
 from ..shared_objects import SharedObjects
 from ..animatable import Animatable
 from ..helpers import circle_transform, put_felt_background
-from ..util import show_text
+from ..util import show_text, request_full_redraw
 from ..text_field import TextField
 
 
@@ -104,11 +104,12 @@ def show():
     base_surf = SharedObjects.get_base_surface()
     base_surf.fill(pygame.Color("black"))
     base_surf = put_felt_background(base_surf)
+    request_full_redraw()
 
-    ileft = Animatable(INSTRUCTIONS_LEFT)
+    ileft = Animatable(assets.INSTRUCTIONS_LEFT)
     ileft.instant_scale(c.WINHEIGHT * 0.0006)
 
-    iright = Animatable(INSTRUCTIONS_RIGHT)
+    iright = Animatable(assets.INSTRUCTIONS_RIGHT)
     iright.instant_scale(c.WINHEIGHT * 0.0006)
 
     margin = c.WINHEIGHT * 0.05
@@ -128,9 +129,9 @@ def show():
 
     # Left side
     left_heads = [Animatable(item, hidden=False, chain_movements=True)
-                  for item in CS_PROFS[:3]]
+                  for item in assets.CS_PROFS[:3]]
     right_heads = [Animatable(item, hidden=False, chain_movements=True)
-                   for item in CS_PROFS[3:]]
+                   for item in assets.CS_PROFS[3:]]
 
     for i, animatable in enumerate(left_heads):
         animatable.instant_scale(c.WINHEIGHT * 0.0007)
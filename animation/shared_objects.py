@@ -1,4 +1,5 @@
 import copy
+import random
 import pygame
 
 
@@ -46,6 +47,7 @@ class SharedObjects:
     medium_font = None
     large_font = None
     extra_large_font = None
+    rng = None
 
     @staticmethod
     def get_clock():
@@ -105,6 +107,17 @@ class SharedObjects:
             SharedObjects.disposable_animatables = DisposableAnimatables()
         return SharedObjects.disposable_animatables
 
+    @staticmethod
+    def get_random():
+        """
+        Returns the random.Random object used for the random parts of the game
+        animations (e.g. where played cards land), so that seeding it replays
+        a game exactly.
+        """
+        if SharedObjects.rng is None:
+            SharedObjects.rng = random.Random()
+        return SharedObjects.rng
+
     @staticmethod
     def get_small_font():
         """
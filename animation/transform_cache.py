@@ -0,0 +1,147 @@
+import pygame
+import threading
+from collections import OrderedDict
+
+from . import constants as c
+
+
+class TransformCache:
+    """
+    Holds the results of previously computed scale and rotation transforms so
+    that animations which repeatedly scale/rotate the same surfaces (e.g. a
+    card moving between the draw deck, the hand and the play deck) do not
+    resample them again. Angles and scales are quantized so that nearly equal
+    requests share an entry. Least recently used entries are evicted once the
+    total size of the cached surfaces exceeds the byte budget.
+
+    Surfaces returned by the cache are shared and must not be drawn on; copy
+    them first if they need to be modified.
+    """
+
+    def __init__(self, max_bytes=c.TRANSFORM_CACHE_BYTES,
+                 angle_step=c.TRANSFORM_CACHE_ANGLE_STEP,
+                 scale_step=c.TRANSFORM_CACHE_SCALE_STEP):
+        """
+        Parameters:
+        -----------
+        max_bytes: the most bytes of pixel data the cache may hold
+        angle_step: angles are rounded to a multiple of this many degrees
+        scale_step: rotozoom scales are rounded to a multiple of this value
+        """
+        self.max_bytes = max_bytes
+        self.angle_step = angle_step
+        self.scale_step = scale_step
+
+        # Maps key => (surface, size in bytes), oldest entries first
+        self.entries = OrderedDict()
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+
+    def smoothscale(self, surface, size):
+        """
+        Returns surface smoothly scaled to the given size.
+        Parameters:
+        -----------
+        surface: the pygame.Surface to scale
+        size: (w, h) tuple of integers
+        """
+        key = ("smoothscale", surface, size)
+        return self._get(key, pygame.transform.smoothscale, surface, size)
+
+    def rotate(self, surface, angle):
+        """
+        Returns surface rotated counter-clockwise by (a quantized) angle.
+        Parameters:
+        -----------
+        surface: the pygame.Surface to rotate
+        angle: degrees to rotate
+        """
+        angle = self._quantize_angle(angle)
+        key = ("rotate", surface, angle)
+        return self._get(key, pygame.transform.rotate, surface, angle)
+
+    def rotozoom(self, surface, angle, scale):
+        """
+        Returns surface rotated by (a quantized) angle and scaled by (a
+        quantized) scale.
+        Parameters:
+        -----------
+        surface: the pygame.Surface to transform
+        angle: degrees to rotate
+        scale: proportion of the surface size the result should be
+        """
+        angle = self._quantize_angle(angle)
+        scale = round(round(scale / self.scale_step) * self.scale_step, 6)
+        key = ("rotozoom", surface, angle, scale)
+        return self._get(key, pygame.transform.rotozoom, surface, angle, scale)
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of hits, misses and evictions so
+        far, as well as the number of entries and bytes currently cached.
+        """
+        with self.lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self.entries),
+                bytes=self.current_bytes
+            )
+
+    def clear(self):
+        """
+        Removes every entry from the cache and resets the counters.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def _quantize_angle(self, angle):
+        """
+        Internal function which rounds an angle to the angle step and brings it
+        into the range [0, 360).
+        """
+        return round(angle / self.angle_step) * self.angle_step % 360
+
+    def _get(self, key, transform, *args):
+        """
+        Internal function which returns the cached result for key, computing it
+        with transform(*args) on a miss.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        result = transform(*args)
+        size = result.get_pitch() * result.get_height()
+
+        if size > self.max_bytes:
+            return result
+
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (result, size)
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    _, (_, evicted_size) = self.entries.popitem(last=False)
+                    self.current_bytes -= evicted_size
+                    self.evictions += 1
+
+        return result
+
+
+# Process-wide cache used by all animatables
+transform_cache = TransformCache()
@@ -0,0 +1,329 @@
+"""
+This file contains the tweens which drive the position of animatables. A tween
+only stores where an animation starts and ends, when it starts and how long it
+lasts, so the position at any point in time is computed on demand instead of
+precomputing (and storing) a position for every frame.
+"""
+
+import time
+import numpy as np
+
+from .helpers import circle_transform
+
+# Easing ids
+LINEAR = 0
+EASE_OUT = 1
+
+# Maps easing id => function mapping progress (0 to 1) to the fraction of the
+# distance covered (0 to 1)
+EASINGS = {
+    LINEAR: lambda p: p,
+    EASE_OUT: lambda p: 1 - (1 - p)**2,
+}
+
+# Tween kinds (used by TweenStore)
+MOVE = 0
+CIRCLE = 1
+
+_time_source = time.perf_counter
+
+
+def get_time():
+    """
+    Returns the current animation time in seconds.
+    """
+    return _time_source()
+
+
+def set_time_source(source):
+    """
+    Replaces the clock that animations are evaluated against. Useful for
+    running animations faster (or slower) than real time, e.g. in benchmarks.
+    Parameters:
+    -----------
+    source: a parameterless function returning the current time in seconds,
+        or None to go back to the real clock
+    """
+    global _time_source
+    if source is None:
+        source = time.perf_counter
+    _time_source = source
+
+
+class Tween:
+    """
+    Base class of all tweens. Subclasses implement position.
+    """
+
+    def __init__(self, start_time, duration):
+        """
+        Parameters:
+        -----------
+        start_time: animation time (see get_time) at which the tween starts
+        duration: how long in seconds the tween lasts
+        """
+        self.start_time = start_time
+        self.duration = duration
+        self.end_time = start_time + duration
+
+        # Index of this tween in the TweenStore (None if not in the store)
+        self.slot = None
+
+    def progress(self, now):
+        """
+        Returns how far along the tween is at the given time, between 0 and 1.
+        """
+        if self.duration <= 0 or now >= self.end_time:
+            return 1
+        if now <= self.start_time:
+            return 0
+        return (now - self.start_time) / self.duration
+
+    def position(self, now):
+        """
+        Returns the (x, y) position at the given time. Uses the position
+        computed by the last TweenStore.evaluate if it was for the same time.
+        """
+        if self.slot is not None:
+            position = tween_store.get_position(self.slot, now)
+            if position is not None:
+                return position
+        return self.calculate_position(now)
+
+    def calculate_position(self, now):
+        """
+        Calculates the (x, y) position at the given time for this tween only.
+        """
+        raise NotImplementedError
+
+
+class MoveTween(Tween):
+    """
+    Moves in a straight line from one point to another.
+    """
+
+    def __init__(self, start, end, start_time, duration, easing=EASE_OUT):
+        """
+        Parameters:
+        -----------
+        start: (x, y) tuple of the starting position
+        end: (x, y) tuple of the ending position
+        start_time: animation time at which the tween starts
+        duration: how long in seconds the tween lasts
+        easing: an easing id (e.g. LINEAR or EASE_OUT)
+        """
+        super(MoveTween, self).__init__(start_time, duration)
+        self.start = start
+        self.end = end
+        self.easing = easing
+
+    def calculate_position(self, now):
+        fraction = EASINGS[self.easing](self.progress(now))
+        start_x, start_y = self.start
+        end_x, end_y = self.end
+        return (start_x + (end_x - start_x) * fraction,
+                start_y + (end_y - start_y) * fraction)
+
+
+class CircleTween(Tween):
+    """
+    Moves around a circle at a constant speed.
+    """
+
+    def __init__(self, start, center, angle, start_time, duration):
+        """
+        Parameters:
+        -----------
+        start: (x, y) tuple of the starting position
+        center: (x, y) tuple of the center of the circle
+        angle: how many degrees to rotate around circle
+        start_time: animation time at which the tween starts
+        duration: how long in seconds the tween lasts
+        """
+        super(CircleTween, self).__init__(start_time, duration)
+        self.start = start
+        self.center = center
+        self.angle = angle
+        self.easing = LINEAR
+
+    def calculate_position(self, now):
+        point_x, point_y = self.start
+        center_x, center_y = self.center
+        return circle_transform(point_x, point_y, center_x, center_y,
+                                self.angle * self.progress(now))
+
+
+class FreezeTween(Tween):
+    """
+    Stays in place.
+    """
+
+    def __init__(self, start, start_time, duration):
+        """
+        Parameters:
+        -----------
+        start: (x, y) tuple of the position to stay at
+        start_time: animation time at which the tween starts
+        duration: how long in seconds the tween lasts
+        """
+        super(FreezeTween, self).__init__(start_time, duration)
+        self.start = start
+        self.easing = LINEAR
+
+    def calculate_position(self, now):
+        return self.start
+
+
+class TweenStore:
+    """
+    Keeps the parameters of every active tween in NumPy arrays so that the
+    positions of all of them can be computed in one vectorized step per frame,
+    rather than one tween at a time in Python. Tweens are added when they
+    start and leave the store once an evaluation finds them finished.
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Parameters:
+        -----------
+        capacity: how many tweens to make room for initially (the arrays grow
+            as needed)
+        """
+        self.tweens = [None] * capacity
+        self.free_slots = list(range(capacity - 1, -1, -1))
+
+        self.kinds = np.zeros(capacity, dtype=np.int8)
+        self.easings = np.zeros(capacity, dtype=np.int8)
+        self.start_times = np.zeros(capacity)
+        self.durations = np.zeros(capacity)
+        self.starts = np.zeros((capacity, 2))
+        self.ends = np.zeros((capacity, 2))
+        self.centers = np.zeros((capacity, 2))
+        self.angles = np.zeros(capacity)
+        self.active = np.zeros(capacity, dtype=bool)
+
+        # Result of the last evaluation
+        self.evaluated_at = None
+        self.positions = []
+        # Slots filled since the last evaluation
+        self.fresh_slots = set()
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def add(self, tween):
+        """
+        Starts tracking a tween.
+        Parameters:
+        -----------
+        tween: a MoveTween, CircleTween or FreezeTween
+        """
+        if not len(self.free_slots):
+            self._grow()
+
+        slot = self.free_slots.pop()
+        self.tweens[slot] = tween
+        tween.slot = slot
+        self.fresh_slots.add(slot)
+
+        self.easings[slot] = tween.easing
+        self.start_times[slot] = tween.start_time
+        self.durations[slot] = tween.duration
+        self.starts[slot] = tween.start
+        self.active[slot] = True
+
+        if isinstance(tween, CircleTween):
+            self.kinds[slot] = CIRCLE
+            self.centers[slot] = tween.center
+            self.angles[slot] = tween.angle
+        elif isinstance(tween, MoveTween):
+            self.kinds[slot] = MOVE
+            self.ends[slot] = tween.end
+        else:
+            # Freezing is moving to where you already are
+            self.kinds[slot] = MOVE
+            self.ends[slot] = tween.start
+
+    def remove(self, tween):
+        """
+        Stops tracking a tween. Does nothing if it is not tracked.
+        """
+        slot = tween.slot
+        if slot is None or self.tweens[slot] is not tween:
+            return
+        self.tweens[slot] = None
+        self.active[slot] = False
+        self.free_slots.append(slot)
+        self.fresh_slots.discard(slot)
+        tween.slot = None
+
+    def evaluate(self, now):
+        """
+        Computes the position of every tracked tween at the given time, then
+        stops tracking the tweens which have finished.
+        Parameters:
+        -----------
+        now: the current animation time (see get_time)
+        """
+        durations = self.durations
+        with np.errstate(divide="ignore", invalid="ignore"):
+            progress = np.where(
+                durations > 0, (now - self.start_times) / durations, 1)
+        np.clip(progress, 0, 1, out=progress)
+
+        fractions = np.where(
+            self.easings == EASE_OUT, 1 - (1 - progress)**2, progress)
+
+        # Straight line movement
+        positions = self.starts + (self.ends - self.starts) * fractions[:, None]
+
+        # Circular movement (same as helpers.circle_transform)
+        circles = np.flatnonzero(self.active & (self.kinds == CIRCLE))
+        if len(circles):
+            radians = np.radians(self.angles[circles] * progress[circles])
+            cos, sin = np.cos(radians), np.sin(radians)
+            origin = self.starts[circles] - self.centers[circles]
+            x_prime = np.round(origin[:, 0] * cos - origin[:, 1] * sin, 2)
+            y_prime = np.round(origin[:, 1] * cos + origin[:, 0] * sin, 2)
+            positions[circles] = self.centers[circles] + \
+                np.stack((x_prime, y_prime), axis=1)
+
+        self.positions = positions.tolist()
+        self.evaluated_at = now
+        self.fresh_slots = set()
+
+        finished = np.flatnonzero(self.active & (progress >= 1))
+        for slot in finished.tolist():
+            self.remove(self.tweens[slot])
+
+    def get_position(self, slot, now):
+        """
+        Returns the position computed for the slot by the last evaluation if it
+        was done for the given time, otherwise None.
+        """
+        if now != self.evaluated_at or slot in self.fresh_slots:
+            return None
+        return tuple(self.positions[slot])
+
+    def _grow(self):
+        """
+        Internal function which doubles the capacity of the store.
+        """
+        capacity = len(self.tweens)
+        self.tweens.extend([None] * capacity)
+        self.free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+        self.kinds = np.resize(self.kinds, 2 * capacity)
+        self.easings = np.resize(self.easings, 2 * capacity)
+        self.start_times = np.resize(self.start_times, 2 * capacity)
+        self.durations = np.resize(self.durations, 2 * capacity)
+        self.starts = np.resize(self.starts, (2 * capacity, 2))
+        self.ends = np.resize(self.ends, (2 * capacity, 2))
+        self.centers = np.resize(self.centers, (2 * capacity, 2))
+        self.angles = np.resize(self.angles, 2 * capacity)
+        self.active = np.resize(self.active, 2 * capacity)
+        self.active[capacity:] = False
+
+
+# Process-wide store of the tweens of all animatables
+tween_store = TweenStore()
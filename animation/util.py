@@ -6,6 +6,9 @@ import math
 from audio.audio import *
 from .animatable import Animatable
 from .shared_objects import SharedObjects
+from .tween import tween_store, get_time
+from .transform_cache import transform_cache
+from .profiler import frame_profiler
 
 from . import constants as c
 
@@ -20,6 +23,14 @@ TIMER_THREAD_STOP = False
 TIMER_THREAD_RUNNING = False
 
 
+# Maps each animatable drawn on the previous frame to the rect it covered
+drawn_rects = {}
+# Order in which animatables were drawn on the previous frame
+drawn_order = []
+# When True, the next frame repaints the entire display
+full_redraw = True
+
+
 def next_frame():
     """
     Draws the next frame in the game. Should be called continuously at every
@@ -27,25 +38,175 @@ def next_frame():
     """
     global clock, surface, base_surface, animatables, disposable_animatables
 
-    # Restore background
-    surface.blit(base_surface, (0, 0))
+    frame_profiler.begin_frame()
+    transforms_before = transform_cache.misses
+
+    # Advance every active position animation at once
+    now = get_time()
+    tween_store.evaluate(now)
 
+    groups = (animatables, disposable_animatables,
+              frame_profiler.get_overlays())
+
+    if c.DIRTY_RECT_RENDERING:
+        num_drawn = _draw_dirty_frame(now, groups)
+    else:
+        num_drawn = _draw_full_frame(now, groups)
+
+    if c.LIMIT_FRAME_RATE:
+        clock.tick(c.FPS)
+    else:
+        clock.tick()
+    frame_profiler.mark("tick")
+
+    frame_profiler.end_frame(
+        num_drawn, transform_cache.misses - transforms_before)
+
+
+def _draw_full_frame(now, groups):
+    """
+    Repaints the whole display: the background and then every animatable.
+    Returns the number of animatables drawn.
+    Parameters:
+    -----------
+    now: the animation time of this frame
+    groups: iterables of animatables, drawn in order
+    """
     frames = []
-    for animatable in animatables:
-        potential_frame = animatable.get_frame()
-        if potential_frame is not None:
-            frames.append(potential_frame)
+    for group in groups:
+        for animatable in group:
+            potential_frame = animatable.get_frame(now)
+            if potential_frame is not None:
+                frames.append(potential_frame)
+    frame_profiler.mark("animate")
 
-    for animatable in disposable_animatables:
-        potential_frame = animatable.get_frame()
-        if potential_frame is not None:
-            frames.append(potential_frame)
+    # Restore background
+    surface.blit(base_surface, (0, 0))
 
     # Draw animatables on top of background
     surface.blits(frames)
+    frame_profiler.mark("blit")
 
     pygame.display.update()
-    clock.tick(c.FPS)
+    frame_profiler.mark("update")
+
+    return len(frames)
+
+
+def _draw_dirty_frame(now, groups):
+    """
+    Repaints only the regions of the display which changed since the previous
+    frame. The background is restored in those regions, the animatables
+    overlapping them are drawn again and only those regions are sent to the
+    display. Returns the number of animatables drawn.
+    Parameters:
+    -----------
+    now: the animation time of this frame
+    groups: iterables of animatables, drawn in order
+    """
+    global drawn_rects, drawn_order, full_redraw
+
+    frames = []
+    dirty_rects = []
+    current_rects = {}
+    current_order = []
+
+    for group in groups:
+        for animatable in group:
+            potential_frame = animatable.get_frame(now)
+            dirty_rects.extend(animatable.get_dirty_rects())
+            if potential_frame is not None:
+                frames.append(potential_frame)
+                current_rects[animatable] = animatable.previous_rect
+                current_order.append(animatable)
+
+    # Animatables which stopped being drawn leave a hole behind them
+    for animatable, rect in drawn_rects.items():
+        if animatable not in current_rects:
+            dirty_rects.append(rect)
+
+    # Animatables which (re)appeared must be drawn even if they did not change
+    for animatable, rect in current_rects.items():
+        if animatable not in drawn_rects:
+            dirty_rects.append(rect)
+
+    # A change in stacking order (e.g. bring_to_front) alters what is visible
+    # without moving anything, so fall back to repainting everything
+    previous_order = [a for a in drawn_order if a in current_rects]
+    kept_order = [a for a in current_order if a in drawn_rects]
+    if previous_order != kept_order:
+        full_redraw = True
+
+    drawn_rects = current_rects
+    drawn_order = current_order
+
+    frame_profiler.mark("animate")
+
+    screen_rect = surface.get_rect()
+
+    if full_redraw:
+        full_redraw = False
+        surface.blit(base_surface, (0, 0))
+        surface.blits(frames)
+        frame_profiler.mark("blit")
+        pygame.display.update()
+        frame_profiler.mark("update")
+        return len(frames)
+
+    dirty_rects = [screen_rect.clip(rect) for rect in dirty_rects]
+    dirty_rects = _merge_rects(
+        [rect for rect in dirty_rects if rect.w and rect.h])
+
+    if not len(dirty_rects):
+        return len(frames)
+
+    # Restore background and redraw the animatables touching each dirty
+    # region. Drawing is clipped to the region so that translucent pixels
+    # outside of it are not blended a second time.
+    for rect in dirty_rects:
+        surface.set_clip(rect)
+        surface.blit(base_surface, rect, rect)
+        surface.blits([
+            frame for frame, animatable in zip(frames, current_order)
+            if current_rects[animatable].colliderect(rect)
+        ])
+    surface.set_clip(None)
+    frame_profiler.mark("blit")
+
+    pygame.display.update(dirty_rects)
+    frame_profiler.mark("update")
+
+    return len(frames)
+
+
+def _merge_rects(rects):
+    """
+    Merges overlapping rects together so that every region is restored and
+    updated only once. Returns a new list of pygame.Rect objects.
+    Parameters:
+    -----------
+    rects: a list of pygame.Rect objects
+    """
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        # Growing a rect may make it overlap rects that were already merged
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+def request_full_redraw():
+    """
+    Makes the next frame repaint the entire display. Must be called whenever
+    the base surface is drawn on, since the dirty-rect renderer only restores
+    the background in regions where animatables changed.
+    """
+    global full_redraw
+    full_redraw = True
 
 
 def bring_to_front(animatable):
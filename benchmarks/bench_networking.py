@@ -0,0 +1,298 @@
+"""
+Load test of the client protocol: simulated players drive the functions of
+networking (connect, serverConnect, turnSend, sendMove/checkMoves and
+sendEndGame) against the local stand-in server (network.server), at one or
+more numbers of concurrent games.
+
+Every simulated player is a separate copy of the networking module (which
+keeps its state in globals), pointed at the server through HOST and PORT.
+Their clients share one event loop thread (networking.LOOP) instead of
+starting a thread each. Players join from a pool of threads, since
+serverConnect blocks until their game is full; then one thread plays every
+game like the game loop does, calling checkMoves once per player per frame.
+In every game the lobby leader sends the turn order, then each player plays
+a number card as soon as the move naming it as next player arrives, until
+--moves were played and the last player ends the game.
+
+Records, in HDR-style histograms (see benchmarks.histogram):
+- connect: time networking.connect took to open the connection
+- players_done: time from connect until serverConnect set playersDone
+- move_rtt: time from a player's sendMove until checkMoves returned the next
+  player's move (a round trip through the server and the next player)
+
+Usage:
+    python -m benchmarks.bench_networking [--games N ...] [--players N]
+        [--moves N] [--json PATH]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import networking
+from benchmarks.histogram import Histogram
+from cardgame.cards import Deck
+from cardgame.simulation import generate_uno_cards
+
+GAMES = [10, 100, 1000]
+PLAYERS = 2
+MOVES = 20
+
+# Threads players join from
+JOIN_THREADS = 64
+
+# Seconds every scale may take to join and to play
+TIMEOUT = 600
+
+HISTOGRAMS = ("connect", "players_done", "move_rtt")
+
+
+def load_networking(host, port, loop):
+    """
+    Returns a new copy of the networking module, with its own globals,
+    connecting to host:port on loop.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "networking", networking.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.HOST = host
+    module.PORT = port
+    module.LOOP = loop
+    return module
+
+
+class Player:
+    """
+    A simulated player and its copy of networking.
+    """
+
+    def __init__(self, name, net):
+        self.name = name
+        self.net = net
+        self.game = None
+        # Time the player's last move was sent, until the next one arrives
+        self.sent = None
+        self.done = False
+        self.error = None
+
+
+class Game:
+    """
+    The shared script of a game: its turn order and the cards played.
+    """
+
+    def __init__(self, order):
+        self.order = order
+        deck = Deck(cards=generate_uno_cards())
+        self.deck = deck
+        self.cards = [card for card in deck.cards if card.value.isdigit()]
+        self.moves = 0
+
+
+def join(player, histograms, lock):
+    """
+    Connects a player and joins a game, like the lobby screen.
+    """
+    net = player.net
+    start = time.perf_counter()
+    net.connect()
+    connected = time.perf_counter()
+    if net.servConnect != 1:
+        player.error = "connect failed"
+        return
+    net.serverConnect(player.name)
+    if not net.playersDone:
+        player.error = "serverConnect failed"
+        return
+    with lock:
+        histograms["connect"].record_seconds(connected - start)
+        histograms["players_done"].record_seconds(
+            time.perf_counter() - start)
+
+
+def send_move(player):
+    game = player.game
+    net = player.net
+    card = game.cards[game.moves % len(game.cards)]
+    game.moves += 1
+    next_player = net.getNextPlayer(net.PID, game.order, card.value)
+    player.sent = time.perf_counter()
+    net.sendMove(net.PID, "discard", card.color, card.value, card.id,
+                 next_player)
+
+
+def frame(player, moves, histograms):
+    """
+    Handles the messages which arrived for a player since its last frame.
+    """
+    net = player.net
+    message = net.checkMoves()
+    while message is not None and not player.done:
+        message_type = message.get("messageType")
+        if message_type == "game-finished":
+            player.done = True
+        elif message_type != "game-state":
+            player.error = str(message.get("data"))
+            player.done = True
+        elif "nextPlayer" in message["data"]["state"]:
+            if player.sent is not None:
+                histograms["move_rtt"].record_seconds(
+                    time.perf_counter() - player.sent)
+                player.sent = None
+            if message["data"]["state"]["nextPlayer"] == net.PID:
+                if player.game.moves >= moves:
+                    net.sendEndGame()
+                    player.done = True
+                else:
+                    send_move(player)
+        message = net.checkMoves()
+
+
+def start_server(players):
+    """
+    Starts network.server in a subprocess on a free port. Returns the process
+    and the port.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "network.server", "--port", "0",
+         "--max-players", str(players)],
+        cwd=root, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Listening on"):
+        process.kill()
+        raise RuntimeError(f"The server did not start: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def run(games, players=PLAYERS, moves=MOVES, host=None, port=None):
+    """
+    Runs the load test with games concurrent games and returns its
+    measurements.
+    Parameters:
+    -----------
+    games: number of concurrent games
+    players: players per game (must match the server's)
+    moves: moves played in every game
+    host, port: address of a running server (default: start one)
+    """
+    process = None
+    if host is None:
+        process, port = start_server(players)
+        host = "127.0.0.1"
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="network",
+                              daemon=True)
+    thread.start()
+
+    histograms = {name: Histogram() for name in HISTOGRAMS}
+    lock = threading.Lock()
+    clients = [Player(f"player{i}", load_networking(host, port, loop))
+               for i in range(games * players)]
+    # The clients print every message they get
+    output = open(os.devnull, "w")
+    try:
+        with contextlib.redirect_stdout(output):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(JOIN_THREADS) as executor:
+                futures = [executor.submit(join, player, histograms, lock)
+                           for player in clients]
+                for future in futures:
+                    future.result(TIMEOUT)
+            joined = time.perf_counter()
+
+            by_order = {}
+            playing = []
+            for player in clients:
+                if player.error is not None:
+                    continue
+                net = player.net
+                order = [entry["id"] for entry in net.players["data"]]
+                player.game = by_order.get(tuple(order))
+                if player.game is None:
+                    player.game = by_order[tuple(order)] = Game(order)
+                playing.append(player)
+                if net.players["data"][0]["id"] == net.PID:
+                    net.turnSend(net.PID, order, player.game.deck)
+                    send_move(player)
+
+            deadline = time.perf_counter() + TIMEOUT
+            while playing and time.perf_counter() < deadline:
+                for player in playing:
+                    frame(player, moves, histograms)
+                playing = [player for player in playing if not player.done]
+                # Let the network thread run, as the game loop's frame rate
+                # would
+                time.sleep(0)
+            elapsed = time.perf_counter() - joined
+    finally:
+        for player in clients:
+            player.net.disconnect()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        output.close()
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    errors = [player.error for player in clients if player.error is not None]
+    played = sum(game.moves for game in by_order.values())
+    return dict(
+        games=games, players=players, clients=len(clients),
+        games_started=len(by_order), unfinished=len(playing),
+        moves=played, join_seconds=joined - start, play_seconds=elapsed,
+        moves_per_second=played / elapsed if elapsed else 0.0,
+        error_count=len(errors), errors=errors[:10],
+        histograms={name: histogram.to_dict()
+                    for name, histogram in histograms.items()},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--games", type=int, nargs="+", default=GAMES,
+                        help="numbers of concurrent games to test")
+    parser.add_argument("--players", type=int, default=PLAYERS,
+                        help="players per game")
+    parser.add_argument("--moves", type=int, default=MOVES,
+                        help="moves per game")
+    parser.add_argument("--host", help="address of a running server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for games in args.games:
+        result = run(games, args.players, args.moves, args.host, args.port)
+        results.append(result)
+        print("{} games: {} moves in {:.2f} s ({:.0f} moves/s), {} errors, "
+              "{} unfinished".format(games, result["moves"],
+                                     result["play_seconds"],
+                                     result["moves_per_second"],
+                                     result["error_count"],
+                                     result["unfinished"]))
+        for name in HISTOGRAMS:
+            summary = result["histograms"][name]
+            print("  {:<13} p50 {:>9.2f} ms  p99 {:>9.2f} ms  "
+                  "max {:>9.2f} ms".format(name, summary["p50"] / 1e3,
+                                           summary["p99"] / 1e3,
+                                           summary["max"] / 1e3))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(players=args.players, moves=args.moves,
+                           results=results), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Headless benchmarks of the animation render path.
+
+Every scenario is scripted through animation.next_frame with SDL's dummy
+video/audio drivers, without frame rate limiting and with the animation clock
+advancing exactly one frame per next_frame call, so the numbers only depend on
+how much work each frame does. Each scenario runs in its own process so that
+its peak RSS is not polluted by the other scenarios.
+
+Usage:
+    python -m benchmarks.bench_render [--scenario NAME ...] [--json PATH]
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+SCENARIOS = ("intro", "deal", "shift_hand", "play_wild")
+
+# Frames drawn after the intro scene is shown
+INTRO_FRAMES = 300
+
+# Frames drawn after dealing so that every card reaches the hand
+SETTLE_FRAMES = 60
+
+NUM_SHIFTS = 100
+
+NUM_PLAYS = 50
+
+# Seed of the games dealt by the benchmarks, so that every run plays the same
+# cards
+SEED = 0
+
+
+def _frames_for(duration, fps):
+    """
+    Returns how many frames an animation of the given duration spans.
+    """
+    return int(math.ceil(duration * fps)) + 1
+
+
+def _setup():
+    """
+    Initializes pygame headlessly and makes the animation clock advance one
+    frame per next_frame call. Returns the imported main module.
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    import pygame
+    pygame.init()
+
+    import animation
+    import animation.constants as c
+    from animation import tween
+
+    c.LIMIT_FRAME_RATE = False
+    tween.set_time_source(lambda: animation.frame_profiler.count / c.FPS)
+
+    import main
+    return main
+
+
+def _run_frames(num_frames):
+    import animation
+    for _ in range(num_frames):
+        animation.next_frame()
+
+
+def scenario_intro(main):
+    import animation
+    animation.intro.show()
+    _run_frames(INTRO_FRAMES)
+
+
+def scenario_deal(main):
+    main.init_game(SEED)
+    _run_frames(SETTLE_FRAMES)
+
+
+def scenario_shift_hand(main):
+    import animation
+    import animation.constants as c
+
+    main.init_game(SEED)
+    _run_frames(SETTLE_FRAMES)
+
+    frames = _frames_for(c.SHIFT_HAND_DURATION, c.FPS)
+    for i in range(NUM_SHIFTS):
+        # Sweep back and forth across the hand
+        animation.game.shift_hand((i // 7) % 2 == 0)
+        _run_frames(frames)
+
+
+def scenario_play_wild(main):
+    import animation
+    import animation.constants as c
+
+    main.init_game(SEED)
+    _run_frames(SETTLE_FRAMES)
+
+    frames = _frames_for(c.MOVE_CARD_ANI_DURATION, c.FPS)
+    for i in range(NUM_PLAYS):
+        card = main.DECK.draw(1)[0]
+        animation.game.draw_card(card.id)
+        _run_frames(frames)
+
+        animation.game.play_card(card.id)
+        if card.value in ["wild", "wild_draw"]:
+            # Morph in this thread so the benchmark does not wait in real time
+            animation.game._wildcard_morph(i % 4, 0)
+        main.DECK.discard([card])
+        _run_frames(frames)
+
+    _run_frames(_frames_for(1, c.FPS))
+
+
+def run_scenario(name, trace=False):
+    """
+    Runs one scenario in the current process and returns its measurements.
+    Parameters:
+    -----------
+    name: one of SCENARIOS
+    trace: if True, allocations are traced with tracemalloc (which makes the
+        scenario much slower, so frame rates and RSS are not reported)
+    """
+    import resource
+
+    main = _setup()
+    import animation
+
+    function = globals()["scenario_" + name]
+
+    if trace:
+        tracemalloc.start()
+
+    frames_before = animation.frame_profiler.count
+    start = time.perf_counter()
+    function(main)
+    elapsed = time.perf_counter() - start
+    frames = animation.frame_profiler.count - frames_before
+
+    result = dict(scenario=name)
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stats = snapshot.statistics("filename")
+        # Memory blocks allocated during the scenario and still alive
+        result["traced_blocks"] = sum(stat.count for stat in stats)
+        result["traced_bytes"] = current
+        result["peak_traced_bytes"] = peak
+    else:
+        result["frames"] = frames
+        result["seconds"] = elapsed
+        result["fps"] = frames / elapsed if elapsed else float("inf")
+        result["frame_ms"] = animation.frame_profiler.get_summary()["total"]
+        # ru_maxrss is in kilobytes on Linux
+        result["peak_rss_kb"] = resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss
+
+    return result
+
+
+def _run_in_subprocess(name, trace):
+    """
+    Runs a scenario in a fresh interpreter and returns its measurements.
+    """
+    command = [sys.executable, "-m", "benchmarks.bench_render",
+               "--child", name]
+    if trace:
+        command.append("--trace")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(command, cwd=root, check=True,
+                            stdout=subprocess.PIPE).stdout
+    # The last line is the result (pygame may print a banner first)
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="scenario to run (default: all)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--no-trace", action="store_true",
+                        help="skip the allocation tracing runs")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.trace)))
+        return
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        result = _run_in_subprocess(name, trace=False)
+        if not args.no_trace:
+            traced = _run_in_subprocess(name, trace=True)
+            del traced["scenario"]
+            result.update(traced)
+        results.append(result)
+
+        print("{:<12} {:>8.1f} fps  p99 {:>6.2f} ms  peak RSS {:>8} KiB".format(
+            name, result["fps"], result["frame_ms"]["p99"],
+            result["peak_rss_kb"]), end="")
+        if "traced_blocks" in result:
+            print("  {:>9} blocks  peak {:>10} B".format(
+                result["traced_blocks"], result["peak_traced_bytes"]),
+                end="")
+        print()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmarks of saving and loading a game state (a 108-card deck split between
+the deck, the discard pile and a hand) as JSON.
+
+Compares the original nested round-trip, where every level re-serializes its
+children with json.dumps so that they can parse them again with json.loads,
+with the single-pass dictionary path (toDict/loadDict) and streaming to and
+from a file (dump_json/load_json).
+
+Usage:
+    python -m benchmarks.bench_serialize [--repeat N] [--json PATH]
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+
+from cardgame.cards import Card, ComplexEncoder, Deck, Hand, dump_json, \
+    load_json
+from cardgame.simulation import generate_uno_cards
+
+# Cards dealt to the hand and discarded before the state is saved
+HAND_SIZE = 7
+DISCARDED = 30
+
+REPEAT = 2000
+
+# Seed of the shuffle, so that every run saves the same state
+SEED = 0
+
+
+def make_hand():
+    """
+    Returns a Hand whose deck holds the rest of a shuffled Uno deck, with
+    DISCARDED cards on its discard pile.
+    """
+    discard = Deck()
+    deck = Deck(discard=discard, cards=generate_uno_cards(),
+                rng=random.Random(SEED))
+    deck.shuffle()
+    deck.discard(deck.draw(DISCARDED))
+    hand = Hand(deck)
+    hand.draw(HAND_SIZE)
+    return hand
+
+
+def nested_load_card(data):
+    card = Card()
+    jsondata = json.loads(data)
+    card.id = jsondata["id"]
+    card.value = jsondata["value"]
+    card.color = jsondata["color"]
+    return card
+
+
+def nested_load_deck(deck, data):
+    jsondata = json.loads(data)
+    deck.cards = [nested_load_card(json.dumps(card))
+                  for card in jsondata["cards"]]
+    if jsondata["discardDeck"]:
+        if deck.discardDeck is None:
+            deck.discardDeck = Deck()
+        nested_load_deck(deck.discardDeck, json.dumps(jsondata["discardDeck"]))
+    return deck
+
+
+def nested_load_hand(hand, data):
+    """
+    The original Hand.loadJSON: every level is parsed, dumped again and
+    parsed again by the level below.
+    """
+    jsondata = json.loads(data)
+    hand.cards = [nested_load_card(json.dumps(card))
+                  for card in jsondata["cards"]]
+    nested_load_deck(hand.deck, json.dumps(jsondata["deck"]))
+    return hand
+
+
+def _time(function, repeat):
+    """
+    Returns the best time of five runs of function, in microseconds per call.
+    """
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / repeat * 1e6
+
+
+def run(repeat=REPEAT):
+    hand = make_hand()
+    string = json.dumps(hand.reprJSON(), cls=ComplexEncoder)
+    if json.dumps(hand.toDict()) != string:
+        raise AssertionError("toDict does not match reprJSON")
+    data = hand.toDict()
+
+    def stream_round_trip():
+        f = io.StringIO()
+        dump_json(hand, f)
+        f.seek(0)
+        load_json(Hand(Deck()), f)
+
+    cases = dict(
+        nested_dump=lambda: json.dumps(hand.reprJSON(), cls=ComplexEncoder),
+        nested_load=lambda: nested_load_hand(Hand(Deck()), string),
+        dict_dump=lambda: json.dumps(hand.toDict()),
+        dict_load=lambda: Hand(Deck()).loadJSON(string),
+        load_parsed=lambda: Hand(Deck()).loadDict(data),
+        stream_round_trip=stream_round_trip,
+    )
+    results = {name: _time(case, repeat) for name, case in cases.items()}
+    results["nested_round_trip"] = results["nested_dump"] + results["nested_load"]
+    results["dict_round_trip"] = results["dict_dump"] + results["dict_load"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=REPEAT,
+                        help="calls per timing run")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    baseline = results["nested_round_trip"]
+    for name, micros in results.items():
+        print("{:<18} {:>9.1f} us  {:>5.1f}x".format(
+            name, micros, baseline / micros))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Load test of the local stand-in server (network.server) with headless
+clients (network.client.Client) playing scripted games.
+
+Every client joins the default game, so the server matches them into rooms of
+--players. In every room the lobby leader sends the turn order message (a
+snapshot of a full deck), then the players take turns sending moves until
+--moves were played; each move is sent by the player the previous move named
+as nextPlayer as soon as it arrived. Reports the time clients took to join,
+the latency of every move (from its sender to each of the other players of
+the room) in HDR-style histograms (see benchmarks.histogram), and the
+number of moves relayed per second.
+
+All the clients run on one event loop in this process; the server runs in a
+subprocess, unless the address of a running server is given.
+
+Usage:
+    python -m benchmarks.bench_server [--clients N] [--players N]
+        [--moves N] [--format compact|json] [--host HOST --port PORT]
+        [--json PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+
+from benchmarks.histogram import Histogram
+from cardgame.cards import Deck
+from cardgame.simulation import generate_uno_cards
+from network import compact
+from network.client import Client
+from network.protocol import GAME_FINISHED, GAME_STATE
+
+CLIENTS = 200
+PLAYERS = 2
+MOVES = 100
+
+# Seconds the whole load test may take
+TIMEOUT = 300
+
+
+HISTOGRAMS = ("open", "connect", "move")
+
+
+class Room:
+    """
+    What the clients of a room share to script and time their game.
+    """
+
+    def __init__(self, cards):
+        self.cards = cards
+        # Maps the cardID of every move to the time it was sent: moves play
+        # the cards of the snapshot in turn, and only one is in flight at a
+        # time, so the ids tell them apart
+        self.sent = {}
+        self.moves = 0
+
+
+def make_move(room, client, next_player):
+    """
+    Sends the next move of a room, which plays the next card of the snapshot.
+    """
+    card = room.cards[room.moves % len(room.cards)]
+    room.moves += 1
+    room.sent[card["id"]] = time.perf_counter()
+    return client.send({"messageType": GAME_STATE, "data": {"state": {
+        "source": client.id, "dest": "discard", "color": card["color"],
+        "value": card["value"], "cardID": card["id"], "reverseOrder": False,
+        "nextPlayer": next_player, "sender": client.id}}})
+
+
+async def play(client, rooms, moves, latencies):
+    """
+    Plays the scripted game of a connected client until its room finished
+    moves moves, recording the latency of the moves it gets in latencies (a
+    Histogram).
+    """
+    order = [player["id"] for player in client.players["data"]]
+    room = rooms.get(tuple(order))
+    if room is None:
+        deck = Deck(cards=generate_uno_cards()).toDict()
+        room = rooms[tuple(order)] = Room(deck["cards"])
+    next_player = order[(order.index(client.id) + 1) % len(order)]
+
+    if client.players["data"][0]["id"] == client.id:
+        await client.send({"messageType": GAME_STATE, "data": {"state": {
+            "turn": client.id, "order": order,
+            "deck": {"discardDeck": None, "cards": room.cards}}}})
+        await make_move(room, client, next_player)
+
+    while True:
+        message = await client.receive()
+        message_type = message.get("messageType")
+        if message_type == GAME_FINISHED:
+            return
+        if message_type != GAME_STATE:
+            raise RuntimeError(f"Unexpected message {message}")
+        state = message["data"]["state"]
+        if "cardID" not in state:
+            continue
+        latencies.record_seconds(
+            time.perf_counter() - room.sent[state["cardID"]])
+        if state["nextPlayer"] == client.id:
+            if room.moves >= moves:
+                await client.send({"messageType": GAME_FINISHED})
+                return
+            await make_move(room, client, next_player)
+
+
+async def run_client(host, port, formats, rooms, moves, results):
+    client = Client(host, port, formats=formats)
+    try:
+        start = time.perf_counter()
+        await client.open()
+        results["open"].record_seconds(time.perf_counter() - start)
+        await client.connect("load-test")
+        results["connect"].record_seconds(time.perf_counter() - start)
+        client.poll()
+        await play(client, rooms, moves, results["move"])
+    except Exception as e:
+        results["errors"].append(repr(e))
+    finally:
+        await client.close()
+
+
+async def start_server(players):
+    """
+    Starts network.server in a subprocess on a free port. Returns the process
+    and the port.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "network.server", "--port", "0",
+        "--max-players", str(players), stdout=asyncio.subprocess.PIPE)
+    line = (await process.stdout.readline()).decode()
+    if not line.startswith("Listening on"):
+        process.kill()
+        raise RuntimeError(f"The server did not start: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def _raise_file_limit(clients):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = clients + 64
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        if hard != resource.RLIM_INFINITY:
+            wanted = min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+
+async def run(clients=CLIENTS, players=PLAYERS, moves=MOVES,
+              format=compact.COMPACT, host=None, port=None):
+    """
+    Runs the load test and returns its measurements.
+    Parameters:
+    -----------
+    clients: number of clients (a multiple of players)
+    players: players per game (must match the server's)
+    moves: moves played in every game
+    format: wire format the clients ask for
+    host, port: address of a running server (default: start one)
+    """
+    _raise_file_limit(clients)
+    process = None
+    if host is None:
+        process, port = await start_server(players)
+        host = "127.0.0.1"
+
+    formats = [format] if format == compact.JSON else compact.FORMATS
+    rooms = {}
+    results = {name: Histogram() for name in HISTOGRAMS}
+    results["errors"] = []
+    try:
+        start = time.perf_counter()
+        await asyncio.wait_for(asyncio.gather(*(
+            run_client(host, port, formats, rooms, moves, results)
+            for _ in range(clients))), TIMEOUT)
+        elapsed = time.perf_counter() - start
+    finally:
+        if process is not None:
+            process.terminate()
+            await process.wait()
+
+    played = sum(room.moves for room in rooms.values())
+    return dict(
+        clients=clients, players=players, format=format, games=len(rooms),
+        moves=played, seconds=elapsed,
+        moves_per_second=played / elapsed,
+        deliveries_per_second=results["move"].count / elapsed,
+        errors=results["errors"][:10], error_count=len(results["errors"]),
+        histograms={name: results[name].to_dict() for name in HISTOGRAMS},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--players", type=int, default=PLAYERS,
+                        help="players per game")
+    parser.add_argument("--moves", type=int, default=MOVES,
+                        help="moves per game")
+    parser.add_argument("--format", choices=[compact.COMPACT, compact.JSON],
+                        default=compact.COMPACT)
+    parser.add_argument("--host", help="address of a running server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+    if args.clients % args.players:
+        parser.error("--clients must be a multiple of --players")
+
+    result = asyncio.run(run(args.clients, args.players, args.moves,
+                             args.format, args.host, args.port))
+    print("{} clients, {} games, {} moves in {:.2f} s: {:.0f} moves/s".format(
+        result["clients"], result["games"], result["moves"],
+        result["seconds"], result["moves_per_second"]))
+    for name in ("connect", "move"):
+        summary = result["histograms"][name]
+        print("{:<10} p50 {:>7.2f} ms  p90 {:>7.2f} ms  p99 {:>7.2f} ms  "
+              "max {:>7.2f} ms".format(name, summary["p50"] / 1e3,
+                                       summary["p90"] / 1e3,
+                                       summary["p99"] / 1e3,
+                                       summary["max"] / 1e3))
+    if result["error_count"]:
+        print("{} clients failed, e.g. {}".format(
+            result["error_count"], result["errors"][0]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+HDR-style latency histograms: values are counted in buckets whose width grows
+with their magnitude, so that any value up to the highest trackable one is
+recorded with a fixed number of significant digits in constant memory.
+Histograms can be merged, and saved as JSON with their non-empty buckets.
+
+The layout follows HdrHistogram: bucket i covers [2^i * half, 2^i * 2 * half)
+in half sub-buckets of width 2^i, where half is the smallest power of two above
+10^digits (bucket 0 also covers [0, half) with width 1).
+"""
+
+import math
+
+# Values are recorded in microseconds, up to an hour
+UNIT = "us"
+HIGHEST = 3600 * 10 ** 6
+DIGITS = 2
+
+# Percentiles reported by get_summary
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class Histogram:
+    """
+    Counts integer values (e.g. latencies in microseconds) from 0 to highest
+    with digits significant decimal digits.
+    """
+
+    def __init__(self, highest=HIGHEST, digits=DIGITS, unit=UNIT):
+        """
+        Parameters:
+        -----------
+        highest: largest value recorded exactly; larger values are recorded as
+            highest and counted in overflows
+        digits: number of significant decimal digits kept (1 to 5)
+        unit: unit of the values, saved with them
+        """
+        if not 1 <= digits <= 5:
+            raise ValueError("digits must be between 1 and 5")
+        self.highest = highest
+        self.digits = digits
+        self.unit = unit
+        # Sub-buckets per bucket are 2^(magnitude + 1)
+        self.magnitude = math.ceil(math.log2(2 * 10 ** digits)) - 1
+        self.half = 1 << self.magnitude
+        self.counts = [0] * (self._index(highest) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.overflows = 0
+
+    def _index(self, value):
+        bucket = max(0, value.bit_length() - self.magnitude - 1)
+        return ((bucket + 1) << self.magnitude) + (value >> bucket) - self.half
+
+    def _value(self, index):
+        """
+        Returns the lowest value counted at index.
+        """
+        bucket = (index >> self.magnitude) - 1
+        sub = (index & (self.half - 1)) + self.half
+        if bucket < 0:
+            sub -= self.half
+            bucket = 0
+        return sub << bucket
+
+    def _highest_equivalent(self, index):
+        bucket = max(0, (index >> self.magnitude) - 1)
+        return self._value(index) + (1 << bucket) - 1
+
+    def record(self, value, count=1):
+        """
+        Records value (a non-negative number, rounded to an int) count times.
+        """
+        value = int(value)
+        if value < 0:
+            raise ValueError(f"Negative value {value}")
+        if value > self.highest:
+            self.overflows += count
+            value = self.highest
+        self.counts[self._index(value)] += count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def record_seconds(self, seconds, count=1):
+        """
+        Records a duration in seconds as microseconds.
+        """
+        self.record(seconds * 1e6, count)
+
+    def merge(self, other):
+        """
+        Adds the values of another histogram with the same layout.
+        """
+        if (other.highest, other.digits) != (self.highest, self.digits):
+            raise ValueError("Histograms have different layouts")
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.overflows += other.overflows
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def percentile(self, p):
+        """
+        Returns the value below or at which p percent of the values are (to
+        the histogram's precision), or 0 if it is empty.
+        """
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def get_summary(self, percentiles=PERCENTILES):
+        """
+        Returns a dictionary with the count, min, mean, max and percentiles of
+        the values (percentile 99.9 under the key "p99.9").
+        """
+        summary = dict(count=self.count, min=self.min or 0, mean=self.mean(),
+                       max=self.max or 0, overflows=self.overflows)
+        for p in percentiles:
+            summary["p{:g}".format(p)] = self.percentile(p)
+        return summary
+
+    def to_dict(self):
+        """
+        Returns the summary and the non-empty buckets (as [lowest value,
+        count] pairs), which json can encode.
+        """
+        data = self.get_summary()
+        data.update(unit=self.unit, highest=self.highest, digits=self.digits,
+                    buckets=[[self._value(index), count]
+                             for index, count in enumerate(self.counts)
+                             if count])
+        return data
@@ -1,12 +1,117 @@
 import random
 import json
+from array import array
+
+# Cards are stored as a single byte: the color code in the top 3 bits and the
+# value code in the bottom 5 bits. The code of a name is its index in these
+# lists; names which are not listed (e.g. "+2") are added the first time they
+# are seen, so any string keeps working.
+COLORS = [None, "Red", "Green", "Yellow", "Blue", "wild"]
+VALUES = [None] + [str(num) for num in range(10)] + \
+         ["draw", "skip", "reverse", "wild", "wild_draw"]
+
+COLOR_BITS = 3
+VALUE_BITS = 5
+VALUE_MASK = (1 << VALUE_BITS) - 1
+
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+VALUE_CODES = {value: code for code, value in enumerate(VALUES)}
+
+# MATCH_TABLE[a << 8 | b] is 1 if a card with code a can be played on a card
+# with code b
+MATCH_TABLE = bytearray(1 << 16)
+
+# Maps code b => bytes whose item a is MATCH_TABLE[a << 8 | b], i.e. which
+# cards can be played on a card with code b (filled in by playable_on)
+_PLAYABLE_ON = {}
+
+
+def _matches(color, value, other_color, other_value):
+    return color == other_color or \
+           value == other_value or \
+           value == "wild" or \
+           value == "wild_draw" or \
+           other_color == "wild"
+
+
+def _build_match_table():
+    codes = [color_code << VALUE_BITS | value_code
+             for color_code in range(len(COLORS))
+             for value_code in range(len(VALUES))]
+    for code in codes:
+        color, value = COLORS[code >> VALUE_BITS], VALUES[code & VALUE_MASK]
+        row = code << 8
+        for other in codes:
+            MATCH_TABLE[row | other] = _matches(
+                color, value, COLORS[other >> VALUE_BITS], VALUES[other & VALUE_MASK])
+    _PLAYABLE_ON.clear()
+
+
+def playable_on(code: int) -> bytes:
+    """
+    Returns a bytes object whose item a is 1 if a card with code a can be
+    played on a card with the given code, 0 otherwise.
+    """
+    column = _PLAYABLE_ON.get(code)
+    if column is None:
+        column = _PLAYABLE_ON[code] = bytes(MATCH_TABLE[code::256])
+    return column
+
+
+def _register(names, codes, name, bits):
+    """
+    Returns the code of name, adding it to names if it is new.
+    """
+    code = codes.get(name)
+    if code is None:
+        code = len(names)
+        if code >= 1 << bits:
+            raise ValueError(f"Too many distinct card names to encode {name!r}")
+        names.append(name)
+        codes[name] = code
+        _build_match_table()
+    return code
+
+
+def color_code(color: str) -> int:
+    return _register(COLORS, COLOR_CODES, color, COLOR_BITS)
+
+
+def value_code(value: str) -> int:
+    return _register(VALUES, VALUE_CODES, value, VALUE_BITS)
+
+
+_build_match_table()
+
 
 class Card:
+    """
+    An Uno card. The color and value are exposed as strings, but stored
+    together as a single byte (see COLORS and VALUES) so that cards are small
+    and match is a table lookup.
+    """
+    __slots__ = ("id", "code")
+
     def __init__(self, id=None, value: str=None, color: str=None):
         self.id = id
-        self.value = value
-        self.color = color
-    
+        self.code = color_code(color) << VALUE_BITS | value_code(value)
+
+    @property
+    def color(self) -> str:
+        return COLORS[self.code >> VALUE_BITS]
+
+    @color.setter
+    def color(self, color: str):
+        self.code = color_code(color) << VALUE_BITS | self.code & VALUE_MASK
+
+    @property
+    def value(self) -> str:
+        return VALUES[self.code & VALUE_MASK]
+
+    @value.setter
+    def value(self, value: str):
+        self.code = self.code & ~VALUE_MASK | value_code(value)
+
     def __str__(self):
         return f"{self.color} {self.value}"
 
@@ -14,26 +119,272 @@ class Card:
         return str(self)
 
     def match(self, other):
-        return self.color == other.color or \
-               self.value == other.value or \
-               self.value == "wild" or \
-               self.value == "wild_draw" or \
-               other.color == "wild"
-    
+        return MATCH_TABLE[self.code << 8 | other.code] == 1
+
+    def encode(self) -> int:
+        """
+        Returns the card (including its integer id) packed into a single int.
+        """
+        return self.id << 8 | self.code
+
+    @classmethod
+    def decode(cls, number: int) -> 'Card':
+        """
+        Returns the card packed into number by encode.
+        """
+        card = cls.__new__(cls)
+        card.id = number >> 8
+        card.code = number & 0xFF
+        return card
+
     def reprJSON(self):
         return dict(id=self.id, value=self.value, color=self.color)
 
+    def toDict(self):
+        return self.reprJSON()
+
     def loadJSON(self, data):
-        jsondata = json.loads(data)
-        self.id = jsondata["id"]
-        self.value = jsondata["value"]
-        self.color = jsondata["color"]
+        return self.loadDict(json.loads(data))
+
+    def loadDict(self, data):
+        """
+        Loads the card from a dictionary shaped like reprJSON's.
+        """
+        self.id = data["id"]
+        self.code = color_code(data["color"]) << VALUE_BITS | \
+            value_code(data["value"])
         return self
     
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        if not isinstance(other, Card):
+            return NotImplemented
+        return self.id == other.id and self.code == other.code
         
 
+class CardList:
+    """
+    A list of cards indexed by card id, so that drawing from the end, adding,
+    finding and removing a card are all O(1) (removing keeps the order of the
+    other cards). Every card must have a unique integer id.
+
+    Behaves like a list of Card objects for reading (indexing, slicing,
+    iteration, len, in and comparison with lists), but indexing anything other
+    than the first or last card is O(n).
+    """
+
+    def __init__(self, cards=()):
+        # Maps card id => Card, in list order
+        self.by_id = {}
+        if len(cards):
+            self.extend(cards)
+
+    def append(self, card):
+        if card.id in self.by_id:
+            raise ValueError(f"A card with id {card.id} is already in the list")
+        self.by_id[card.id] = card
+
+    def extend(self, cards):
+        by_id = self.by_id
+        if len(cards) <= 2:
+            for card in cards:
+                if card.id in by_id:
+                    raise ValueError(
+                        f"A card with id {card.id} is already in the list")
+                by_id[card.id] = card
+            return
+        new = {card.id: card for card in cards}
+        if len(new) != len(cards) or not by_id.keys().isdisjoint(new):
+            raise ValueError("Every card in the list must have a unique id")
+        by_id.update(new)
+
+    def pop(self):
+        """
+        Removes and returns the last card.
+        """
+        if not self.by_id:
+            raise IndexError("pop from empty card list")
+        return self.by_id.popitem()[1]
+
+    def remove(self, card):
+        """
+        Removes the card (or the card equal to it). Raises ValueError if it is
+        not in the list.
+        """
+        if not self.discard(card):
+            raise ValueError(f"{card!r} is not in the list")
+
+    def discard(self, card):
+        """
+        Removes the card (or the card equal to it) if it is in the list.
+        Returns whether it was.
+        """
+        if self.by_id.get(card.id) != card:
+            return False
+        del self.by_id[card.id]
+        return True
+
+    def get(self, id):
+        """
+        Returns the card with the given id, or None if there is none.
+        """
+        return self.by_id.get(id)
+
+    def get_ids(self):
+        """
+        Returns the ids of the cards, in order, as an array of unsigned shorts
+        (e.g. for numpy.frombuffer).
+        """
+        return array('H', self.by_id)
+
+    def clear(self):
+        self.by_id.clear()
+
+    def snapshot(self):
+        """
+        Returns the cards, in order, as an array of their encoded ints (see
+        Card.encode), to be passed to restore.
+        """
+        return array('I', [card.id << 8 | card.code
+                           for card in self.by_id.values()])
+
+    def restore(self, snapshot, cards=None):
+        """
+        Replaces the contents of the list with the cards of a snapshot.
+        Parameters:
+        -----------
+        snapshot: an array returned by snapshot
+        cards: optional dictionary of card id => Card; the cards are reused
+            (and their color and value reset) instead of decoding new ones
+        """
+        if cards is None:
+            self.by_id = {number >> 8: Card.decode(number) for number in snapshot}
+            return
+        by_id = {}
+        for number in snapshot:
+            card = cards[number >> 8]
+            card.code = number & 0xFF
+            by_id[card.id] = card
+        self.by_id = by_id
+
+    def swap(self, other):
+        """
+        Exchanges the contents of this list with another one in O(1).
+        """
+        self.by_id, other.by_id = other.by_id, self.by_id
+
+    def shuffle(self, rng=random):
+        by_id = self.by_id
+        ids = list(by_id)
+        rng.shuffle(ids)
+        self.by_id = {id: by_id[id] for id in ids}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __getitem__(self, index):
+        values = self.by_id.values()
+        if index == -1 and values:
+            return next(reversed(values))
+        if index == 0 and values:
+            return next(iter(values))
+        return list(values)[index]
+
+    def __contains__(self, card):
+        return self.by_id.get(card.id) == card
+
+    def __eq__(self, other):
+        if isinstance(other, (CardList, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __str__(self):
+        return str(list(self))
+
+    def __repr__(self):
+        return str(self)
+
+    def reprJSON(self):
+        return list(self)
+
+    def toDict(self):
+        """
+        Returns the cards as a list of dictionaries shaped like Card.reprJSON.
+        """
+        return [{"id": card.id, "value": VALUES[card.code & VALUE_MASK],
+                 "color": COLORS[card.code >> VALUE_BITS]}
+                for card in self.by_id.values()]
+
+    def loadDict(self, data):
+        """
+        Replaces the contents of the list with cards loaded from a list of
+        dictionaries shaped like Card.reprJSON.
+        """
+        colors = COLOR_CODES
+        values = VALUE_CODES
+        by_id = {}
+        for item in data:
+            card = Card.__new__(Card)
+            card.id = item["id"]
+            color = colors.get(item["color"])
+            value = values.get(item["value"])
+            if color is None or value is None:
+                card.loadDict(item)
+            else:
+                card.code = color << VALUE_BITS | value
+            by_id[card.id] = card
+        if len(by_id) != len(data):
+            raise ValueError("Every card in the list must have a unique id")
+        self.by_id = by_id
+
+
+# Cards encoded per chunk by dump_json
+DUMP_CHUNK_SIZE = 64
+
+
+def _iter_json(data):
+    """
+    Yields the JSON of data (the same as json.dumps(data)) in chunks. Lists
+    of cards are encoded DUMP_CHUNK_SIZE items at a time by json.dumps, which
+    is much faster than json.dump's item by item encoder.
+    """
+    if isinstance(data, dict):
+        separator = "{"
+        for key, value in data.items():
+            yield separator + json.dumps(key) + ": "
+            yield from _iter_json(value)
+            separator = ", "
+        yield "}" if data else "{}"
+    elif isinstance(data, list) and len(data) > DUMP_CHUNK_SIZE:
+        separator = "["
+        for i in range(0, len(data), DUMP_CHUNK_SIZE):
+            yield separator + json.dumps(data[i:i + DUMP_CHUNK_SIZE])[1:-1]
+            separator = ", "
+        yield "]"
+    else:
+        yield json.dumps(data)
+
+
+def dump_json(obj, fp):
+    """
+    Writes a Card, Hand or Deck to a text file as JSON (the same JSON as
+    json.dumps(obj.reprJSON(), cls=ComplexEncoder)), streaming it out in
+    chunks rather than building the whole string first.
+    """
+    for chunk in _iter_json(obj.toDict()):
+        fp.write(chunk)
+
+
+def load_json(obj, fp):
+    """
+    Loads a Card, Hand or Deck from a text file written by dump_json (or any
+    reprJSON output), parsing it only once. Returns obj.
+    """
+    return obj.loadDict(json.load(fp))
+
+
 class Hand:
     def __init__(self, deck, cards=None):
         self.deck = deck
@@ -42,42 +393,90 @@ class Hand:
         if type(cards) is not list:
             raise TypeError("Cards must be a list")
         self.cards = cards
+
+    @property
+    def cards(self):
+        return self._cards
+
+    @cards.setter
+    def cards(self, cards):
+        self._cards = CardList(cards)
     
     def discard(self, discards):
         self.deck.discard(discards)
-        self.cards = [card for card in self.cards if card not in discards]
+        for card in discards:
+            self._cards.discard(card)
     
     def draw(self, number):
         drawnCards = self.deck.draw(number)
-        self.cards.extend(drawnCards)
+        self._cards.extend(drawnCards)
         return drawnCards
 
+    def getCard(self, id):
+        """
+        Returns the card in this hand with the given id, or None.
+        """
+        return self._cards.get(id)
+
+    def snapshot(self):
+        return self._cards.snapshot()
+
+    def restore(self, snapshot, cards=None):
+        """
+        Restores the cards of a snapshot (see CardList.restore).
+        """
+        self._cards.restore(snapshot, cards)
+
     def __len__(self):
-        return len(self.cards)
+        return len(self._cards.by_id)
 
     def __str__(self):
-        return str(self.cards)
+        return str(self._cards)
     
     def reprJSON(self):
         return dict(deck=self.deck, cards=self.cards)
-    
+
+    def toDict(self):
+        """
+        Returns the hand (and its deck) as nested dictionaries and lists, the
+        same data as reprJSON but which json can encode without ComplexEncoder.
+        """
+        return dict(deck=self.deck.toDict(), cards=self._cards.toDict())
+
     def loadJSON(self, data):
-        jsondata = json.loads(data)
-        cards = [Card().loadJSON(card) for card in jsondata["cards"]]
-        self.cards = cards
-        deckdata = json.dumps(jsondata["deck"])
-        self.deck.loadJSON(deckdata)
+        return self.loadDict(json.loads(data))
+
+    def loadDict(self, data):
+        """
+        Loads the hand and its deck from the dictionary of toDict (or from
+        parsed reprJSON output) in a single pass.
+        """
+        self._cards.loadDict(data["cards"])
+        self.deck.loadDict(data["deck"])
         return self
 
 class Deck:
-    def __init__(self, discard: 'Deck' = None, cards=None):
+    def __init__(self, discard: 'Deck' = None, cards=None, rng=None):
+        """
+        rng is the random.Random object used to shuffle (by default, the
+        global generator of the random module).
+        """
         self.discardDeck = discard
+        self.rng = random if rng is None else rng
         if cards is None:
             cards = []
         if type(cards) is not list:
             raise TypeError("Cards must be a list")
         self.cards = cards
 
+    @property
+    def cards(self):
+        return self._cards
+
+    @cards.setter
+    def cards(self, cards):
+        self._cards = CardList(cards)
+
     def draw(self, number: int):
         """
         This will draw up to <number> cards. If the deck runs out of cards,
@@ -87,41 +486,78 @@ class Deck:
         """
         drawnCards = []
         for _ in range(number):
-            if len(self.cards) == 0:
-                if self.discardDeck is None or len(self.discardDeck) == 1:
+            if not self._cards.by_id:
+                if self.discardDeck is None or len(self.discardDeck) <= 1:
                     return drawnCards
-                self.cards = self.discardDeck.cards[:-1]
-                self.discardDeck.cards = self.discardDeck.cards[-1:]
-                self.shuffle()
-            drawnCards.append(self.cards.pop())
+                self.reshuffle()
+            drawnCards.append(self._cards.by_id.popitem()[1])
         return drawnCards
+
+    def reshuffle(self):
+        """
+        Moves all but the top card of the discard pile into this (empty) deck
+        and shuffles it. The cards are not copied: the deck takes over the
+        discard pile's array.
+        """
+        discardCards = self.discardDeck.cards
+        top = discardCards.pop()
+        self._cards.swap(discardCards)
+        discardCards.append(top)
+        self.shuffle()
     
     def shuffle(self):
-        random.shuffle(self.cards)
+        self._cards.shuffle(self.rng)
+
+    def snapshot(self):
+        """
+        Returns the cards of this deck (not of its discard deck) as a compact
+        array, to be passed to restore. Much cheaper than reprJSON/loadJSON.
+        """
+        return self._cards.snapshot()
+
+    def restore(self, snapshot, cards=None):
+        """
+        Restores the cards of a snapshot (see CardList.restore).
+        """
+        self._cards.restore(snapshot, cards)
     
     def discard(self, discardCards):
-        self.discardDeck.cards.extend(discardCards)
+        self.discardDeck._cards.extend(discardCards)
 
     def __len__(self):
-        return len(self.cards)
+        return len(self._cards.by_id)
 
     def getDiscard(self):
-        if len(self.discardDeck) == 0:
+        discardCards = self.discardDeck._cards.by_id
+        if not discardCards:
             return None
-        return self.discardDeck.cards[-1]
+        return next(reversed(discardCards.values()))
     
     def reprJSON(self):
         return dict(discardDeck=self.discardDeck, cards=self.cards)
-    
+
+    def toDict(self):
+        """
+        Returns the deck (and its discard deck) as nested dictionaries and
+        lists, the same data as reprJSON but which json can encode without
+        ComplexEncoder.
+        """
+        discard = None if self.discardDeck is None else self.discardDeck.toDict()
+        return dict(discardDeck=discard, cards=self._cards.toDict())
+
     def loadJSON(self, data):
-        jsondata = json.loads(data)
-        cards = [Card().loadJSON(json.dumps(card)) for card in jsondata["cards"]]
-        self.cards = cards
-        if jsondata["discardDeck"]:
+        return self.loadDict(json.loads(data))
+
+    def loadDict(self, data):
+        """
+        Loads the deck and its discard deck from the dictionary of toDict (or
+        from parsed reprJSON output) in a single pass.
+        """
+        self._cards.loadDict(data["cards"])
+        if data["discardDeck"]:
             if self.discardDeck is None:
-                self.discardDeck = Deck()
-            discarddata = json.dumps(jsondata["discardDeck"])
-            self.discardDeck.loadJSON(discarddata)
+                self.discardDeck = Deck(rng=self.rng)
+            self.discardDeck.loadDict(data["discardDeck"])
         return self
 
 
@@ -0,0 +1,107 @@
+"""
+Legal move computation for one hand or many hands at once. Whether a card can
+be played on another only depends on their one-byte codes (see cards.COLORS
+and cards.VALUES), so legality is looked up in the 256x256 compatibility table
+cards.MATCH_TABLE instead of calling Card.match for every card.
+
+Batches of hands are represented as 2D uint8 arrays of card codes, one row per
+hand, padded with PAD (the code of a card without color or value). PAD is
+not unmatchable: the "wild" color rule lets it be played on an unchosen wild
+card, so legal_masks masks padding out explicitly.
+"""
+
+import numpy as np
+
+from .cards import MATCH_TABLE, playable_on
+
+PAD = 0
+
+# MATCH_MATRIX[a, b] is True if a card with code a can be played on a card with
+# code b. Shares memory with MATCH_TABLE, so it stays up to date when names are
+# added to the tables.
+MATCH_MATRIX = np.frombuffer(MATCH_TABLE, dtype=np.bool_).reshape(256, 256)
+
+
+def get_legal_cards(cards, top_card):
+    """
+    Returns the list of the cards which can be played on top_card (the same
+    cards as [card for card in cards if card.match(top_card)]).
+    Parameters:
+    -----------
+    cards: an iterable of Card objects (e.g. a hand's cards)
+    top_card: the Card on top of the discard pile
+    """
+    playable = playable_on(top_card.code)
+    return [card for card in cards if playable[card.code]]
+
+
+def encode_hand(cards):
+    """
+    Returns the codes of the cards as a 1D uint8 array.
+    """
+    return np.fromiter((card.code for card in cards), dtype=np.uint8)
+
+
+def encode_hands(hands, width=None):
+    """
+    Returns the codes of the cards of many hands as a 2D uint8 array with one
+    row per hand, padded with PAD.
+    Parameters:
+    -----------
+    hands: list of iterables of Card objects
+    width: number of columns (default: the size of the largest hand)
+    """
+    hands = [list(cards) for cards in hands]
+    if width is None:
+        width = max((len(cards) for cards in hands), default=0)
+    codes = np.full((len(hands), width), PAD, dtype=np.uint8)
+    for row, cards in zip(codes, hands):
+        row[:len(cards)] = [card.code for card in cards]
+    return codes
+
+
+def encode_tops(top_cards):
+    """
+    Returns the codes of the cards on top of the discard piles as a 1D uint8
+    array.
+    """
+    return np.fromiter((card.code for card in top_cards), dtype=np.uint8)
+
+
+def legal_mask(hand_codes, top_code):
+    """
+    Returns a boolean array which is True where the card can be played on the
+    card with code top_code.
+    Parameters:
+    -----------
+    hand_codes: array of card codes (e.g. from encode_hand)
+    top_code: code of the card on top of the discard pile
+    """
+    return MATCH_MATRIX[np.asarray(hand_codes, dtype=np.uint8), top_code]
+
+
+def legal_masks(hand_codes, top_codes):
+    """
+    Returns a boolean array of the same shape as hand_codes which is True
+    where the card can be played on the top card of its row. Padding is never
+    legal.
+    Parameters:
+    -----------
+    hand_codes: 2D array of card codes, one row per hand (see encode_hands)
+    top_codes: 1D array with the code of the top card for every row (see
+        encode_tops), or a single code shared by every row
+    """
+    hand_codes = np.asarray(hand_codes, dtype=np.uint8)
+    top_codes = np.asarray(top_codes, dtype=np.uint8)
+    if top_codes.ndim:
+        top_codes = top_codes[:, np.newaxis]
+    # Not redundant: MATCH_MATRIX[PAD, wild] is True
+    return MATCH_MATRIX[hand_codes, top_codes] & (hand_codes != PAD)
+
+
+def count_legal(hand_codes, top_codes):
+    """
+    Returns the number of legal cards of every hand of a batch (see
+    legal_masks).
+    """
+    return legal_masks(hand_codes, top_codes).sum(axis=-1)
@@ -1,20 +1,23 @@
 from .cards import Hand,Deck
 
 class Player: 
-    def __init__(self, name, deck: Deck):
+    def __init__(self, name, deck: Deck, rng=None):
+        """
+        rng is the random.Random object the player's decisions are drawn from
+        (by default, the deck's).
+        """
         self.name = name
         self.hand = Hand(deck)
+        self.rng = deck.rng if rng is None else rng
 
 
     def draw(self, number):
         return self.hand.draw(number)
 
     def getCardFromID(self, id):
-        try:
-            choice = [card for card in self.hand.cards if card.id == id][0]
-        except IndexError:
+        choice = self.hand.getCard(id)
+        if choice is None:
             print("Card index out of range.")
-            return None
         return choice
     def getCardFromIndex(self, idx):
         try:
@@ -24,9 +27,11 @@ class Player:
             return None
         return choice
         
-    def playCard(self, card=None, idx=None, accept_input=True):
+    def playCard(self, card=None, idx=None, accept_input=True, color=None):
         """
-        Attempts to play a card from the player's hand
+        Attempts to play a card from the player's hand. A wild card played
+        without input is played as color, or as the color the hand holds the
+        most of if color is None.
         """
 
         if card is None and idx is not None:
@@ -36,7 +41,9 @@ class Player:
         else:
             choice = card
         curDiscard = self.hand.deck.getDiscard()
-        if choice.value in ["wild", "wild_draw"] and not accept_input:
+        if choice.value in ["wild", "wild_draw"] and color is not None:
+            choice.color = color
+        elif choice.value in ["wild", "wild_draw"] and not accept_input:
             count = {}
             for card in self.hand.cards:
                 count[card.color] = count.get(card.color, 0) + 1
@@ -0,0 +1,358 @@
+"""
+Search-based opponents. MonteCarloPolicy uses determinized Monte Carlo search
+over the headless engine in cardgame.simulation: for each of its moves it
+repeatedly deals the cards it cannot see (the other hands and the deck) at
+random, plays every candidate move in that deal followed by a fast rollout to
+the end of the game, and picks the move which won the most rollouts.
+
+Searches are limited by a time budget and a rollout budget per move, and the
+rollouts can be played on a pool of worker processes. When the budget runs out
+before any rollout is finished, the policy falls back to the heuristic of the
+game's opponents (see simulation.RandomPolicy).
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .simulation import COLORS, POLICIES, WILD_VALUES, Policy, RandomPolicy, \
+    game_seed
+from .moves import get_legal_cards
+from .transposition import position_hash, state_hash
+
+# Seconds a search may take per move
+TIME_BUDGET = 0.5
+
+# Maximum number of rollouts of every candidate move per search
+ROLLOUTS = 500
+
+# Rollouts still running after this many turns are stopped and count as losses
+ROLLOUT_TURNS = 300
+
+# Policy which plays every player during rollouts
+ROLLOUT_POLICY = "greedy"
+
+# Deals played by a worker process before it sends its results back
+BATCH_SIZE = 4
+
+
+def get_moves(game):
+    """
+    Returns the candidate moves of the current player as a list of
+    (card id, color) tuples: one per distinct playable card, and one per color
+    for wild cards (color is None for the other cards). Drawing a card is only
+    a candidate when nothing can be played, as (None, None).
+    """
+    player = game.players[game.current]
+    moves = []
+    seen = set()
+    for card in get_legal_cards(player.hand.cards, game.get_top_card()):
+        if card.code in seen:
+            continue
+        seen.add(card.code)
+        if card.value in WILD_VALUES:
+            moves.extend((card.id, color) for color in COLORS)
+        else:
+            moves.append((card.id, None))
+    return moves or [(None, None)]
+
+
+def _to_codes(game, results):
+    """
+    Returns evaluations (see MonteCarloSearch.evaluate) with card codes in
+    place of card ids, which stay valid for any hand with the same cards.
+    """
+    hand = game.players[game.current].hand
+    return [[None if card_id is None else hand.getCard(card_id).code,
+             color, wins, rollouts]
+            for (card_id, color), wins, rollouts in results]
+
+
+def _from_codes(game, entries):
+    ids = {}
+    for card in game.players[game.current].hand.cards:
+        ids.setdefault(card.code, card.id)
+    return [((None if code is None else ids[code], color), wins, rollouts)
+            for code, color, wins, rollouts in entries]
+
+
+def determinize(game, observer, seed):
+    """
+    Returns a copy of the game in which the cards the observer cannot see (the
+    other players' hands and the deck) are shuffled and dealt again at random.
+    Hand sizes, the observer's hand and the discard pile are unchanged.
+    Parameters:
+    -----------
+    game: the Game to copy
+    observer: index of the player whose point of view is kept
+    seed: seed of the deal and of the copy's random generator
+    """
+    game = game.clone(seed=seed)
+    _deal(game, observer, seed)
+    return game
+
+
+def _deal(game, observer, seed):
+    """
+    Deals the cards the observer cannot see again, in place (see determinize).
+    """
+    game.rng.seed(seed)
+    hands = [player.hand for i, player in enumerate(game.players)
+             if i != observer]
+    unseen = list(game.deck.cards)
+    for hand in hands:
+        unseen.extend(hand.cards)
+    game.rng.shuffle(unseen)
+
+    for hand in hands:
+        size = len(hand)
+        hand.cards = unseen[:size]
+        del unseen[:size]
+    game.deck.cards = unseen
+    if game.hashing:
+        game.hash = state_hash(game)
+
+
+def rollout(game, move, rollout_turns=ROLLOUT_TURNS):
+    """
+    Plays the move for the current player of the game, then plays the game on
+    with its policies for at most rollout_turns turns. Returns True if the
+    player who made the move won. Changes the game (see Game.clone).
+    """
+    player = game.current
+    card_id, color = move
+    card = None if card_id is None else game.players[player].hand.getCard(card_id)
+    game.move(card, color)
+
+    end = game.turns + rollout_turns
+    while not game.is_over() and game.turns < end:
+        game.step()
+    return game.winner == player
+
+
+def run_rollouts(game, moves, seeds, rollout_turns=ROLLOUT_TURNS):
+    """
+    Plays one rollout of every move in the deal of every seed, and returns the
+    number of rollouts every move won. Every move is played in the same deals
+    so that they are compared on equal terms. Runs in a worker process.
+
+    The game is played on and restored from a snapshot after every rollout,
+    so it should be a copy nobody else uses (see Game.clone).
+    """
+    observer = game.current
+    # Every deal reseeds the generator, so its state is not saved
+    start = game.snapshot(rng=False)
+    wins = [0] * len(moves)
+    for seed in seeds:
+        for i, move in enumerate(moves):
+            _deal(game, observer, seed)
+            wins[i] += rollout(game, move, rollout_turns)
+            game.restore(start)
+    return wins
+
+
+class MonteCarloSearch:
+    """
+    Evaluates the moves of the current player of a game by determinized Monte
+    Carlo rollouts within a time and rollout budget.
+    """
+
+    def __init__(self, time_budget=TIME_BUDGET, rollouts=ROLLOUTS, workers=1,
+                 rollout_turns=ROLLOUT_TURNS, rollout_policy=ROLLOUT_POLICY,
+                 cache=None):
+        """
+        Parameters:
+        -----------
+        time_budget: seconds a search may take
+        rollouts: maximum number of rollouts of every move per search
+        workers: number of worker processes; with 1, rollouts are played in
+            this process
+        rollout_turns: rollouts are stopped after this many turns
+        rollout_policy: POLICIES key of the policy of every player in rollouts
+        cache: optional transposition.TranspositionCache; positions found in
+            it with rollouts rollouts per move are not searched again, and
+            those found with fewer are searched further
+        """
+        if rollout_policy not in POLICIES:
+            raise ValueError(f"Unknown policy {rollout_policy!r}")
+        self.time_budget = time_budget
+        self.rollouts = rollouts
+        self.workers = workers
+        self.rollout_turns = rollout_turns
+        self.rollout_policy = rollout_policy
+        self.cache = cache
+        self.executor = None
+
+    def start(self):
+        """
+        Starts the worker processes (otherwise they are started by the first
+        search). Workers are started with the platform's default method: they
+        are forked on Linux and inherit the process's state, and elsewhere
+        they are spawned and import the main script again, so scripts which
+        set up a display or audio when imported should not use workers.
+        """
+        if self.workers > 1 and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            list(self.executor.map(abs, range(self.workers)))
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def evaluate(self, game, seed=None):
+        """
+        Returns a list of (move, wins, rollouts) tuples, one per candidate move
+        of the current player (see get_moves). rollouts is 0 for every move if
+        the time budget ran out before the first deal was played. The results
+        of a cached position are merged with those of the new deals.
+        Parameters:
+        -----------
+        game: the Game to search; it is not changed
+        seed: seed of the deals (default: drawn from the game's generator)
+        """
+        deadline = time.monotonic() + self.time_budget
+        rollouts = self.rollouts
+        cached = None
+        if self.cache is not None:
+            key = position_hash(game)
+            entries = self.cache.get(key)
+            if entries is not None:
+                cached = _from_codes(game, entries)
+                # Evaluations of searches the time budget cut short are
+                # refined with more deals, up to the rollout budget
+                done = min(result[2] for result in cached)
+                if done >= rollouts:
+                    return cached
+                rollouts -= done
+
+        moves = get_moves(game)
+        if seed is None:
+            seed = game.rng.getrandbits(32)
+        policies = [POLICIES[self.rollout_policy]() for _ in game.players]
+        # Rollouts have no use for the hash of the game
+        game = game.clone(policies=policies, hashing=False)
+
+        if self.workers > 1:
+            wins, deals = self._evaluate_pool(game, moves, seed, deadline,
+                                              rollouts)
+        else:
+            wins = [0] * len(moves)
+            deals = 0
+            while deals < rollouts and time.monotonic() < deadline:
+                for i, won in enumerate(run_rollouts(
+                        game, moves, [game_seed(seed, deals)],
+                        self.rollout_turns)):
+                    wins[i] += won
+                deals += 1
+
+        if cached is not None and not deals:
+            return cached
+        results = [(move, won, deals) for move, won in zip(moves, wins)]
+        if cached is not None:
+            previous = {move: (won, count) for move, won, count in cached}
+            merged = []
+            for move, won, count in results:
+                previous_won, previous_count = previous.get(move, (0, 0))
+                merged.append((move, won + previous_won,
+                               count + previous_count))
+            results = merged
+        if self.cache is not None and deals:
+            self.cache.put(key, _to_codes(game, results))
+        return results
+
+    def _evaluate_pool(self, game, moves, seed, deadline, rollouts):
+        self.start()
+        wins = [0] * len(moves)
+        deals = 0
+        submitted = 0
+        # Maps the running batches to their number of deals
+        pending = {}
+
+        def submit():
+            nonlocal submitted
+            count = min(BATCH_SIZE, rollouts - submitted)
+            seeds = [game_seed(seed, submitted + i) for i in range(count)]
+            future = self.executor.submit(
+                run_rollouts, game, moves, seeds, self.rollout_turns)
+            pending[future] = count
+            submitted += count
+
+        while submitted < rollouts and len(pending) < 2 * self.workers:
+            submit()
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                deals += pending.pop(future)
+                for i, won in enumerate(future.result()):
+                    wins[i] += won
+                if submitted < rollouts:
+                    submit()
+
+        # Batches still running when the time is up are ignored
+        for future in pending:
+            future.cancel()
+        return wins, deals
+
+    def best_move(self, game, seed=None):
+        """
+        Returns the (card id, color) move which won the most rollouts, or None
+        if no rollout was finished within the time budget.
+        """
+        results = self.evaluate(game, seed)
+        move, wins, rollouts = max(results, key=lambda result: result[1])
+        if not rollouts:
+            return None
+        return move
+
+
+class MonteCarloPolicy(Policy):
+    """
+    Picks its moves with a MonteCarloSearch, and falls back to fallback
+    (RandomPolicy by default) when the search runs out of time.
+    """
+    name = "montecarlo"
+
+    def __init__(self, time_budget=TIME_BUDGET, rollouts=ROLLOUTS, workers=1,
+                 rollout_turns=ROLLOUT_TURNS, rollout_policy=ROLLOUT_POLICY,
+                 fallback=None, cache=None):
+        """
+        Parameters:
+        -----------
+        see MonteCarloSearch
+        fallback: Policy used when no rollout finished within the time budget
+        """
+        self.search = MonteCarloSearch(time_budget, rollouts, workers,
+                                       rollout_turns, rollout_policy, cache)
+        self.fallback = RandomPolicy() if fallback is None else fallback
+        # Color chosen by the search for the wild card being played
+        self.color = None
+
+    def choose_card(self, game, player, playable):
+        self.color = None
+        move = self.search.best_move(game, seed=player.rng.getrandbits(32))
+        if move is None or move[0] is None:
+            return self.fallback.choose_card(game, player, playable)
+        card_id, self.color = move
+        return player.hand.getCard(card_id)
+
+    def choose_color(self, game, player, card):
+        if self.color is None:
+            return self.fallback.choose_color(game, player, card)
+        return self.color
+
+    def start(self):
+        self.search.start()
+
+    def close(self):
+        self.search.close()
+
+
+POLICIES[MonteCarloPolicy.name] = MonteCarloPolicy
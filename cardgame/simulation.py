@@ -0,0 +1,497 @@
+"""
+Headless Uno simulation. Plays complete games with the same cards and rules as
+main.py (without pygame, sounds or animations) so that player strategies can
+be compared over many games.
+
+Usage:
+    python -m cardgame.simulation [--games N] [--players N] [--policy NAME ...]
+        [--seed N]
+"""
+
+import argparse
+import random
+import time
+from collections import namedtuple
+
+from .cards import COLOR_BITS, VALUE_BITS, Card, Deck
+from .moves import get_legal_cards
+from .player import Player
+from .transposition import CARD_KEYS, COLOR_KEYS, DECK, DISCARD, HAND, \
+    MAX_CARD_ID, REVERSED_KEY, TURN_KEYS, state_hash
+
+COLORS = ["Red", "Green", "Yellow", "Blue"]
+
+WILD = "wild"
+WILD_DRAW = "wild_draw"
+DRAW = "draw"
+SKIP = "skip"
+REVERSE = "reverse"
+
+WILD_VALUES = (WILD, WILD_DRAW)
+
+# How many cards the next player draws when one of these is played
+DRAW_PENALTY = {DRAW: 2, WILD_DRAW: 4}
+
+HAND_SIZE = 7
+
+# Games still running after this many turns are stopped without a winner
+MAX_TURNS = 2000
+
+
+# The state of a Game (see Game.snapshot). The cards are arrays of encoded cards
+# (see CardList.snapshot), hands has one array per player and rng_state is the
+# state of the game's random generator (or None if it was not saved).
+GameSnapshot = namedtuple("GameSnapshot", [
+    "deck", "discard", "hands", "current", "direction", "turns", "winner",
+    "hash", "rng_state"])
+
+
+def game_seed(seed, index):
+    """
+    Returns the seed of the game with the given index in a series of games
+    seeded with seed.
+    """
+    return seed * 1000003 + index
+
+
+def generate_uno_cards():
+    """
+    Returns the 108 cards of an Uno deck (the same cards as main.py).
+    """
+    return [Card.decode(number) for number in _UNO_CARD_CODES]
+
+
+def _build_uno_cards():
+    cards = []
+    for color in COLORS:
+        cards.append(Card(len(cards), "0", color))
+        for value in [str(num) for num in range(1, 10)] + [DRAW, SKIP, REVERSE]:
+            cards.append(Card(len(cards), value, color))
+            cards.append(Card(len(cards), value, color))
+    for value in [WILD] * 4 + [WILD_DRAW] * 4:
+        cards.append(Card(len(cards), value, WILD))
+    return cards
+
+
+# Every new deck is decoded from these rather than built from strings
+_UNO_CARD_CODES = [card.encode() for card in _build_uno_cards()]
+
+
+def _copy_cards(cards):
+    return [Card.decode(card.encode()) for card in cards]
+
+
+class Policy:
+    """
+    Decides what a player does on their turn. Subclasses override choose_card
+    and choose_color.
+    """
+    name = "policy"
+
+    def choose_card(self, game, player, playable):
+        """
+        Returns the card to play, or None to draw a card instead.
+        Parameters:
+        -----------
+        game: the Game being played
+        player: the Player whose turn it is
+        playable: non-empty list of the cards in the player's hand which match
+            the top of the discard pile
+        """
+        raise NotImplementedError
+
+    def choose_color(self, game, player, card):
+        """
+        Returns the color (one of COLORS) a wild card is played as.
+        Parameters:
+        -----------
+        game: the Game being played
+        player: the Player who played the card
+        card: the wild Card being played (already removed from the hand)
+        """
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """
+    Plays a random playable card and names the color it holds the most of,
+    like the opponents in main.py.
+    """
+    name = "random"
+
+    def choose_card(self, game, player, playable):
+        return player.rng.choice(playable)
+
+    def choose_color(self, game, player, card):
+        return most_common_color(player.hand.cards)
+
+
+class GreedyPolicy(Policy):
+    """
+    Gets rid of the cards which hurt the next player most first (draw cards,
+    then skips and reverses, then numbers) and keeps wild cards for last.
+    """
+    name = "greedy"
+
+    PRIORITY = {WILD_DRAW: 1, DRAW: 4, SKIP: 3, REVERSE: 3, WILD: 0}
+
+    def choose_card(self, game, player, playable):
+        return max(playable, key=lambda card: self.PRIORITY.get(card.value, 2))
+
+    def choose_color(self, game, player, card):
+        return most_common_color(player.hand.cards)
+
+
+POLICIES = {policy.name: policy for policy in (RandomPolicy, GreedyPolicy)}
+
+
+def most_common_color(cards):
+    """
+    Returns the color (one of COLORS) the most cards have, preferring the
+    earliest in COLORS on ties.
+    """
+    counts = {color: 0 for color in COLORS}
+    for card in cards:
+        if card.color in counts:
+            counts[card.color] += 1
+    return max(COLORS, key=lambda color: counts[color])
+
+
+class Game:
+    """
+    A single game of Uno between players driven by policies. Each turn, the
+    current player plays a matching card or draws one card (which ends their
+    turn, as in main.py). Skip skips the next player, reverse changes the
+    direction of play (with two players it acts as a skip), draw and wild_draw
+    make the next player draw 2 or 4 cards and lose their turn.
+    """
+
+    def __init__(self, policies, names=None, hand_size=HAND_SIZE, max_turns=MAX_TURNS, seed=None,
+                 hashing=True):
+        """
+        Shuffles a new deck and deals the hands. The first player to move is
+        the first policy.
+        Parameters:
+        -----------
+        policies: list of Policy objects, one per player (at least two)
+        names: optional list of player names
+        hand_size: how many cards are dealt to every player
+        max_turns: the game is stopped without a winner after this many turns
+        seed: seed of the game's random generator; a game played with the
+            same seed, policies and settings is played exactly the same way
+        hashing: whether to keep hash (the transposition.state_hash of the
+            game) up to date as the game is played; otherwise hash is None
+        """
+        if len(policies) < 2:
+            raise ValueError("A game needs at least two players")
+        if names is None:
+            names = [f"Player {i}" for i in range(len(policies))]
+
+        self.policies = list(policies)
+        self.max_turns = max_turns
+        self.hashing = hashing
+
+        # Every random decision of the game (shuffling and the policies) is
+        # drawn from this generator
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.discard_deck = Deck(rng=self.rng)
+        self.deck = Deck(discard=self.discard_deck, cards=generate_uno_cards(),
+                         rng=self.rng)
+        self.deck.shuffle()
+
+        self.players = [Player(name, self.deck, self.rng) for name in names]
+        for _ in range(hand_size):
+            for player in self.players:
+                player.draw(1)
+
+        self.deck.discard(self.deck.draw(1))
+
+        self.current = 0
+        self.direction = 1
+        self.turns = 0
+        self.winner = None
+        self.rehash()
+
+    @classmethod
+    def from_players(cls, policies, players, deck, current=0, direction=1,
+                     turns=0, max_turns=MAX_TURNS, hashing=True):
+        """
+        Returns a game which continues from an existing position instead of
+        dealing new hands. The game plays with the given objects, not copies
+        (see clone), and draws its random decisions from the deck's generator.
+        Parameters:
+        -----------
+        policies: list of Policy objects, one per player
+        players: list of Player objects whose hands draw from deck
+        deck: the Deck, with the discard pile as its discardDeck
+        current: index of the player whose turn it is
+        direction: 1, or -1 after an odd number of reverses
+        turns: number of turns already played
+        max_turns: the game is stopped without a winner after this many turns
+        hashing: whether to keep the hash of the game's state up to date
+        """
+        if len(policies) != len(players):
+            raise ValueError("A game needs one policy per player")
+
+        game = cls.__new__(cls)
+        game.policies = list(policies)
+        game.max_turns = max_turns
+        game.hashing = hashing
+        game.seed = None
+        game.rng = deck.rng
+        game.deck = deck
+        game.discard_deck = deck.discardDeck
+        game.players = list(players)
+        game.current = current
+        game.direction = direction
+        game.turns = turns
+        game.winner = None
+        game.rehash()
+        return game
+
+    def clone(self, policies=None, seed=None, hashing=None):
+        """
+        Returns a copy of the game, with copies of its cards, which can be
+        played on without changing this game.
+        Parameters:
+        -----------
+        policies: the policies of the copy (default: the same policies)
+        seed: seed of the copy's random generator
+        hashing: whether the copy keeps its hash up to date (default: like
+            this game)
+        """
+        rng = random.Random(seed)
+        discard_deck = Deck(cards=_copy_cards(self.discard_deck.cards), rng=rng)
+        deck = Deck(discard=discard_deck, cards=_copy_cards(self.deck.cards),
+                    rng=rng)
+        players = []
+        for player in self.players:
+            copy = Player(player.name, deck, rng)
+            copy.hand.cards = _copy_cards(player.hand.cards)
+            players.append(copy)
+
+        game = Game.from_players(
+            self.policies if policies is None else policies, players, deck,
+            self.current, self.direction, self.turns, self.max_turns,
+            self.hashing if hashing is None else hashing)
+        game.seed = seed
+        game.winner = self.winner
+        return game
+
+    def rehash(self):
+        """
+        Recomputes the hash of the game's state and the index of its cards by
+        id. Move and draw keep both up to date; this is only needed after
+        changing the cards or the state of the game directly.
+        """
+        self.cards = {}
+        for cards in [self.deck.cards, self.discard_deck.cards] + \
+                [player.hand.cards for player in self.players]:
+            self.cards.update(cards.by_id)
+        self.hash = state_hash(self) if self.hashing else None
+
+    def snapshot(self, rng=True):
+        """
+        Returns a GameSnapshot of the state of the game, to be passed to
+        restore. Cards are saved as compact arrays rather than objects.
+        Parameters:
+        -----------
+        rng: whether to save the state of the random generator too (which
+            costs about as much as the rest), so that a restored game replays
+            the same way
+        """
+        return GameSnapshot(
+            self.deck.snapshot(), self.discard_deck.snapshot(),
+            [player.hand.snapshot() for player in self.players],
+            self.current, self.direction, self.turns, self.winner, self.hash,
+            self.rng.getstate() if rng else None)
+
+    def restore(self, snapshot):
+        """
+        Puts the game back in the state of a snapshot taken from it. The game
+        keeps its Card objects, which are moved back and recolored.
+        """
+        cards = self.cards
+        self.deck.restore(snapshot.deck, cards)
+        self.discard_deck.restore(snapshot.discard, cards)
+        for player, hand in zip(self.players, snapshot.hands):
+            player.hand.restore(hand, cards)
+        self.current = snapshot.current
+        self.direction = snapshot.direction
+        self.turns = snapshot.turns
+        self.winner = snapshot.winner
+        self.hash = snapshot.hash
+        if snapshot.rng_state is not None:
+            self.rng.setstate(snapshot.rng_state)
+
+    def get_top_card(self):
+        return self.deck.getDiscard()
+
+    def next_index(self, steps=1):
+        """
+        Returns the index of the player the given number of turns after the
+        current player.
+        """
+        return (self.current + steps * self.direction) % len(self.players)
+
+    def is_over(self):
+        return self.winner is not None or self.turns >= self.max_turns
+
+    def play(self):
+        """
+        Plays turns until somebody wins or max_turns is reached. Returns the
+        index of the winner, or None if there is no winner.
+        """
+        while not self.is_over():
+            self.step()
+        return self.winner
+
+    def step(self):
+        """
+        Plays the current player's turn and moves on to the next player.
+        """
+        player = self.players[self.current]
+        policy = self.policies[self.current]
+        top_card = self.get_top_card()
+
+        playable = get_legal_cards(player.hand.cards, top_card)
+        card = policy.choose_card(self, player, playable) if playable else None
+        self.move(card)
+
+    def move(self, card, color=None):
+        """
+        Plays the current player's turn with the given move and moves on to
+        the next player.
+        Parameters:
+        -----------
+        card: a matching Card of the current player's hand, or None to draw a
+            card instead
+        color: the color a wild card is played as (default: asks the current
+            player's policy)
+        """
+        player = self.players[self.current]
+        self.turns += 1
+        if card is None:
+            self.draw(player, 1)
+            self.set_current(self.next_index())
+            return
+
+        player.hand.discard([card])
+        if self.hashing:
+            self.hash ^= CARD_KEYS[(HAND + self.current) * MAX_CARD_ID + card.id] ^ \
+                CARD_KEYS[DISCARD * MAX_CARD_ID + card.id]
+        if card.value in WILD_VALUES:
+            if color is None:
+                color = self.policies[self.current].choose_color(
+                    self, player, card)
+            key = card.id << COLOR_BITS | card.code >> VALUE_BITS
+            card.color = color
+            if self.hashing:
+                self.hash ^= COLOR_KEYS[key] ^ \
+                    COLOR_KEYS[card.id << COLOR_BITS | card.code >> VALUE_BITS]
+
+        if not len(player.hand):
+            self.winner = self.current
+            return
+
+        steps = 1
+        if card.value == REVERSE:
+            self.direction = -self.direction
+            if self.hashing:
+                self.hash ^= REVERSED_KEY
+            if len(self.players) == 2:
+                steps = 2
+        elif card.value == SKIP:
+            steps = 2
+        elif card.value in DRAW_PENALTY:
+            self.draw(self.players[self.next_index()], DRAW_PENALTY[card.value])
+            steps = 2
+        self.set_current(self.next_index(steps))
+
+    def set_current(self, index):
+        """
+        Makes it the turn of the player with the given index.
+        """
+        if self.hashing:
+            self.hash ^= TURN_KEYS[self.current] ^ TURN_KEYS[index]
+        self.current = index
+
+    def draw(self, player, number):
+        """
+        Makes the player draw cards. When the deck runs out, Deck.draw shuffles
+        the discard pile back into it; wild cards picked up that way forget the
+        color they were played as.
+        """
+        discard_size = len(self.discard_deck)
+        drawn = player.draw(number)
+        if len(self.discard_deck) < discard_size:
+            for cards in (self.deck.cards, player.hand.cards):
+                for card in cards:
+                    if card.value in WILD_VALUES:
+                        card.color = WILD
+            self.rehash()
+        elif self.hashing:
+            base = (HAND + self.players.index(player)) * MAX_CARD_ID
+            for card in drawn:
+                self.hash ^= CARD_KEYS[DECK * MAX_CARD_ID + card.id] ^ \
+                    CARD_KEYS[base + card.id]
+
+
+def play_games(num_games, policies, seed=None, **kwargs):
+    """
+    Plays games between the same policies and returns a dictionary with the
+    number of wins of every player, the number of games without a winner and
+    the total number of turns played.
+    Parameters:
+    -----------
+    num_games: how many games to play
+    policies: list of Policy objects, one per player
+    seed: optional seed; game i is seeded with game_seed(seed, i)
+    kwargs: passed on to Game
+    """
+    wins = [0] * len(policies)
+    unfinished = 0
+    turns = 0
+    for i in range(num_games):
+        game = Game(policies, seed=None if seed is None else game_seed(seed, i),
+                    **kwargs)
+        winner = game.play()
+        turns += game.turns
+        if winner is None:
+            unfinished += 1
+        else:
+            wins[winner] += 1
+    return dict(games=num_games, wins=wins, unfinished=unfinished, turns=turns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--games", type=int, default=1000,
+                        help="number of games to play")
+    parser.add_argument("--players", type=int, default=4,
+                        help="number of players (when --policy is not given)")
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES),
+                        help="policy of the next player (default: random)")
+    parser.add_argument("--seed", type=int,
+                        help="seed of the games (default: unseeded)")
+    args = parser.parse_args()
+
+    names = args.policy or ["random"] * args.players
+    policies = [POLICIES[name]() for name in names]
+
+    start = time.perf_counter()
+    result = play_games(args.games, policies, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    for i, name in enumerate(names):
+        print("player {} ({:<6}) {:>6.2%} wins".format(
+            i, name, result["wins"][i] / args.games))
+    print("{} games ({} unfinished), {} turns in {:.2f} s ({:.0f} games/s)".format(
+        args.games, result["unfinished"], result["turns"], elapsed,
+        args.games / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Runs large tournaments between AI policies on every core. Games are played
+with the headless engine in cardgame.simulation, sharded into chunks of seeded
+games across a process pool, and their results are streamed back, aggregated
+into win rates with confidence intervals and checkpointed so that an
+interrupted tournament can be resumed.
+
+Usage:
+    python -m cardgame.tournament --policy NAME --policy NAME [--games N]
+        [--workers N] [--seed N] [--checkpoint PATH]
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .simulation import Game, POLICIES, game_seed
+from . import search  # registers the search policies in POLICIES
+
+# Games played by a worker before it sends their results back
+CHUNK_SIZE = 250
+
+# z-score of the confidence intervals (95%)
+CONFIDENCE_Z = 1.96
+
+# Seconds between checkpoints
+CHECKPOINT_INTERVAL = 10
+
+
+def get_seating(num_players, index):
+    """
+    Returns a list whose item i is the index of the policy sitting in seat i
+    during the game with the given index. Seats rotate with the game index so
+    that no policy always moves first.
+    """
+    return [(index + seat) % num_players for seat in range(num_players)]
+
+
+def make_game(policy_names, seed, index, **kwargs):
+    """
+    Returns the (unplayed) Game with the given index in a tournament. Can be
+    used to replay any game of a tournament exactly, e.g. to profile it.
+    Parameters:
+    -----------
+    policy_names: list of POLICIES keys, one per policy in the tournament
+    seed: the tournament seed
+    index: the index of the game in the tournament
+    kwargs: passed on to Game
+    """
+    seating = get_seating(len(policy_names), index)
+    return Game([POLICIES[policy_names[i]]() for i in seating],
+                seed=game_seed(seed, index), **kwargs)
+
+
+def play_game(policy_names, seed, index, **kwargs):
+    """
+    Plays one game of a tournament (see make_game) and returns its result as
+    a dictionary.
+    """
+    game = make_game(policy_names, seed, index, **kwargs)
+    winner = game.play()
+    seating = get_seating(len(policy_names), index)
+
+    return dict(
+        index=index,
+        seed=game.seed,
+        winner=None if winner is None else seating[winner],
+        turns=game.turns,
+    )
+
+
+def play_chunk(policy_names, seed, indices, kwargs):
+    """
+    Plays the games with the given indices. Runs in a worker process.
+    """
+    return [play_game(policy_names, seed, index, **kwargs) for index in indices]
+
+
+def _to_ranges(indices):
+    """
+    Returns a sorted list of [start, end) ranges covering the given indices.
+    """
+    ranges = []
+    for index in sorted(indices):
+        if ranges and ranges[-1][1] == index:
+            ranges[-1][1] = index + 1
+        else:
+            ranges.append([index, index + 1])
+    return ranges
+
+
+def wilson_interval(wins, games, z=CONFIDENCE_Z):
+    """
+    Returns the (low, high) Wilson score confidence interval of a win rate.
+    """
+    if games == 0:
+        return (0.0, 1.0)
+    rate = wins / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(
+        rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return (max(0.0, center - margin), min(1.0, center + margin))
+
+
+class Tournament:
+    """
+    A tournament of num_games games between the same policies. Results are
+    accumulated in wins, unfinished, turns and done (the indices of the games
+    which were played).
+    """
+
+    def __init__(self, policy_names, num_games, seed=0, workers=None,
+                 chunk_size=CHUNK_SIZE, checkpoint=None, **kwargs):
+        """
+        Parameters:
+        -----------
+        policy_names: list of POLICIES keys, one per player
+        num_games: how many games to play
+        seed: seed of the tournament; the same seed plays the same games
+        workers: number of worker processes (default: one per core); with 1,
+            games are played in this process
+        chunk_size: how many games a worker plays per task
+        checkpoint: optional path of a JSON file where partial results are
+            saved, and loaded from if it exists
+        kwargs: passed on to Game
+        """
+        for name in policy_names:
+            if name not in POLICIES:
+                raise ValueError(f"Unknown policy {name!r}")
+        if len(policy_names) < 2:
+            raise ValueError("A tournament needs at least two players")
+
+        self.policy_names = list(policy_names)
+        self.num_games = num_games
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.kwargs = kwargs
+
+        self.wins = [0] * len(policy_names)
+        self.unfinished = 0
+        self.turns = 0
+        self.done = set()
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load_checkpoint()
+
+    def add_result(self, result):
+        """
+        Counts the result of one game (see play_game).
+        """
+        if result["winner"] is None:
+            self.unfinished += 1
+        else:
+            self.wins[result["winner"]] += 1
+        self.turns += result["turns"]
+        self.done.add(result["index"])
+
+    def get_chunks(self):
+        """
+        Returns the lists of game indices which remain to be played.
+        """
+        remaining = [i for i in range(self.num_games) if i not in self.done]
+        return [remaining[i:i + self.chunk_size]
+                for i in range(0, len(remaining), self.chunk_size)]
+
+    def results(self):
+        """
+        Plays the remaining games and yields the result of every game as soon
+        as its chunk is finished. Partial results are checkpointed along the
+        way and once every game was played.
+        """
+        chunks = self.get_chunks()
+        last_checkpoint = time.monotonic()
+
+        if self.workers == 1:
+            finished = (play_chunk(self.policy_names, self.seed, chunk,
+                                   self.kwargs) for chunk in chunks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [
+                executor.submit(play_chunk, self.policy_names, self.seed,
+                                chunk, self.kwargs)
+                for chunk in chunks
+            ]
+            finished = (future.result() for future in as_completed(futures))
+
+        try:
+            for chunk_results in finished:
+                for result in chunk_results:
+                    self.add_result(result)
+                    yield result
+                if self.checkpoint is not None and \
+                        time.monotonic() - last_checkpoint > CHECKPOINT_INTERVAL:
+                    self.save_checkpoint()
+                    last_checkpoint = time.monotonic()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if self.checkpoint is not None:
+                self.save_checkpoint()
+
+    def run(self):
+        """
+        Plays every remaining game and returns the summary.
+        """
+        for _ in self.results():
+            pass
+        return self.get_summary()
+
+    def get_summary(self):
+        """
+        Returns a dictionary with the number of games played and, for every
+        policy, its wins, win rate and the confidence interval of its win rate.
+        """
+        games = len(self.done)
+        policies = []
+        for name, wins in zip(self.policy_names, self.wins):
+            low, high = wilson_interval(wins, games)
+            policies.append(dict(
+                name=name,
+                wins=wins,
+                win_rate=wins / games if games else 0.0,
+                ci_low=low,
+                ci_high=high,
+            ))
+        return dict(games=games, unfinished=self.unfinished, turns=self.turns,
+                    policies=policies)
+
+    def save_checkpoint(self):
+        """
+        Writes the partial results to the checkpoint file (atomically, so that
+        an interruption never leaves a truncated file behind).
+        """
+        data = dict(
+            policy_names=self.policy_names,
+            num_games=self.num_games,
+            seed=self.seed,
+            wins=self.wins,
+            unfinished=self.unfinished,
+            turns=self.turns,
+            done=_to_ranges(self.done),
+        )
+        temporary = self.checkpoint + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, self.checkpoint)
+
+    def load_checkpoint(self):
+        """
+        Restores the partial results from the checkpoint file. Raises
+        ValueError if it belongs to a different tournament (other policies,
+        seed or number of games).
+        """
+        with open(self.checkpoint) as f:
+            data = json.load(f)
+        for key in ("policy_names", "num_games", "seed"):
+            if data.get(key) != getattr(self, key):
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint!r} is for a different "
+                    f"tournament ({key}: {data.get(key)!r}, expected "
+                    f"{getattr(self, key)!r})")
+        self.wins = data["wins"]
+        self.unfinished = data["unfinished"]
+        self.turns = data["turns"]
+        self.done = set()
+        for start, end in data["done"]:
+            self.done.update(range(start, end))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--policy", action="append", choices=sorted(POLICIES),
+                        required=True, help="policy of the next player")
+    parser.add_argument("--games", type=int, default=10000,
+                        help="number of games to play")
+    parser.add_argument("--workers", type=int,
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the tournament")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="games played per worker task")
+    parser.add_argument("--checkpoint", help="file to save and resume from")
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args()
+
+    tournament = Tournament(args.policy, args.games, seed=args.seed,
+                            workers=args.workers, chunk_size=args.chunk_size,
+                            checkpoint=args.checkpoint)
+
+    start = time.perf_counter()
+    played_before = len(tournament.done)
+    summary = tournament.run()
+    elapsed = time.perf_counter() - start
+
+    for policy in summary["policies"]:
+        print("{:<8} {:>8} wins  {:>7.2%}  [{:.2%}, {:.2%}]".format(
+            policy["name"], policy["wins"], policy["win_rate"],
+            policy["ci_low"], policy["ci_high"]))
+    played = summary["games"] - played_before
+    print("{} games ({} unfinished) with {} workers in {:.2f} s ({:.0f} games/s)".format(
+        summary["games"], summary["unfinished"], tournament.workers, elapsed,
+        played / elapsed if elapsed else 0))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
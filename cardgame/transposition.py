@@ -0,0 +1,211 @@
+"""
+Transposition cache for the search opponents. Positions are identified by a
+Zobrist hash of what the player to move knows about them: the top card of the
+discard pile, the cards of their hand (as a multiset of card codes, so that
+two identical cards are interchangeable), the hand sizes of the other players
+in the order they play and the direction of play.
+
+state_hash hashes the complete state of a game instead (where every card is,
+the colors of the wild cards, whose turn it is and the direction of play);
+simulation.Game keeps it up to date incrementally as it is played.
+
+The cache keeps the most recently used evaluations up to a maximum size, can
+be shared by every opponent of a game and saved to a file between runs.
+"""
+
+import json
+import os
+import random
+from collections import OrderedDict
+
+from .cards import COLOR_BITS, VALUE_BITS
+
+# The keys are drawn from a generator with a fixed seed, so that hashes (and
+# saved caches) stay valid between runs
+ZOBRIST_SEED = 0x5A0B
+
+# Hashes distinguish up to this many copies of a card in a hand, this many
+# players and this many cards per hand
+MAX_COPIES = 16
+MAX_PLAYERS = 16
+MAX_HAND_SIZE = 128
+
+# Number of evaluations kept by default
+CACHE_SIZE = 100000
+
+_rng = random.Random(ZOBRIST_SEED)
+TOP_KEYS = [_rng.getrandbits(64) for _ in range(256)]
+# HAND_KEYS[code * MAX_COPIES + k] is the key of the (k + 1)th card with code
+HAND_KEYS = [_rng.getrandbits(64) for _ in range(256 * MAX_COPIES)]
+# SIZE_KEYS[seat * MAX_HAND_SIZE + size] is the key of the player seat turns
+# after the player to move holding size cards
+SIZE_KEYS = [_rng.getrandbits(64) for _ in range(MAX_PLAYERS * MAX_HAND_SIZE)]
+REVERSED_KEY = _rng.getrandbits(64)
+
+# Keys of the complete state of a game (see state_hash), for card ids below
+# MAX_CARD_ID. CARD_KEYS[location * MAX_CARD_ID + id] is the key of the card
+# being in the deck (location DECK), the discard pile (DISCARD) or the hand of
+# player i (HAND + i). COLOR_KEYS[id << COLOR_BITS | color code] is the key of
+# the card's color, which changes when a wild card is played.
+MAX_CARD_ID = 256
+DECK, DISCARD, HAND = 0, 1, 2
+CARD_KEYS = [_rng.getrandbits(64)
+             for _ in range((HAND + MAX_PLAYERS) * MAX_CARD_ID)]
+COLOR_KEYS = [_rng.getrandbits(64) for _ in range(MAX_CARD_ID << COLOR_BITS)]
+TURN_KEYS = [_rng.getrandbits(64) for _ in range(MAX_PLAYERS)]
+del _rng
+
+
+def hash_hand(cards):
+    """
+    Returns the Zobrist hash of a hand, which only depends on the codes of
+    its cards (not on their order or ids).
+    """
+    h = 0
+    copies = {}
+    for card in cards:
+        code = card.code
+        k = copies.get(code, 0)
+        copies[code] = k + 1
+        h ^= HAND_KEYS[code * MAX_COPIES + k]
+    return h
+
+
+def position_hash(game, observer=None):
+    """
+    Returns the Zobrist hash of the game as seen by a player.
+    Parameters:
+    -----------
+    game: a simulation.Game
+    observer: index of the player (default: the player to move)
+    """
+    if observer is None:
+        observer = game.current
+    players = game.players
+    h = TOP_KEYS[game.get_top_card().code] ^ \
+        hash_hand(players[observer].hand.cards)
+    for seat in range(1, len(players)):
+        player = players[(observer + seat * game.direction) % len(players)]
+        h ^= SIZE_KEYS[seat * MAX_HAND_SIZE + len(player.hand)]
+    if game.direction < 0:
+        h ^= REVERSED_KEY
+    return h
+
+
+def state_hash(game):
+    """
+    Returns the Zobrist hash of the complete state of a game: the location
+    and color of every card, the player to move and the direction of play
+    (but not the order of the deck or the number of turns played).
+    Parameters:
+    -----------
+    game: a simulation.Game
+    """
+    h = TURN_KEYS[game.current]
+    if game.direction < 0:
+        h ^= REVERSED_KEY
+    locations = [game.deck.cards, game.discard_deck.cards] + \
+        [player.hand.cards for player in game.players]
+    card_keys = CARD_KEYS
+    color_keys = COLOR_KEYS
+    for location, cards in enumerate(locations):
+        base = location * MAX_CARD_ID
+        for id, card in cards.by_id.items():
+            h ^= card_keys[base + id] ^ \
+                color_keys[id << COLOR_BITS | card.code >> VALUE_BITS]
+    return h
+
+
+class TranspositionCache:
+    """
+    Maps position hashes to evaluations, evicting the least recently used
+    evaluation once max_size are stored. Evaluations must be JSON-serializable
+    to be saved.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, path=None):
+        """
+        Parameters:
+        -----------
+        max_size: maximum number of evaluations kept
+        path: optional JSON file the cache is loaded from (if it exists) and
+            saved to
+        """
+        self.max_size = max_size
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def get(self, key):
+        """
+        Returns the evaluation stored for key, or None.
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of stored evaluations, hits,
+        misses, evictions and the hit rate.
+        """
+        lookups = self.hits + self.misses
+        return dict(
+            size=len(self.entries),
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            hit_rate=self.hits / lookups if lookups else 0.0,
+        )
+
+    def save(self, path=None):
+        """
+        Writes the evaluations, least recently used first, to path (default:
+        the cache's path). The file is replaced atomically.
+        """
+        path = self.path if path is None else path
+        data = dict(
+            seed=ZOBRIST_SEED,
+            entries=[[key, value] for key, value in self.entries.items()],
+        )
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+
+    def load(self, path=None):
+        """
+        Adds the evaluations saved in path (default: the cache's path). Raises
+        ValueError if they were hashed with different keys.
+        """
+        path = self.path if path is None else path
+        with open(path) as f:
+            data = json.load(f)
+        if data["seed"] != ZOBRIST_SEED:
+            raise ValueError(f"Cache {path!r} was saved with different keys")
+        for key, value in data["entries"]:
+            self.put(key, value)
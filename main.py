@@ -1,5 +1,7 @@
+import argparse
 import copy
 import math
+import os
 import pygame
 import random
 import sys
@@ -7,10 +9,16 @@ import json
 import pygame.locals as pg
 import time
 import enum
+from concurrent.futures import ThreadPoolExecutor
 from animation.util import show_text
+from animation.shared_objects import SharedObjects
 
 from cardgame.cards import Card, Deck, Hand, ComplexEncoder
 from cardgame.player import Player
+from cardgame.moves import get_legal_cards
+from cardgame.search import MonteCarloPolicy
+from cardgame.simulation import Game
+from cardgame.transposition import TranspositionCache
 
 import animation
 
@@ -51,18 +59,40 @@ def generate_uno_deck():
         animation.game.track_card(animation.assets.CARDS[surface], card.id)
 
     # Populate main deck and create discard
-    discard = Deck()
-    deck = Deck(discard=discard, cards=cards)
+    discard = Deck(rng=RNG)
+    deck = Deck(discard=discard, cards=cards, rng=RNG)
     deck.shuffle()
     sfx_card_shuffle.play()
     return deck
 
 
 DECK = None
+# Seed of the next game (None picks a random seed)
+SEED = None
+# Every random decision of the current game is drawn from this generator
+RNG = None
 CURRENT_MODE = None
 CURRENT_PLAYER = None
+OPPONENTS = None
 OPPONENT_TRACKER = None
 
+# Seconds the opponents search for their move (while they "think")
+OPPONENT_THINK_TIME = 0.5
+# Evaluations of the positions the opponents already searched, shared by all
+# opponents (and saved between runs with --ai-cache)
+OPPONENT_CACHE = TranspositionCache()
+# Opponents pick their cards by Monte Carlo search, with the rollouts played in
+# SEARCH_THREAD rather than on worker processes: importing animation already
+# opened the window and loaded the assets, which forked workers would inherit
+# and spawned workers (which import this script again) would load again
+OPPONENT_POLICY = MonteCarloPolicy(time_budget=OPPONENT_THINK_TIME,
+                                   cache=OPPONENT_CACHE)
+# Rollouts per move of the opponents' searches in games replayed with --seed,
+# which are not limited in time (about OPPONENT_THINK_TIME's worth)
+REPLAY_ROLLOUTS = 100
+# Runs the searches in the background of the animation loop
+SEARCH_THREAD = ThreadPoolExecutor(max_workers=1)
+
 
 def check_for_key_press():
     if len(pygame.event.get(pg.QUIT)) > 0:
@@ -73,10 +103,15 @@ def check_for_key_press():
         return None
     if keyUpEvents[0].key == pg.K_ESCAPE:
         terminate()
+    if keyUpEvents[0].key == pg.K_F3:
+        animation.toggle_hud()
     return keyUpEvents[0].key
 
 
 def terminate():
+    OPPONENT_POLICY.close()
+    if OPPONENT_CACHE.path is not None:
+        OPPONENT_CACHE.save()
     pygame.quit()
     sys.exit()
 
@@ -88,18 +123,38 @@ def player_cycle(opponents):
             yield opponent
 
 
+def choose_opponent_move(opponent, matches):
+    """
+    Returns the card the opponent plays and the color it is played as (None
+    for cards which are not wild). Runs in SEARCH_THREAD.
+    """
+    players = [CURRENT_PLAYER] + OPPONENTS
+    # The search hashes positions itself (see MonteCarloSearch.evaluate)
+    game = Game.from_players([OPPONENT_POLICY] * len(players), players, DECK,
+                             current=players.index(opponent), hashing=False)
+    card = OPPONENT_POLICY.choose_card(game, opponent, matches)
+    color = None
+    if card.value in ["wild", "wild_draw"]:
+        color = OPPONENT_POLICY.choose_color(game, opponent, card)
+    return card, color
+
+
 def opponent_turn(opponent_tracker):
-    sleep_time = random.random() + .5
-    animwait(sleep_time)
+    sleep_time = RNG.random() + .5
     opponent = next(opponent_tracker)
     deck = opponent.hand.deck
-    matches = [card for card in opponent.hand.cards if card.match(
-        deck.getDiscard())]
+    matches = get_legal_cards(opponent.hand.cards, deck.getDiscard())
+    if matches:
+        # The opponent searches for its move while it "thinks"
+        search = SEARCH_THREAD.submit(choose_opponent_move, opponent, matches)
+        animwait(sleep_time, until=search)
+    else:
+        animwait(sleep_time)
     if matches:
         # Play Card
-        chosen_card = random.choice(matches)
+        chosen_card, color = search.result()
         sfx_card_place.play()
-        opponent.playCard(chosen_card, accept_input=False)
+        opponent.playCard(chosen_card, accept_input=False, color=color)
         if chosen_card.value in ["wild", "wild_draw"]:
             color = chosen_card.color
             color_id = 0
@@ -127,16 +182,40 @@ def opponent_turn(opponent_tracker):
     animation.next_frame()
 
 
-def animwait(seconds):
+def animwait(seconds, until=None):
+    """
+    Keeps animating for the given number of seconds, and then until the
+    future until (if any) is done.
+    """
     goal = pygame.time.get_ticks() + seconds*1000
-    while pygame.time.get_ticks() < goal:
+    while pygame.time.get_ticks() < goal or \
+            (until is not None and not until.done()):
 
         animation.next_frame()
         check_for_key_press()
 
 
 def main():
-    global CURRENT_MODE
+    global CURRENT_MODE, SEED, OPPONENT_POLICY
+
+    parser = argparse.ArgumentParser(description="Uno!")
+    parser.add_argument("--seed", type=int,
+                        help="seed of the game, to replay a previous game")
+    parser.add_argument("--ai-cache", metavar="PATH",
+                        help="file the opponents' evaluations are kept in "
+                             "(not used with --seed)")
+    args = parser.parse_args()
+    SEED = args.seed
+    if SEED is not None:
+        # How many deals fit in a time budget depends on the machine, and the
+        # cache on what was searched before: replays search a fixed number of
+        # rollouts without a cache, so that the opponents play the same moves
+        OPPONENT_POLICY = MonteCarloPolicy(time_budget=math.inf,
+                                           rollouts=REPLAY_ROLLOUTS)
+    elif args.ai_cache:
+        OPPONENT_CACHE.path = args.ai_cache
+        if os.path.exists(args.ai_cache):
+            OPPONENT_CACHE.load()
 
     pygame.init()
 
@@ -172,12 +251,25 @@ def do_intro_iteration():
                 terminate()
 
 
-def init_game():
-    global DECK
+def init_game(seed=None):
+    """
+    Starts a new game. Games started with the same seed (and played with the
+    same inputs) are replayed exactly when the opponents' searches are not
+    limited in time (see main); the seed of every game is printed.
+    """
+    global DECK, RNG
+    if seed is None:
+        seed = random.randrange(2**32)
+    print("Game seed:", seed)
+    RNG = random.Random(seed)
+    SharedObjects.get_random().seed(RNG.getrandbits(64))
+
+    animation.game.load_card_mipmaps()
     DECK = generate_uno_deck()
 
     opponent_names = ["Thomas", "Brendan", "Austin"]
-    opponents = [Player(name, DECK) for name in opponent_names]
+    global OPPONENTS
+    opponents = OPPONENTS = [Player(name, DECK) for name in opponent_names]
 
     for opponent in opponents:
         animation.game.add_opponent(opponent.name)
@@ -221,7 +313,7 @@ def do_lobby_iteration():
                 animation.lobby.join_button_to_waiting()
                 animwait(10)
                 CURRENT_MODE = Modes.GAME
-                init_game()
+                init_game(SEED)
             elif animation.lobby.clicked_cancel(position):
                 print("Clicked cancel button!")
                 CURRENT_MODE = Modes.INTRO
@@ -0,0 +1 @@
+from .client import Client, ThreadedClient, NetworkError, Disconnected
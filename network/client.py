@@ -0,0 +1,418 @@
+"""
+Asyncio client of the matchmaking server. A reader task parses messages as
+soon as they arrive: replies the client is waiting for (e.g. during the
+connection handshake) resolve their waiters, the latest client list is kept in
+players and every other message is put in a queue which the game loop drains
+without blocking.
+
+When joining, the client offers the formats of network.compact; if the server
+picks the compact format, game-state messages are sent as binary frames (and
+any other message as JSON).
+
+ThreadedClient runs a Client on an event loop in a background thread, for the
+(synchronous) pygame loop.
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+
+from . import compact, protocol
+from .protocol import CLIENT_INFO, CLIENT_LIST, CONNECT, DISCONNECT, ERROR
+
+HOST = '169.254.227.222'
+PORT = 8000
+
+# Seconds without sending anything after which the client list is requested
+# again, so that the server does not time the connection out
+KEEPALIVE_INTERVAL = 3
+
+# Seconds opening the connection, and each step of the handshake after the
+# game is full, may take (waiting for the game to fill up is not limited)
+CONNECT_TIMEOUT = 10
+
+
+class NetworkError(Exception):
+    """
+    Raised when the server answers with an error.
+    """
+
+
+class Disconnected(NetworkError):
+    """
+    Raised when the server disconnects the client or closes the connection.
+    """
+
+
+class Client:
+    """
+    A connection to the matchmaking server. Must be used from a single event
+    loop, except for get_message and poll which can be called from any thread.
+    """
+
+    def __init__(self, host=HOST, port=PORT, game="default",
+                 keepalive_interval=KEEPALIVE_INTERVAL,
+                 formats=compact.FORMATS):
+        self.host = host
+        self.port = port
+        self.game = game
+        self.keepalive_interval = keepalive_interval
+        # Wire formats offered to the server, and the one it picked
+        self.formats = formats
+        self.format = compact.JSON
+        self.codec = compact.Codec()
+
+        # Set by connect: the id the server gave this client and the latest
+        # client-list message
+        self.id = None
+        self.players = None
+
+        # Messages nobody was waiting for, oldest first
+        self.messages = queue.Queue()
+        self.closed = False
+        # Set once a disconnect message was queued for the lost connection
+        self._lost = False
+
+        self._reader = None
+        self._writer = None
+        self._tasks = []
+        # List of [predicate, future] pairs waiting for a message
+        self._waiters = []
+        self._received = None
+        self._last_sent = 0
+
+    async def open(self):
+        """
+        Opens the connection and starts reading messages.
+        """
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port)
+        self._received = asyncio.Event()
+        self._last_sent = asyncio.get_running_loop().time()
+        self._tasks.append(asyncio.create_task(self._read_loop()))
+
+    async def connect(self, name, timeout=CONNECT_TIMEOUT):
+        """
+        Opens the connection (if it is not open yet), joins the game as name,
+        waits until the game is full and fetches the client list. The client
+        keeps the connection alive while it waits, until close() is called.
+        Raises NetworkError if the server refuses, Disconnected if it
+        disconnects and asyncio.TimeoutError if opening the connection, or a
+        step of the handshake other than waiting for the game, takes longer
+        than timeout seconds. The connection is closed if joining fails.
+        """
+        try:
+            if self._writer is None:
+                await asyncio.wait_for(self.open(), timeout)
+            self._tasks.append(asyncio.create_task(self._keepalive()))
+            await self._join(name)
+            await asyncio.wait_for(self._fetch_info(name), timeout)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _join(self, name):
+        # Answered once the game is full
+        reply = await self.request(
+            {"messageType": CONNECT, "data": {
+                "game": self.game,
+                "clientType": "client",
+                "configuration": {"id": name},
+                "formats": self.formats,
+            }},
+            lambda message: message.get("messageType") == CONNECT)
+        # Servers which do not know the compact format answer with a string
+        data = reply.get("data")
+        if isinstance(data, dict) and data.get("format") in self.formats:
+            self.format = data["format"]
+
+    async def _fetch_info(self, name):
+        reply = await self.request(
+            {"messageType": CLIENT_INFO, "data": {"clientInfo": {"id": name}}},
+            lambda message: isinstance(message.get("data"), dict) and
+            "id" in message["data"])
+        self.id = reply["data"]["id"]
+
+        await self.request({"messageType": CLIENT_LIST},
+                           lambda message: message.get("messageType") == CLIENT_LIST)
+
+    async def send(self, message):
+        """
+        Sends a message (any JSON-serializable object).
+        """
+        if self.closed:
+            raise Disconnected("The connection is closed")
+        frame = None
+        if self.format == compact.COMPACT:
+            frame = self.codec.encode(message)
+        if frame is None:
+            frame = protocol.encode_message(message)
+        self._writer.write(frame)
+        self._last_sent = asyncio.get_running_loop().time()
+        await self._writer.drain()
+
+    async def request(self, message, predicate):
+        """
+        Sends a message and returns the first message received afterwards for
+        which predicate(message) is true. That message is not queued.
+        """
+        future = self.wait_for(predicate)
+        await self.send(message)
+        return await future
+
+    def wait_for(self, predicate):
+        """
+        Returns a future resolved with the next message for which
+        predicate(message) is true (which is not queued). The future fails
+        with NetworkError if an error message arrives first.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append([predicate, future])
+        return future
+
+    async def receive(self):
+        """
+        Returns the next queued message, waiting for one if there is none.
+        """
+        while True:
+            try:
+                return self.messages.get_nowait()
+            except queue.Empty:
+                if self.closed:
+                    raise Disconnected("The connection is closed")
+                self._received.clear()
+                await self._received.wait()
+
+    def get_message(self):
+        """
+        Returns the next queued message, or None if there is none. Never
+        blocks.
+        """
+        try:
+            return self.messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def poll(self):
+        """
+        Returns the list of every queued message. Never blocks.
+        """
+        messages = []
+        while True:
+            message = self.get_message()
+            if message is None:
+                return messages
+            messages.append(message)
+
+    def _dispatch(self, message):
+        message_type = message.get("messageType")
+        if message_type == CLIENT_LIST:
+            self.players = message
+
+        for waiter in self._waiters:
+            predicate, future = waiter
+            if not future.done() and predicate(message):
+                self._waiters.remove(waiter)
+                future.set_result(message)
+                return
+
+        if message_type == ERROR:
+            self._fail_waiters(NetworkError(message.get("data")))
+        elif message_type == DISCONNECT:
+            self._fail_waiters(Disconnected(message.get("data")))
+        elif message_type == CLIENT_LIST:
+            # Replies to the keepalive requests
+            return
+
+        self.messages.put(message)
+        self._received.set()
+
+    def _fail_waiters(self, error):
+        waiters, self._waiters = self._waiters, []
+        for predicate, future in waiters:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _read_loop(self):
+        # Every read dispatches all the complete messages it brought in
+        decoder = protocol.FrameDecoder(codec=self.codec)
+        try:
+            while True:
+                data = await self._reader.read(protocol.RECV_BUFFER_SIZE)
+                if not data:
+                    raise ConnectionError("The connection was closed")
+                decoder.feed(data)
+                for message in decoder.messages():
+                    self._dispatch(message)
+        except (ConnectionError, protocol.ProtocolError) as e:
+            if not self.closed:
+                self._connection_lost(e)
+
+    def _connection_lost(self, error):
+        """
+        Fails the waiters and queues a disconnect message (once) for the game
+        loop.
+        """
+        self.closed = True
+        self._fail_waiters(Disconnected(str(error)))
+        if not self._lost:
+            self._lost = True
+            self.messages.put({"messageType": DISCONNECT, "data": str(error)})
+            if self._received is not None:
+                self._received.set()
+
+    async def _keepalive(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.closed:
+                idle = loop.time() - self._last_sent
+                if idle >= self.keepalive_interval:
+                    await self.send({"messageType": CLIENT_LIST})
+                    idle = 0
+                await asyncio.sleep(self.keepalive_interval - idle)
+        except (ConnectionError, NetworkError):
+            # The read loop reports the disconnection
+            pass
+
+    async def close(self):
+        """
+        Stops reading and closes the connection.
+        """
+        self.closed = True
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+        self._fail_waiters(Disconnected("The connection is closed"))
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class ThreadedClient:
+    """
+    Runs a Client on an event loop in a daemon thread. Blocking methods wait
+    for the network; get_message, poll and send return immediately, so they
+    can be called once per frame.
+    """
+
+    def __init__(self, host=HOST, port=PORT, game="default",
+                 keepalive_interval=KEEPALIVE_INTERVAL,
+                 formats=compact.FORMATS, loop=None):
+        """
+        Parameters:
+        -----------
+        see Client
+        loop: optional event loop, running in another thread, shared with
+            other clients (by default the client starts its own)
+        """
+        self.client = Client(host, port, game, keepalive_interval, formats)
+        if loop is not None:
+            self.loop = loop
+            self.thread = None
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever,
+                                       name="network", daemon=True)
+        self.thread.start()
+
+    @property
+    def id(self):
+        return self.client.id
+
+    @property
+    def players(self):
+        return self.client.players
+
+    @property
+    def format(self):
+        return self.client.format
+
+    def _run(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(
+            coroutine, self.loop).result(timeout)
+
+    def open(self, timeout=CONNECT_TIMEOUT):
+        """
+        Opens the connection, blocking until it is open.
+        """
+        self._run(asyncio.wait_for(self.client.open(), timeout))
+
+    def connect(self, name, timeout=CONNECT_TIMEOUT):
+        """
+        Joins the game (see Client.connect), blocking until the handshake is
+        over.
+        """
+        self._run(self.client.connect(name, timeout))
+
+    def send(self, message):
+        """
+        Sends a message in the background. Returns a concurrent.futures.Future
+        which is done once it was written. If sending fails (e.g. after the
+        connection was closed), a disconnect message is queued, unless one
+        was already queued for the closed connection. Never raises: after
+        close(), the future fails with Disconnected.
+        """
+        if self.client.closed or not self.loop.is_running():
+            future = concurrent.futures.Future()
+            future.set_exception(Disconnected("The connection is closed"))
+            self._report(future.exception())
+            return future
+        future = asyncio.run_coroutine_threadsafe(
+            self.client.send(message), self.loop)
+        future.add_done_callback(self._sent)
+        return future
+
+    def _sent(self, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._report(error)
+
+    def _report(self, error):
+        """
+        Queues the disconnect message of a failed send: on the loop's thread
+        while the loop runs, directly once it stopped.
+        """
+        if self.loop.is_running():
+            try:
+                self.loop.call_soon_threadsafe(self.client._connection_lost,
+                                               error)
+                return
+            except RuntimeError:
+                # The loop was closed in the meantime
+                pass
+        self.client._connection_lost(error)
+
+    def get_message(self):
+        return self.client.get_message()
+
+    def poll(self):
+        return self.client.poll()
+
+    def wait_message(self, timeout=None):
+        """
+        Returns the next queued message, blocking until there is one (or
+        raising queue.Empty after timeout seconds).
+        """
+        return self.client.messages.get(timeout=timeout)
+
+    def close(self):
+        """
+        Closes the connection and stops the event loop's thread (unless the
+        loop is shared).
+        """
+        if self.thread is None:
+            if self.loop.is_running():
+                self._run(self.client.close())
+            return
+        if self.loop.is_running():
+            self._run(self.client.close())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        self.loop.close()
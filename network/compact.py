@@ -0,0 +1,299 @@
+"""
+Compact binary encoding of the game-state messages, sent in frames with
+protocol.BINARY_MAGIC by clients which negotiated it when joining a game (see
+client.Client). Every other message, and any game-state message the encoding
+cannot represent exactly, is still sent as JSON.
+
+The turn order message (see networking.turnSend) is sent as a snapshot of the
+deck: card ids as 16-bit ints and card codes as single bytes, tagged with a
+random epoch which versions the state. Moves (see networking.sendMove) are
+sent as fixed-size deltas against the latest snapshot: they only give the id
+of the card, and its code only when it differs from the snapshot's (e.g. the
+color chosen for a wild card). A delta against a snapshot the receiver does
+not have is rejected with ProtocolError.
+
+Both layouts are little-endian; players are ids (non-negative ints) or one of
+the places in PLACES.
+"""
+
+import random
+import sys
+from array import array
+from struct import Struct, error as StructError
+
+from cardgame.cards import VALUE_BITS, VALUE_MASK
+from .protocol import BINARY_MAGIC, GAME_STATE, HEADER, ProtocolError, \
+    encode_frame
+
+COMPACT = "compact"
+JSON = "json"
+
+# Formats offered by the clients, preferred first
+FORMATS = [COMPACT, JSON]
+
+# Names of the colors and values on the wire: a card code is
+# color index << VALUE_BITS | value index, as in cardgame.cards (whose codes
+# for these names are the same)
+WIRE_COLORS = [None, "Red", "Green", "Yellow", "Blue", "wild"]
+WIRE_VALUES = [None] + [str(num) for num in range(10)] + \
+              ["draw", "skip", "reverse", "wild", "wild_draw"]
+_COLOR_INDEX = {color: i for i, color in enumerate(WIRE_COLORS)}
+_VALUE_INDEX = {value: i for i, value in enumerate(WIRE_VALUES)}
+
+# Kinds of binary messages (the first byte of the body)
+MOVE = 1
+SETUP = 2
+
+# Encodings of the sources and destinations which are not players
+PLACES = {"deck": -1, "discard": -2, None: -3}
+_PLACE_NAMES = {code: name for name, code in PLACES.items()}
+
+# cardID of a move without a card
+NO_CARD = 0xFFFF
+
+# Move flags
+REVERSE_ORDER = 1
+# The card code follows the move (otherwise it is the snapshot's)
+CARD_CODE = 2
+
+# kind, flags, epoch, cardID, source, dest, nextPlayer, sender
+MOVE_HEADER = Struct("<BBIHiiii")
+# kind, flags, epoch, turn, number of players in the order
+SETUP_HEADER = Struct("<BBIiH")
+# number of cards of a deck section, then whether a discard deck follows
+COUNT = Struct("<I")
+HAS_DISCARD = Struct("<B")
+
+# Keys of the messages which are encoded, in the order they are decoded
+MOVE_KEYS = ("source", "dest", "color", "value", "cardID", "reverseOrder",
+             "nextPlayer", "sender")
+SETUP_KEYS = ("turn", "order", "deck")
+CARD_KEYS = {"id", "value", "color"}
+
+
+def _encode_place(place):
+    """
+    Returns the wire int of a player id or place, or None if it has none.
+    """
+    if type(place) is int:
+        return place if 0 <= place < 1 << 31 else None
+    return PLACES.get(place) if place is None or type(place) is str else None
+
+
+def _decode_place(code):
+    return code if code >= 0 else _PLACE_NAMES[code]
+
+
+def _card_code(color, value):
+    """
+    Returns the wire code of a card, or None if a name is not on the wire.
+    """
+    if not (color is None or type(color) is str) or \
+            not (value is None or type(value) is str):
+        return None
+    color = _COLOR_INDEX.get(color)
+    value = _VALUE_INDEX.get(value)
+    if color is None or value is None:
+        return None
+    return color << VALUE_BITS | value
+
+
+def _game_state(message):
+    """
+    Returns the state of a game-state message shaped like those of networking
+    (and nothing else), or None.
+    """
+    if type(message) is not dict or message.keys() != {"messageType", "data"} \
+            or message["messageType"] != GAME_STATE:
+        return None
+    data = message["data"]
+    if type(data) is not dict or data.keys() != {"state"} or \
+            type(data["state"]) is not dict:
+        return None
+    return data["state"]
+
+
+class Codec:
+    """
+    Encodes and decodes the binary messages of one connection. Keeps the
+    latest snapshot sent and the latest snapshot received, which moves are
+    deltas against.
+    """
+
+    def __init__(self, rng=None):
+        """
+        Parameters:
+        -----------
+        rng: random.Random drawing the epochs of the snapshots sent
+        """
+        self.rng = random.Random() if rng is None else rng
+        # Epoch and {card id: code} of the latest snapshots
+        self.sent_epoch = 0
+        self.sent_cards = {}
+        self.received_epoch = None
+        self.received_cards = {}
+
+    def encode(self, message):
+        """
+        Returns the binary frame of a message as a bytearray, or None if it
+        must be sent as JSON.
+        """
+        state = _game_state(message)
+        if state is None:
+            return None
+        keys = state.keys()
+        if keys == set(MOVE_KEYS):
+            return self._encode_move(state)
+        if keys == set(SETUP_KEYS):
+            return self._encode_setup(state)
+        return None
+
+    def _encode_move(self, state):
+        places = [_encode_place(state[key])
+                  for key in ("source", "dest", "nextPlayer", "sender")]
+        code = _card_code(state["color"], state["value"])
+        card_id = state["cardID"]
+        reverse = state["reverseOrder"]
+        if None in places or code is None or type(reverse) is not bool:
+            return None
+        if card_id is None:
+            card_id = NO_CARD
+        elif type(card_id) is not int or not 0 <= card_id < NO_CARD:
+            return None
+
+        flags = REVERSE_ORDER if reverse else 0
+        if self.sent_cards.get(card_id) != code:
+            flags |= CARD_CODE
+        frame = bytearray(HEADER.size + MOVE_HEADER.size +
+                          (1 if flags & CARD_CODE else 0))
+        HEADER.pack_into(frame, 0, BINARY_MAGIC, len(frame) - HEADER.size)
+        MOVE_HEADER.pack_into(frame, HEADER.size, MOVE, flags, self.sent_epoch,
+                              card_id, *places)
+        if flags & CARD_CODE:
+            frame[-1] = code
+        return frame
+
+    def _encode_setup(self, state):
+        turn = _encode_place(state["turn"])
+        order = state["order"]
+        if turn is None or type(order) is not list or len(order) >= 1 << 16 \
+                or state["deck"] is None:
+            return None
+        order = [_encode_place(player) for player in order]
+        if None in order:
+            return None
+
+        cards = {}
+        sections = []
+        deck = state["deck"]
+        while deck is not None:
+            if type(deck) is not dict or \
+                    deck.keys() != {"discardDeck", "cards"}:
+                return None
+            ids = array("H")
+            codes = bytearray()
+            for card in deck["cards"]:
+                if type(card) is not dict or card.keys() != CARD_KEYS:
+                    return None
+                card_id = card["id"]
+                code = _card_code(card["color"], card["value"])
+                if type(card_id) is not int or not 0 <= card_id < NO_CARD or \
+                        code is None:
+                    return None
+                ids.append(card_id)
+                codes.append(code)
+                cards[card_id] = code
+            if sys.byteorder == "big":
+                ids.byteswap()
+            sections.append((ids, codes))
+            deck = deck["discardDeck"]
+
+        epoch = self.rng.getrandbits(32)
+        body = bytearray(SETUP_HEADER.pack(SETUP, 0, epoch, turn, len(order)))
+        body += Struct(f"<{len(order)}i").pack(*order)
+        for i, (ids, codes) in enumerate(sections):
+            if i:
+                body += HAS_DISCARD.pack(1)
+            body += COUNT.pack(len(codes))
+            body += ids.tobytes()
+            body += codes
+        body += HAS_DISCARD.pack(0)
+
+        self.sent_epoch = epoch
+        self.sent_cards = cards
+        return encode_frame(body, BINARY_MAGIC)
+
+    def decode(self, body):
+        """
+        Returns the message of a binary frame body. Raises ProtocolError if it
+        is malformed or a delta against an unknown snapshot.
+        """
+        try:
+            kind = body[0]
+            if kind == MOVE:
+                return self._decode_move(body)
+            if kind == SETUP:
+                return self._decode_setup(body)
+        except ProtocolError:
+            raise
+        except (IndexError, KeyError, ValueError, StructError) as e:
+            raise ProtocolError(f"Invalid binary message: {e!r}") from None
+        raise ProtocolError(f"Unknown binary message kind {kind}")
+
+    def _decode_move(self, body):
+        _, flags, epoch, card_id, source, dest, next_player, sender = \
+            MOVE_HEADER.unpack_from(body)
+        if flags & CARD_CODE:
+            code = body[MOVE_HEADER.size]
+        elif epoch == self.received_epoch:
+            code = self.received_cards[card_id]
+        else:
+            raise ProtocolError(f"Move against unknown state {epoch}")
+        return {"messageType": GAME_STATE, "data": {"state": {
+            "source": _decode_place(source),
+            "dest": _decode_place(dest),
+            "color": WIRE_COLORS[code >> VALUE_BITS],
+            "value": WIRE_VALUES[code & VALUE_MASK],
+            "cardID": None if card_id == NO_CARD else card_id,
+            "reverseOrder": bool(flags & REVERSE_ORDER),
+            "nextPlayer": _decode_place(next_player),
+            "sender": _decode_place(sender),
+        }}}
+
+    def _decode_setup(self, body):
+        _, _, epoch, turn, players = SETUP_HEADER.unpack_from(body)
+        offset = SETUP_HEADER.size
+        order = [_decode_place(player) for player in
+                 Struct(f"<{players}i").unpack_from(body, offset)]
+        offset += 4 * players
+
+        cards = {}
+        decks = []
+        while True:
+            count, = COUNT.unpack_from(body, offset)
+            offset += COUNT.size
+            ids = array("H", body[offset:offset + 2 * count])
+            if sys.byteorder == "big":
+                ids.byteswap()
+            offset += 2 * count
+            codes = body[offset:offset + count]
+            offset += count
+            if len(ids) != count or len(codes) != count:
+                raise ValueError("truncated deck")
+            decks.append([{"id": card_id,
+                           "value": WIRE_VALUES[code & VALUE_MASK],
+                           "color": WIRE_COLORS[code >> VALUE_BITS]}
+                          for card_id, code in zip(ids, codes)])
+            cards.update(zip(ids, codes))
+            more, = HAS_DISCARD.unpack_from(body, offset)
+            offset += HAS_DISCARD.size
+            if not more:
+                break
+
+        deck = None
+        for deck_cards in reversed(decks):
+            deck = {"discardDeck": deck, "cards": deck_cards}
+        self.received_epoch = epoch
+        self.received_cards = cards
+        return {"messageType": GAME_STATE, "data": {"state": {
+            "turn": _decode_place(turn), "order": order, "deck": deck}}}
@@ -0,0 +1,236 @@
+"""
+The wire protocol of the matchmaking server. Every message is a JSON object
+sent as a frame: the 4 bytes b"JSON", the size of the body as a little-endian
+unsigned 32-bit int, then the body (UTF-8 JSON followed by a newline).
+
+Frames are built in a single buffer so that they can be sent with one write,
+and FrameDecoder reassembles them from a stream which may split or merge them
+arbitrarily.
+
+Clients which negotiated the compact format (see network.compact) also send
+frames starting with b"UNOB" instead of b"JSON", whose body is binary.
+"""
+
+import json
+from struct import Struct
+
+MAGIC = b"JSON"
+BINARY_MAGIC = b"UNOB"
+HEADER = Struct("<4sI")
+
+# Frames with a larger body are rejected
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+# Initial size of a FrameDecoder's buffer, and the least free space it offers
+# every read
+RECV_BUFFER_SIZE = 64 * 1024
+MIN_RECV_SIZE = 4096
+
+# Message types (the "messageType" of every message)
+CONNECT = "connect"
+CLIENT_INFO = "client-info"
+CLIENT_LIST = "client-list"
+RESPONSE = "response"
+GAME_STATE = "game-state"
+GAME_FINISHED = "game-finished"
+DISCONNECT = "disconnect"
+ERROR = "error"
+
+
+class ProtocolError(ValueError):
+    """
+    Raised when a frame is malformed.
+    """
+
+
+def encode_frame(body, magic=MAGIC):
+    """
+    Returns the frame of a body (bytes of JSON text, to which the trailing
+    newline is added if it is missing, or a binary body with BINARY_MAGIC) as
+    a bytearray. The header and body are written into a single buffer so that
+    the frame can be sent with one sendall.
+    """
+    newline = magic == MAGIC and not body.endswith(b"\n")
+    size = len(body) + newline
+    frame = bytearray(HEADER.size + size)
+    HEADER.pack_into(frame, 0, magic, size)
+    frame[HEADER.size:HEADER.size + len(body)] = body
+    if newline:
+        frame[-1] = 10
+    return frame
+
+
+def encode_message(message):
+    """
+    Returns the frame of a message (any JSON-serializable object).
+    """
+    return encode_frame(json.dumps(message).encode("utf-8"))
+
+
+def send_message(sock, message):
+    """
+    Sends a message on a blocking socket with a single sendall.
+    """
+    sock.sendall(encode_message(message))
+
+
+def read_header(header, offset=0):
+    """
+    Returns the (magic, size) of the JSON or binary frame header at offset in
+    header (any bytes-like object). Raises ProtocolError if the header is
+    invalid or the body too large.
+    """
+    magic, size = HEADER.unpack_from(header, offset)
+    if magic != MAGIC and magic != BINARY_MAGIC:
+        raise ProtocolError(
+            f"Invalid frame header {bytes(header[offset:offset + HEADER.size])!r}")
+    if size > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Incoming message is too large: {size} bytes")
+    return magic, size
+
+
+def parse_header(header, offset=0):
+    """
+    Returns the size of the body announced by the JSON frame header at offset
+    in header (see read_header).
+    """
+    magic, size = read_header(header, offset)
+    if magic != MAGIC:
+        raise ProtocolError("Unexpected binary frame")
+    return size
+
+
+def decode_body(body):
+    """
+    Returns the message of a frame body.
+    """
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise ProtocolError(f"Invalid message body: {e}") from None
+
+
+class FrameDecoder:
+    """
+    Decodes the messages of a stream of frames which can arrive in pieces of
+    any size. Data is received into a reusable buffer (with recv_into) or fed
+    in, and every complete frame in the buffer is decoded; a partial frame
+    stays buffered until the rest arrives.
+    """
+
+    def __init__(self, size=RECV_BUFFER_SIZE, codec=None):
+        """
+        Parameters:
+        -----------
+        size: initial size of the buffer
+        codec: optional compact.Codec which decodes binary frames (which are
+            rejected with ProtocolError otherwise)
+        """
+        self.codec = codec
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        # The buffered data is buffer[start:end]
+        self.start = 0
+        self.end = 0
+        # Size of the partial frame at start (0 if unknown)
+        self.wanted = 0
+
+    def __len__(self):
+        """
+        Returns the number of buffered bytes.
+        """
+        return self.end - self.start
+
+    def _reserve(self, size):
+        """
+        Makes room for at least size bytes after the buffered data, moving it
+        to the front of the buffer or into a larger buffer if needed.
+        """
+        if len(self.buffer) - self.end >= size:
+            return
+        pending = self.end - self.start
+        if pending + size > len(self.buffer):
+            buffer = bytearray(max(2 * len(self.buffer), pending + size))
+            buffer[:pending] = self.view[self.start:self.end]
+            self.view.release()
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        else:
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+        self.start = 0
+        self.end = pending
+
+    def recv_from(self, sock):
+        """
+        Receives data from a socket with one recv_into call. Returns the
+        number of bytes received (0 once the connection is closed).
+        """
+        self._reserve(max(self.wanted - (self.end - self.start), MIN_RECV_SIZE))
+        received = sock.recv_into(self.view[self.end:])
+        self.end += received
+        return received
+
+    def feed(self, data):
+        """
+        Adds received data (any bytes-like object) to the buffer.
+        """
+        self._reserve(len(data))
+        self.buffer[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def next_message(self):
+        """
+        Decodes and returns the first buffered message, or None if no complete
+        frame is buffered.
+        """
+        pending = self.end - self.start
+        if pending < HEADER.size:
+            return None
+        magic, size = read_header(self.buffer, self.start)
+        if pending < HEADER.size + size:
+            self.wanted = HEADER.size + size
+            return None
+
+        body = self.start + HEADER.size
+        self.start = body + size
+        self.wanted = 0
+        if self.start == self.end:
+            self.start = self.end = 0
+        if magic == MAGIC:
+            return decode_body(self.buffer[body:body + size])
+        if self.codec is None:
+            raise ProtocolError("Unexpected binary frame")
+        return self.codec.decode(self.buffer[body:body + size])
+
+    def messages(self):
+        """
+        Decodes and returns the list of every complete buffered message.
+        """
+        messages = []
+        message = self.next_message()
+        while message is not None:
+            messages.append(message)
+            message = self.next_message()
+        return messages
+
+    def receive(self, sock):
+        """
+        Returns the next message from a blocking socket, receiving until a
+        complete frame is buffered. Raises ConnectionError if the connection
+        is closed first.
+        """
+        message = self.next_message()
+        while message is None:
+            if not self.recv_from(sock):
+                raise ConnectionError("The connection was closed")
+            message = self.next_message()
+        return message
+
+
+async def read_message(reader):
+    """
+    Reads one message from an asyncio.StreamReader. Raises
+    asyncio.IncompleteReadError if the connection is closed first.
+    """
+    size = parse_header(await reader.readexactly(HEADER.size))
+    return decode_body(await reader.readexactly(size))
@@ -0,0 +1,316 @@
+"""
+Stand-in for the matchmaking server, for testing and benchmarking the
+multiplayer game locally. It implements the messages of the client (see
+network.client) over the same framing, and runs any number of games
+concurrently on one asyncio event loop.
+
+Clients asking to join a game are grouped into rooms of max_players, in the
+order they connect: they are answered with a "response" message while the
+room fills up, and every client of the room gets a "connect" message once it
+is full. Then:
+- client-info sets the client's info and is answered with its id
+- client-list is answered with the clients of the room
+- game-state and game-finished messages are relayed to the other clients of
+  the room, in the format each of them negotiated (see network.compact)
+- a client leaving a started game (with a disconnect message, by closing the
+  connection or by staying silent for timeout seconds) disconnects the others
+
+Usage:
+    python -m network.server [--host HOST] [--port PORT] [--max-players N]
+"""
+
+import argparse
+import asyncio
+import itertools
+
+from . import compact, protocol
+from .protocol import CLIENT_INFO, CLIENT_LIST, CONNECT, DISCONNECT, ERROR, \
+    GAME_FINISHED, GAME_STATE, RESPONSE
+
+HOST = "127.0.0.1"
+PORT = 8000
+
+# Players per game
+MAX_PLAYERS = 2
+
+# Seconds without any message after which a client playing a game is
+# disconnected (the clients request the client list every
+# client.KEEPALIVE_INTERVAL seconds); clients waiting for their game to start
+# are never timed out
+TIMEOUT = 10
+
+# Clients which do not read what they are sent are disconnected once this many
+# bytes are waiting to be written to them
+MAX_WRITE_BUFFER = 4 * 1024 * 1024
+
+# Pending connections queued by the listening socket
+BACKLOG = 1024
+
+
+class Connection:
+    """
+    A client of the server.
+    """
+
+    def __init__(self, id, writer):
+        self.id = id
+        self.writer = writer
+        self.info = None
+        self.room = None
+        # Formats the client offered (None for clients which do not know
+        # them), and the one it was given
+        self.formats = None
+        self.format = compact.JSON
+        # Decodes the binary messages of the client and encodes those it is
+        # sent: every client gets its own snapshots (senders do not get theirs
+        # back), so moves are deltas against what each client received
+        self.codec = compact.Codec()
+
+    def send(self, frame):
+        """
+        Writes a frame without waiting, disconnecting slow readers.
+        """
+        writer = self.writer
+        if writer.is_closing():
+            return
+        writer.write(frame)
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            writer.close()
+
+    def describe(self, leader):
+        """
+        Returns the client's entry in the client list.
+        """
+        return {"id": self.id, "clientInfo": self.info,
+                "isLobbyLeader": self is leader}
+
+
+class Room:
+    """
+    A game being filled or played.
+    """
+
+    def __init__(self, game, max_players):
+        self.game = game
+        self.max_players = max_players
+        self.clients = []
+        self.started = False
+
+    def relay(self, sender, message):
+        """
+        Sends a message to every client of the room but its sender. The JSON
+        frame is encoded at most once.
+        """
+        json_frame = None
+        for client in self.clients:
+            if client is sender:
+                continue
+            frame = None
+            if client.format == compact.COMPACT:
+                frame = client.codec.encode(message)
+            if frame is None:
+                if json_frame is None:
+                    json_frame = protocol.encode_message(message)
+                frame = json_frame
+            client.send(frame)
+        return len(self.clients) - 1
+
+
+class Server:
+    """
+    Matches clients into rooms and relays their game messages.
+    """
+
+    def __init__(self, host=HOST, port=PORT, max_players=MAX_PLAYERS,
+                 timeout=TIMEOUT, formats=compact.FORMATS):
+        """
+        Parameters:
+        -----------
+        host, port: address to listen on (port 0 picks a free port)
+        max_players: number of players per game
+        timeout: seconds of silence after which a client playing a game is
+            disconnected
+        formats: wire formats the server accepts, preferred first
+        """
+        self.host = host
+        self.port = port
+        self.max_players = max_players
+        self.timeout = timeout
+        self.formats = formats
+        self.server = None
+        self.clients = {}
+        # Maps game names to the room being filled
+        self.lobbies = {}
+        self._ids = itertools.count(1)
+        self.stats = dict(connections=0, games=0, received=0, relayed=0)
+
+    async def start(self):
+        """
+        Starts listening. The port is updated if a free one was picked.
+        """
+        self.server = await asyncio.start_server(
+            self.handle, self.host, self.port, backlog=BACKLOG)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        await self.server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening and disconnects every client.
+        """
+        self.server.close()
+        for client in list(self.clients.values()):
+            client.writer.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        client = Connection(next(self._ids), writer)
+        self.clients[client.id] = client
+        self.stats["connections"] += 1
+        decoder = protocol.FrameDecoder(codec=client.codec)
+        reason = "Connection closed"
+        try:
+            while not writer.is_closing():
+                try:
+                    data = await asyncio.wait_for(
+                        reader.read(protocol.RECV_BUFFER_SIZE), self.timeout)
+                except asyncio.TimeoutError:
+                    # Clients waiting for their game to start may be silent
+                    if client.room is not None and client.room.started:
+                        raise
+                    continue
+                if not data:
+                    break
+                decoder.feed(data)
+                for message in decoder.messages():
+                    self.stats["received"] += 1
+                    if not self.dispatch(client, message):
+                        return
+        except asyncio.TimeoutError:
+            reason = "Timed out"
+            client.send(protocol.encode_message(
+                {"messageType": DISCONNECT, "data": reason}))
+        except protocol.ProtocolError as e:
+            reason = str(e)
+            client.send(protocol.encode_message(
+                {"messageType": ERROR, "data": reason}))
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(client, reason)
+            writer.close()
+
+    def dispatch(self, client, message):
+        """
+        Handles a message from a client. Returns False if the client left.
+        """
+        message_type = message.get("messageType") \
+            if isinstance(message, dict) else None
+        if message_type in (GAME_STATE, GAME_FINISHED):
+            if client.room is None or not client.room.started:
+                self.reply(client, ERROR, "Not in a game")
+            else:
+                self.stats["relayed"] += client.room.relay(client, message)
+        elif message_type == CLIENT_LIST:
+            room = client.room
+            clients = [] if room is None else room.clients
+            self.reply(client, CLIENT_LIST,
+                       [other.describe(clients[0]) for other in clients])
+        elif message_type == CLIENT_INFO:
+            data = message.get("data")
+            client.info = data.get("clientInfo") if isinstance(data, dict) \
+                else None
+            self.reply(client, RESPONSE, {"id": client.id})
+        elif message_type == CONNECT:
+            self.join(client, message.get("data"))
+        elif message_type == DISCONNECT:
+            return False
+        else:
+            self.reply(client, ERROR, f"Unknown message type {message_type!r}")
+        return True
+
+    def reply(self, client, message_type, data):
+        client.send(protocol.encode_message(
+            {"messageType": message_type, "data": data}))
+
+    def join(self, client, data):
+        if client.room is not None:
+            self.reply(client, ERROR, "Already in a game")
+            return
+        data = data if isinstance(data, dict) else {}
+        if client.info is None:
+            client.info = data.get("configuration")
+        client.formats = data.get("formats")
+        for format in self.formats:
+            if client.formats and format in client.formats:
+                client.format = format
+                break
+
+        game = data.get("game", "default")
+        room = self.lobbies.get(game)
+        if room is None:
+            room = self.lobbies[game] = Room(game, self.max_players)
+        room.clients.append(client)
+        client.room = room
+        self.reply(client, RESPONSE, "Waiting for players")
+        if len(room.clients) < room.max_players:
+            return
+
+        del self.lobbies[game]
+        room.started = True
+        self.stats["games"] += 1
+        for other in room.clients:
+            # Clients which did not offer any format get the original reply
+            self.reply(other, CONNECT, "Connected" if other.formats is None
+                       else {"format": other.format})
+
+    def leave(self, client, reason):
+        """
+        Removes a client from the server and its room.
+        """
+        self.clients.pop(client.id, None)
+        room = client.room
+        if room is None:
+            return
+        room.clients.remove(client)
+        client.room = None
+        if not room.started:
+            if not room.clients and self.lobbies.get(room.game) is room:
+                del self.lobbies[room.game]
+            return
+        for other in room.clients:
+            self.reply(other, DISCONNECT, f"Player {client.id} left: {reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT,
+                        help="port to listen on (0: any free port)")
+    parser.add_argument("--max-players", type=int, default=MAX_PLAYERS,
+                        help="players per game")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help="seconds of silence before a client is dropped")
+    args = parser.parse_args()
+
+    async def serve():
+        server = await Server(args.host, args.port, args.max_players,
+                              args.timeout).start()
+        print(f"Listening on {server.host}:{server.port}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            print("Stats:", server.stats, flush=True)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
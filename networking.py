@@ -1,107 +1,75 @@
 import pygame
-import animation.constants as c
-import json
-from struct import pack, unpack
-import select
-from animation.shared_objects import SharedObjects
+import asyncio
+import weakref
 import time
-import threading
-import socket
 import sys
-from cardgame.cards import Card, Deck, Hand, ComplexEncoder
+from network.client import ThreadedClient, NetworkError
+from network.protocol import FrameDecoder, encode_frame
 
 
 players = None #list of players
-playersDone = False #specifies when the other thread has finished fetching client data
+playersDone = False #specifies when the client list has been fetched
 PID = None        #personal ID for this client
-threadStop=False  #inter-thread message to stop when the game is being closed
+threadStop=False  #set once the connection has been closed
 servConnect=None
 turnDir=1 #0:left, 1:right
+CLIENT = None #network.client.ThreadedClient connected to the server
 
 HOST = '169.254.227.222' #hardcoded host and port for now
 PORT = 8000
+LOOP = None #event loop shared by several clients in one process (load tests);
+            #by default the client runs its own
 
-#provided receive function
+#frame decoders of the sockets read with recv_json; messages which arrived in
+#the same read as the one returned stay buffered for the next call
+DECODERS = weakref.WeakKeyDictionary()
+
+#provided receive function: returns the next message from a blocking socket,
+#however the frames are split or merged by the network
 def recv_json(server_socket):
-    header = server_socket.recv(8)   
-    size = unpack('<I', header[4:8])[0]
-    if not(header.startswith(b"JSON")):
-        raise "Invalid JSON format (Missive)"
-    if size < 0 or size > 1024 * 1024:
-        raise "Incoming JSON is too large: " + str(size)
-    # read incoming size from socket, then remove the trailing newline
-    body = server_socket.recv(size)[:-1]
-    # parse into json
-    return json.loads(body)
+    decoder = DECODERS.get(server_socket)
+    if decoder is None:
+        decoder = DECODERS[server_socket] = FrameDecoder()
+    return decoder.receive(server_socket)
 
 #provided send function
 def send_json(server_socket, msg_payload):
-    if msg_payload[-1] != "\n":
-        msg_payload += "\n"
-    prefix = "JSON".encode("utf-8")
-    size = pack("<I", len(msg_payload))
-    message = msg_payload.encode("utf-8")    
-    server_socket.sendall(prefix + size + message)
+    send_json_norec(server_socket, msg_payload)
     return recv_json(server_socket)
 
-#provided send function, except it does not read immediately after sending
+#provided send function, except it does not read immediately after sending;
+#the header and body go out in a single sendall
 def send_json_norec(server_socket, msg_payload):
-    if msg_payload[-1] != "\n":
-        msg_payload += "\n"
-    prefix = "JSON".encode("utf-8")    
-    size = pack("<I", len(msg_payload))    
-    message = msg_payload.encode("utf-8")
-    server_socket.sendall(prefix + size + message)
-    return
+    server_socket.sendall(encode_frame(msg_payload.encode("utf-8")))
     
     
 #used for the initial turn order sending        
 def turnSend(turn, turnOrder, deck):
-  global serv   
-  
-  turnInfo = json.dumps({
+  CLIENT.send({
         "messageType": "game-state",
         "data": {
             "state": {
                 "turn": turn,
                 "order": turnOrder,
-                "deck": deck
+                "deck": deck.toDict()
             }
         }
-  }, cls=ComplexEncoder)
-  #print(turnInfo)
-  send_json_norec(serv, turnInfo)
+  })
 
 #used for the initial turn order sending  
 def turnRec():
-  global serv  
+  """
+  Waits for the turn order message and returns it, or None if the server
+  disconnects.
+  """
   while True:
-    ready_to_read, ready_to_write, in_error = \
-     select.select(
-        [serv],
-        [],
-        [],
-        1)
-    if len(ready_to_read)==1:
-      break              
-  turnInfo = recv_json(serv)
-  while turnInfo.get('messageType') != 'game-state':
-        if turnInfo.get('messageType') == 'error':
-            raise Exception(json_response.get('data'))
-        if turnInfo.get('messageType') == 'disconnect':
-            return
-        else:            
-            while True:
-              ready_to_read, ready_to_write, in_error = \
-               select.select(
-                  [serv],
-                  [],
-                  [],
-                  1)
-              if len(ready_to_read)==1:
-                break              
-            turnInfo = recv_json(serv)
-  return turnInfo
+    turnInfo = CLIENT.wait_message()
+    if turnInfo.get('messageType') == 'game-state':
+      return turnInfo
+    if turnInfo.get('messageType') == 'error':
+      raise NetworkError(turnInfo.get('data'))
+    if turnInfo.get('messageType') == 'disconnect':
+      return None
 
   
 #returns the next player whose turn it should be
@@ -131,30 +99,24 @@ def getNextPlayer(id, turnOrder, cardValue):
   
 #check for messages from the current player  
 def checkMoves():
-  global serv   
+  """
+  Returns the next game message received from the server, or None. Never
+  blocks: messages are read in the background by CLIENT.
+  """
   global turnDir
-  global PID
-  try:
-    ready_to_read, ready_to_write, in_error =\
-                  select.select(
-                    [serv],
-                    [],
-                    [],
-                    0)
-    if len(ready_to_read)==1:
-      message = recv_json(serv)    
-      if message.get('messageType') in ("game-state", "disconnect", "error", "game-finished"):
-        print("network checkMove: ",message)
-        if message.get('messageType')=="game-state" and message["data"]["state"]["sender"]!=PID:
-          if message["data"]["state"]["reverseOrder"]==True:
-            if turnDir==1:
-              turnDir=-1
-            else:
-              turnDir=1
-        return message                            
-    return None
-  except Exception:
-    return None
+  message = CLIENT.get_message()
+  while message is not None:
+    if message.get('messageType') in ("game-state", "disconnect", "error", "game-finished"):
+      print("network checkMove: ",message)
+      if message.get('messageType')=="game-state" and message["data"]["state"].get("sender")!=PID:
+        if message["data"]["state"].get("reverseOrder")==True:
+          if turnDir==1:
+            turnDir=-1
+          else:
+            turnDir=1
+      return message
+    message = CLIENT.get_message()
+  return None
   
 #send move to other players  
 def sendMove(source,destination,color,value,cardID,nextPlayer):
@@ -167,8 +129,7 @@ def sendMove(source,destination,color,value,cardID,nextPlayer):
   value: string
   nextPlayer: integer specifying player id
   """
-  global serv, PID  
-  move = json.dumps({
+  CLIENT.send({
         "messageType": "game-state",
         "data": {
             "state": {
@@ -183,121 +144,41 @@ def sendMove(source,destination,color,value,cardID,nextPlayer):
             }
         }
   })
-  send_json_norec(serv, move)
   
   
   
-#separate thread function, used to connect clients and maintain connection  
+#joins the game, waits until it is full and fetches the client list (the
+#client keeps the connection alive in the background, while waiting too);
+#playersDone stays False if the server refused, disconnected or timed out
 def serverConnect(screenNameInput):
     global players
     global playersDone
     global PID
-    global threadStop   
-    global serv
-    id = screenNameInput
-    
-    data = json.dumps({
-        "messageType": "connect",
-        "data": {
-            "game": "default",
-            "clientType": "client",
-            "configuration": {
-                "id": id,
-            }
-        }
-    })
-    send_json_norec(serv, data)
-    while True: 
-      ready_to_read, ready_to_write, in_error = \
-               select.select( #this prevents the program from crashing if a connecting client disconnects before game is made
-                  [serv],
-                  [],
-                  [],
-                  1)      
-      if threadStop:
-        return
-      if len(ready_to_read)==1:        
-        break      
-    json_response = recv_json(serv)
-    while json_response.get('messageType') != 'connect':
-        if json_response.get('messageType') == 'error':
-            raise Exception(json_response.get('data'))
-        if json_response.get('messageType') == 'disconnect':
-            return
-        elif json_response.get('messageType') == 'response':
-            print("Message:", json_response.get('data'))
-            while True:
-              ready_to_read, ready_to_write, in_error = \
-               select.select(
-                  [serv],
-                  [],
-                  [],
-                  1)
-              if threadStop:
-                return
-              if len(ready_to_read)==1:
-                break              
-            json_response = recv_json(serv)
-
-    print('Connect:', json_response.get('data'))
-    
-    print('Telling the game server I am ready')
-    game_connect_payload = json.dumps({
-        "messageType": "client-info",
-        "data": {
-            "clientInfo": {
-                "id": id
-            }
-        }
-    })
-    whois = send_json(serv, game_connect_payload)
-    print("response", whois)
-    PID = whois.get('data')['id']
+    try:
+      CLIENT.connect(screenNameInput)
+    except (NetworkError, asyncio.TimeoutError) as e:
+      print("Could not join the game:", e)
+      return
+    PID = CLIENT.id
     print("I am ",PID)
-    time.sleep(3) #wait a while to ensure all clients have connected before requesting client list
-    data = json.dumps({
-    "messageType": "client-list"
-    })
-    send_json_norec(serv, data)
-    time.sleep(.5) 
-    players = recv_json(serv) #keep reading until client list is found
-    while players.get('messageType') != 'client-list':
-        if players.get('messageType') == 'error':
-            raise Exception(players.get('data'))   
-        if players.get('messageType') == 'disconnect':
-            return            #kill thread
-        print("Message:", players)
-        players = recv_json(serv)
+    players = CLIENT.players
     playersDone=True      #client list has been read
 
 
 
-    while not threadStop:  #maintain connection by requesting client list every 3 seconds
-      data = json.dumps({  #to avoid timeout
-      "messageType": "client-list"
-      })
-      if (serv!=None):
-        send_json_norec(serv, data)
-      time.sleep(3)
-     
-
-
 #initial function for establishing connection to server
 def connect():
     global servConnect
-    global players
-    global playersDone
-    global PID
-    global threadStop    
-    global serv        
+    global CLIENT
     
-    tries=3 #try three times to bind to the matchmaking server
+    tries=3 #try three times to connect to the matchmaking server
     while True:
       try:
-        serv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        serv.connect((HOST, PORT))
+        CLIENT = ThreadedClient(HOST, PORT, loop=LOOP)
+        CLIENT.open()
         break
-      except:
+      except (OSError, asyncio.TimeoutError):
+        CLIENT.close()
         tries-=1
         if tries==0:
           print("Failed to connect to server")
@@ -312,14 +193,18 @@ def connect():
     servConnect=1
     
 
+#closes the connection
+def disconnect():
+    global threadStop
+    threadStop=True
+    if CLIENT is not None:
+      CLIENT.close()
       
       
 def sendEndGame():    
-    global serv
-    endGameMessage = json.dumps({
+    CLIENT.send({
         "messageType": "game-finished"        
     })  
-    send_json_norec(serv, endGameMessage)      
       
       
       
@@ -332,7 +217,7 @@ def sendEndGame():
 def opponentInit():
   o=[]
   #print(players)
-  for thing in players.get('data'):
+  for thing in CLIENT.players.get('data'):
     if type(thing)==dict:
       if thing['id']!=PID:
         #print("ID: ",thing['id'])
@@ -1,6 +1,9 @@
 import pytest
+import io
 import json
-from cardgame.cards import Card, Hand, Deck, ComplexEncoder
+import random
+from cardgame.cards import Card, CardList, Hand, Deck, ComplexEncoder, \
+    dump_json, load_json
 
 
 
@@ -29,6 +32,143 @@ def test_card_reprJSON():
     card = Card(1, "4", "Red")
     assert card.reprJSON() == output
 
+@pytest.mark.parametrize("card1, card2, output",
+[(Card(1, "wild", "wild"), Card(2, "4", "Blue"), True), # Wild plays on anything
+ (Card(1, "wild_draw", "wild"), Card(2, "4", "Blue"), True),
+ (Card(1, "2", "Red"), Card(2, "wild", "wild"), True), # Anything plays on an unchosen wild
+ (Card(1, "2", "Red"), Card(2, "wild", "Blue"), False), # Chosen wild color must match
+ (Card(1, "+2", "Red"), Card(2, "+2", "Blue"), True)] # Names outside the tables
+)
+def test_card_match_special(card1, card2, output):
+    assert card1.match(card2) == output
+
+def test_card_slots():
+    card = Card(1, "4", "Red")
+    with pytest.raises(AttributeError):
+        card.__dict__
+
+def test_card_set_color():
+    card = Card(1, "wild", "wild")
+    card.color = "Green"
+    assert card.color == "Green"
+    assert card.value == "wild"
+    assert Card(2, "3", "Green").match(card)
+    assert not Card(3, "3", "Red").match(card)
+
+def test_card_unknown_names():
+    card = Card(1, "+4", "wild")
+    assert str(card) == "wild +4"
+    assert card.reprJSON() == {"id": 1, "value": "+4", "color": "wild"}
+
+def test_card_encode_decode():
+    card = Card(42, "reverse", "Yellow")
+    number = card.encode()
+    assert type(number) is int
+    assert number & 0xFF == card.code
+    assert Card.decode(number) == card
+
+def test_card_eq():
+    assert Card(1, "4", "Red") == Card(1, "4", "Red")
+    assert Card(1, "4", "Red") != Card(2, "4", "Red")
+    assert Card(1, "4", "Red") != Card(1, "4", "Blue")
+
+def test_card_loadJSON():
+    card = Card().loadJSON('{"id": 7, "value": "skip", "color": "Blue"}')
+    assert card == Card(7, "skip", "Blue")
+
+# Test CardList class
+
+def test_card_list_list_like():
+    cards = [Card(1, "3", "Red"), Card(2, "4", "Blue"), Card(3, "5", "Green")]
+    card_list = CardList(cards)
+    assert len(card_list) == 3
+    assert list(card_list) == cards
+    assert card_list == cards
+    assert card_list[0] == cards[0]
+    assert card_list[1] == cards[1]
+    assert card_list[-1] == cards[-1]
+    assert card_list[:2] == cards[:2]
+    assert cards[1] in card_list
+    assert Card(2, "4", "Red") not in card_list
+
+def test_card_list_remove_keeps_order():
+    cards = [Card(1, "3", "Red"), Card(2, "4", "Blue"), Card(3, "5", "Green")]
+    card_list = CardList(cards)
+    card_list.remove(Card(2, "4", "Blue"))
+    assert card_list == [cards[0], cards[2]]
+    with pytest.raises(ValueError):
+        card_list.remove(cards[1])
+    assert not card_list.discard(cards[1])
+
+def test_card_list_pop():
+    card_list = CardList([Card(1, "3", "Red"), Card(2, "4", "Blue")])
+    assert card_list.pop() == Card(2, "4", "Blue")
+    assert card_list.pop() == Card(1, "3", "Red")
+    with pytest.raises(IndexError):
+        card_list.pop()
+
+def test_card_list_duplicate_id():
+    with pytest.raises(ValueError):
+        CardList([Card(1, "3", "Red"), Card(1, "4", "Blue"), Card(2, "5", "Red")])
+    card_list = CardList([Card(1, "3", "Red")])
+    with pytest.raises(ValueError):
+        card_list.append(Card(1, "3", "Red"))
+
+def test_card_list_get():
+    card = Card(7, "skip", "Blue")
+    card_list = CardList([card])
+    assert card_list.get(7) is card
+    assert card_list.get(8) is None
+
+def test_card_list_get_ids():
+    card_list = CardList([Card(5, "3", "Red"), Card(2, "4", "Blue")])
+    assert card_list.get_ids().tolist() == [5, 2]
+
+def test_card_list_shuffle():
+    cards = [Card(i, "1", "Red") for i in range(50)]
+    card_list = CardList(cards)
+    card_list.shuffle()
+    assert sorted(card.id for card in card_list) == list(range(50))
+    assert card_list.get(10) is cards[10]
+
+def test_card_list_swap():
+    first = CardList([Card(1, "3", "Red")])
+    second = CardList()
+    first.swap(second)
+    assert len(first) == 0
+    assert second == [Card(1, "3", "Red")]
+
+def test_card_list_snapshot_restore():
+    cards = [Card(i, "wild", "wild") for i in range(5)]
+    card_list = CardList(cards)
+    snapshot = card_list.snapshot()
+    card_list.pop()
+    cards[0].color = "Blue"
+
+    card_list.restore(snapshot, {card.id: card for card in cards})
+    assert card_list == [Card(i, "wild", "wild") for i in range(5)]
+    assert card_list.get(0) is cards[0]
+
+    copy = CardList()
+    copy.restore(snapshot)
+    assert copy == card_list
+    assert copy.get(0) is not cards[0]
+
+# Test Hand class
+
+def test_hand_discard():
+    deck = Deck(Deck())
+    cards = [Card(1, "3", "Red"), Card(2, "4", "Blue"), Card(3, "5", "Green")]
+    hand = Hand(deck, list(cards))
+    hand.discard([cards[1]])
+    assert hand.cards == [cards[0], cards[2]]
+    assert deck.getDiscard() == cards[1]
+
+def test_hand_getCard():
+    hand = Hand(Deck(), [Card(1, "3", "Red"), Card(2, "4", "Blue")])
+    assert hand.getCard(2) == Card(2, "4", "Blue")
+    assert hand.getCard(3) is None
+
 # Test Deck class
 @pytest.fixture
 def test_deck_setup():
@@ -81,6 +221,14 @@ def test_deck_draw_excess_reshuffle():
     drawn_cards = deck.draw(3)
     assert len(drawn_cards) == 3
 
+def test_deck_draw_reshuffle_keeps_top_discard():
+    discardDeck = Deck(None, [Card(1, "3", "Red"), Card(2, "4", "Blue"), Card(5, "7", "Red")])
+    deck = Deck(discardDeck, [])
+    drawn_cards = deck.draw(2)
+    assert sorted(card.id for card in drawn_cards) == [1, 2]
+    assert discardDeck.cards == [Card(5, "7", "Red")]
+    assert len(deck) == 0
+
 def test_deck_draw_excess_no_discard():
     cards = [Card(3, "5", "Yellow"), Card(4, "6", "Green")]
     deck = Deck(None, cards)
@@ -95,6 +243,22 @@ def test_deck_shuffle(test_deck_setup):
     new5cards = test_deck_setup.cards[:5]
     assert old5cards != new5cards
 
+def test_deck_shuffle_rng():
+    def shuffled(seed):
+        deck = Deck(None, [Card(i, "1", "Red") for i in range(20)],
+                    rng=random.Random(seed))
+        deck.shuffle()
+        return [card.id for card in deck.cards]
+    assert shuffled(1) == shuffled(1)
+    assert shuffled(1) != shuffled(2)
+
+def test_deck_snapshot_restore(test_deck_setup):
+    snapshot = test_deck_setup.snapshot()
+    cards = list(test_deck_setup.cards)
+    test_deck_setup.draw(2)
+    test_deck_setup.restore(snapshot)
+    assert test_deck_setup.cards == cards
+
 def test_deck_discard(test_deck_setup):
     topcard = test_deck_setup.cards[-1]
     test_deck_setup.discard(test_deck_setup.draw(1))
@@ -152,6 +316,50 @@ def test_deck_json_dump_load():
     deck2 = Deck()
     deck2.loadJSON(string)
     assert deck.cards == deck2.cards
+
+def test_deck_toDict():
+    discardDeck = Deck(None, [Card(1, "3", "Red"), Card(2, "4", "Blue")])
+    deck = Deck(discardDeck, [Card(3, "5", "Yellow"), Card(4, "+4", "wild")])
+    assert json.dumps(deck.toDict()) == \
+        json.dumps(deck.reprJSON(), cls=ComplexEncoder)
+    assert Deck(None, [Card(5, "1", "Red")]).toDict() == \
+        dict(discardDeck=None, cards=[dict(id=5, value="1", color="Red")])
+
+def test_deck_loadDict():
+    data = dict(discardDeck=dict(discardDeck=None, cards=[
+        dict(id=1, value="3", color="Red")]), cards=[
+        dict(id=3, value="+2", color="Yellow"), dict(id=4, value="6", color="Green")])
+    deck = Deck().loadDict(data)
+    assert deck.cards == [Card(3, "+2", "Yellow"), Card(4, "6", "Green")]
+    assert deck.discardDeck.cards == [Card(1, "3", "Red")]
+    assert deck.toDict() == data
+
+def test_deck_loadDict_duplicate_id():
+    data = dict(discardDeck=None, cards=[dict(id=3, value="2", color="Red")] * 2)
+    with pytest.raises(ValueError):
+        Deck().loadDict(data)
+
+def test_hand_json_dump_load():
+    deck = Deck(Deck(None, [Card(1, "3", "Red")]), [Card(2, "4", "Blue")])
+    hand = Hand(deck, [Card(3, "wild", "Green"), Card(4, "9", "Red")])
+    string = json.dumps(hand.reprJSON(), cls=ComplexEncoder)
+
+    loaded = Hand(Deck()).loadJSON(string)
+    assert loaded.cards == hand.cards
+    assert loaded.deck.cards == deck.cards
+    assert loaded.deck.discardDeck.cards == deck.discardDeck.cards
+
+def test_dump_load_json_stream():
+    cards = [Card(i, str(i % 10), "Blue") for i in range(100)]
+    deck = Deck(Deck(None, cards[:70]), cards[70:])
+    f = io.StringIO()
+    dump_json(deck, f)
+    assert f.getvalue() == json.dumps(deck.reprJSON(), cls=ComplexEncoder)
+
+    f.seek(0)
+    loaded = load_json(Deck(), f)
+    assert loaded.cards == deck.cards
+    assert loaded.discardDeck.cards == deck.discardDeck.cards
 '''
 class Deck:
     def __init__(self, discard: 'Deck' = None, cards=None):
@@ -0,0 +1,95 @@
+import random
+import pytest
+from cardgame.cards import Deck
+from cardgame.simulation import generate_uno_cards
+from network import compact, protocol
+
+
+def move(**state):
+    message = {"messageType": "game-state", "data": {"state": {
+        "source": "deck", "dest": 7, "color": "Red", "value": "5",
+        "cardID": 3, "reverseOrder": False, "nextPlayer": 8, "sender": 7}}}
+    message["data"]["state"].update(state)
+    return message
+
+def setup():
+    deck = Deck(discard=Deck(), cards=generate_uno_cards(),
+                rng=random.Random(1))
+    deck.shuffle()
+    deck.discard(deck.draw(3))
+    return {"messageType": "game-state", "data": {"state": {
+        "turn": 7, "order": [7, 8, 9], "deck": deck.toDict()}}}
+
+def transfer(sender, receiver, message):
+    frame = sender.encode(message)
+    assert frame[:4] == protocol.BINARY_MAGIC
+    decoder = protocol.FrameDecoder(codec=receiver)
+    decoder.feed(frame)
+    [decoded] = decoder.messages()
+    assert decoded == message
+    return frame
+
+
+def test_move_round_trip():
+    sender, receiver = compact.Codec(), compact.Codec()
+    for message in (move(), move(source=9, dest="discard", cardID=None),
+                    move(color="wild", value="wild_draw", nextPlayer=None),
+                    move(value="reverse", dest="discard", reverseOrder=True)):
+        frame = transfer(sender, receiver, message)
+        assert len(frame) < len(protocol.encode_message(message)) / 4
+
+def test_setup_round_trip():
+    sender, receiver = compact.Codec(), compact.Codec()
+    message = setup()
+    frame = transfer(sender, receiver, message)
+    assert len(frame) < len(protocol.encode_message(message)) / 10
+    assert receiver.received_epoch == sender.sent_epoch
+
+def test_moves_are_deltas_against_the_snapshot():
+    sender, receiver = compact.Codec(), compact.Codec()
+    message = setup()
+    transfer(sender, receiver, message)
+    card = message["data"]["state"]["deck"]["cards"][0]
+    played = move(cardID=card["id"], color=card["color"], value=card["value"])
+    frame = transfer(sender, receiver, played)
+    # The card's code is left out, but not when it changed
+    assert len(frame) == protocol.HEADER.size + compact.MOVE_HEADER.size
+    color = "Red" if card["color"] == "Blue" else "Blue"
+    frame = transfer(sender, receiver, move(cardID=card["id"], color=color,
+                                            value=card["value"]))
+    assert len(frame) == protocol.HEADER.size + compact.MOVE_HEADER.size + 1
+
+    # A receiver without the snapshot cannot decode the delta
+    decoder = protocol.FrameDecoder(codec=compact.Codec())
+    decoder.feed(sender.encode(played))
+    with pytest.raises(protocol.ProtocolError):
+        decoder.messages()
+
+def test_json_fallback():
+    codec = compact.Codec()
+    for message in ({"messageType": "game-finished"},
+                    {"messageType": "client-list"},
+                    {"messageType": "game-state", "data": {"state": {
+                        "sender": 8, "reverseOrder": True}}},
+                    move(extra=1),
+                    move(source="hand"),
+                    move(dest=-4),
+                    move(cardID=1 << 20),
+                    move(color=["Red"]),
+                    move(value="+4"),
+                    move(reverseOrder=1)):
+        assert codec.encode(message) is None
+
+def test_invalid_binary_frames():
+    decoder = protocol.FrameDecoder(codec=compact.Codec())
+    for body in (b"", bytes([9]), bytes([compact.MOVE, 2]),
+                 compact.Codec().encode(setup())[protocol.HEADER.size:-5]):
+        decoder.feed(protocol.encode_frame(bytes(body), protocol.BINARY_MAGIC))
+        with pytest.raises(protocol.ProtocolError):
+            decoder.messages()
+        decoder = protocol.FrameDecoder(codec=compact.Codec())
+    # Binary frames are rejected without a codec
+    decoder = protocol.FrameDecoder()
+    decoder.feed(compact.Codec().encode(move()))
+    with pytest.raises(protocol.ProtocolError):
+        decoder.messages()
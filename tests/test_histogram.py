@@ -0,0 +1,46 @@
+import math
+import random
+import pytest
+from benchmarks.histogram import Histogram
+
+
+def test_percentiles_within_precision():
+    rng = random.Random(3)
+    values = sorted(int(rng.lognormvariate(8, 2)) for _ in range(20000))
+    histogram = Histogram(digits=2)
+    for value in values:
+        histogram.record(value)
+    for p in (1, 50, 90, 99, 99.9):
+        exact = values[math.ceil(p / 100 * len(values)) - 1]
+        assert abs(histogram.percentile(p) - exact) <= exact / 100 + 1
+    assert histogram.percentile(100) == histogram.max == values[-1]
+    assert histogram.min == values[0]
+    assert histogram.mean() == pytest.approx(sum(values) / len(values))
+
+def test_small_values_are_exact():
+    histogram = Histogram(digits=3)
+    for value in range(1000):
+        histogram.record(value)
+    assert [histogram.percentile(p) for p in (10, 50, 100)] == [99, 499, 999]
+
+def test_overflow_and_empty():
+    histogram = Histogram(highest=1000)
+    assert histogram.percentile(50) == 0
+    assert histogram.get_summary()["count"] == 0
+    histogram.record(5000)
+    assert histogram.overflows == 1 and histogram.max == 1000
+    with pytest.raises(ValueError):
+        histogram.record(-1)
+
+def test_merge_and_to_dict():
+    a, b = Histogram(), Histogram()
+    a.record_seconds(0.001, count=3)
+    b.record_seconds(0.5)
+    a.merge(b)
+    data = a.to_dict()
+    assert data["count"] == 4 and data["unit"] == "us"
+    assert data["min"] == 1000 and data["max"] == 500000
+    assert sum(count for value, count in data["buckets"]) == 4
+    assert data["p50"] == pytest.approx(1000, rel=0.01)
+    with pytest.raises(ValueError):
+        a.merge(Histogram(digits=3))
@@ -0,0 +1,55 @@
+import numpy as np
+from cardgame.cards import Card
+from cardgame.moves import PAD, encode_hand, encode_hands, encode_tops, \
+    get_legal_cards, legal_mask, legal_masks, count_legal
+from cardgame.simulation import Game, RandomPolicy, generate_uno_cards
+
+
+def test_get_legal_cards_same_as_match():
+    cards = generate_uno_cards()
+    for top in cards + [Card(200, "wild", "Blue")]:
+        assert get_legal_cards(cards, top) == \
+            [card for card in cards if card.match(top)]
+
+def test_legal_mask():
+    hand = [Card(0, "5", "Red"), Card(1, "2", "Green"), Card(2, "wild", "wild")]
+    top = Card(3, "5", "Blue")
+    assert legal_mask(encode_hand(hand), top.code).tolist() == \
+        [True, False, True]
+
+def test_encode_hands_padding():
+    hands = [[Card(0, "5", "Red")], [], [Card(1, "2", "Green")] * 3]
+    codes = encode_hands(hands)
+    assert codes.shape == (3, 3)
+    assert codes.dtype == np.uint8
+    assert codes[0, 0] == hands[0][0].code
+    assert (codes[0, 1:] == PAD).all() and (codes[1] == PAD).all()
+    assert encode_hands(hands, width=5).shape == (3, 5)
+
+def test_legal_masks_batch():
+    games = [Game([RandomPolicy(), RandomPolicy()], seed=seed)
+             for seed in range(50)]
+    for game in games:
+        for _ in range(game.rng.randrange(10)):
+            game.step()
+    hands = [game.players[game.current].hand.cards for game in games]
+    tops = [game.get_top_card() for game in games]
+
+    masks = legal_masks(encode_hands(hands), encode_tops(tops))
+    for mask, hand, top in zip(masks, hands, tops):
+        assert mask[:len(hand)].tolist() == [card.match(top) for card in hand]
+        assert not mask[len(hand):].any()
+    assert count_legal(encode_hands(hands), encode_tops(tops)).tolist() == \
+        [len(get_legal_cards(hand, top)) for hand, top in zip(hands, tops)]
+
+def test_legal_masks_shared_top():
+    hands = [[Card(0, "5", "Red")], [Card(1, "2", "Green"), Card(2, "7", "Red")]]
+    top = Card(3, "9", "Red")
+    assert legal_masks(encode_hands(hands), top.code).tolist() == \
+        [[True, False], [False, True]]
+
+def test_padding_never_legal_on_wild():
+    hands = [[Card(0, "5", "Red")], []]
+    top = Card(1, "wild", "wild")
+    assert legal_masks(encode_hands(hands), top.code).tolist() == \
+        [[True], [False]]
@@ -0,0 +1,330 @@
+import asyncio
+import socket
+import threading
+import time
+import pytest
+from network import compact, protocol
+from network.client import Client, ThreadedClient, NetworkError, Disconnected
+
+
+class FakeServer:
+    """
+    Answers the handshake like the matchmaking server and records what the
+    clients send.
+    """
+    def __init__(self, refuse=False, format=None):
+        self.refuse = refuse
+        # Format picked for the clients which offer it (None: the server does
+        # not know the formats, like the matchmaking server)
+        self.format = format
+        self.received = []
+        self.writers = []
+        self.codecs = {}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def handle(self, reader, writer):
+        self.writers.append(writer)
+        codec = self.codecs[writer] = compact.Codec()
+        decoder = protocol.FrameDecoder(codec=codec)
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            decoder.feed(data)
+            for message in decoder.messages():
+                self.dispatch(writer, message)
+
+    def dispatch(self, writer, message):
+        self.received.append(message)
+        message_type = message.get("messageType")
+        if message_type == "connect":
+            if self.refuse:
+                self.send(writer, {"messageType": "error",
+                                   "data": "Game is full"})
+                return
+            self.send(writer, {"messageType": "response", "data": "Waiting"})
+            if self.format in message["data"].get("formats", ()):
+                self.send(writer, {"messageType": "connect",
+                                   "data": {"format": self.format}})
+            else:
+                self.send(writer, {"messageType": "connect",
+                                   "data": "Connected"})
+        elif message_type == "client-info":
+            self.send(writer, {"messageType": "response", "data": {"id": 7}})
+        elif message_type == "client-list":
+            self.send(writer, {"messageType": "client-list",
+                               "data": [{"id": 7}, {"id": 8}]})
+
+    def send(self, writer, message):
+        frame = None
+        if self.format == compact.COMPACT:
+            frame = self.codecs[writer].encode(message)
+        writer.write(frame or protocol.encode_message(message))
+
+    def broadcast(self, message):
+        for writer in self.writers:
+            self.send(writer, message)
+
+    async def close(self):
+        for writer in self.writers:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+
+def test_protocol_round_trip():
+    frame = protocol.encode_message({"messageType": "connect", "data": [1, 2]})
+    assert frame[:4] == b"JSON"
+    size = protocol.parse_header(frame[:protocol.HEADER.size])
+    assert size == len(frame) - protocol.HEADER.size
+    assert frame.endswith(b"\n")
+    assert protocol.decode_body(frame[protocol.HEADER.size:]) == \
+        {"messageType": "connect", "data": [1, 2]}
+
+def test_protocol_invalid_frames():
+    with pytest.raises(protocol.ProtocolError):
+        protocol.parse_header(b"XML!" + bytes(4))
+    with pytest.raises(protocol.ProtocolError):
+        protocol.parse_header(protocol.HEADER.pack(b"JSON", 10 ** 9))
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_body(b"{not json\n")
+
+def test_encode_frame_adds_newline_once():
+    assert protocol.encode_frame(b"{}") == protocol.encode_frame(b"{}\n") == \
+        protocol.HEADER.pack(b"JSON", 3) + b"{}\n"
+
+def test_decoder_partial_and_merged_frames():
+    messages = [{"messageType": "game-state", "data": {"n": i}} for i in range(20)]
+    stream = b"".join(protocol.encode_message(m) for m in messages)
+    # Byte by byte, then in uneven pieces spanning several frames
+    for step in (1, 7, 100, len(stream)):
+        decoder = protocol.FrameDecoder(size=64)
+        decoded = []
+        for i in range(0, len(stream), step):
+            decoder.feed(stream[i:i + step])
+            decoded.extend(decoder.messages())
+        assert decoded == messages
+        assert len(decoder) == 0
+
+def test_decoder_large_frame():
+    message = {"messageType": "game-state", "data": "x" * 200000}
+    decoder = protocol.FrameDecoder(size=1024)
+    frame = protocol.encode_message(message)
+    decoder.feed(frame[:10])
+    assert decoder.next_message() is None
+    decoder.feed(frame[10:])
+    assert decoder.messages() == [message]
+
+def test_decoder_invalid_frame():
+    decoder = protocol.FrameDecoder()
+    decoder.feed(b"XML!" + bytes(8))
+    with pytest.raises(protocol.ProtocolError):
+        decoder.messages()
+
+def test_decoder_socket():
+    left, right = socket.socketpair()
+    with left, right:
+        decoder = protocol.FrameDecoder(size=16)
+        frame = protocol.encode_message({"messageType": "connect"})
+        # A frame split across two sends and two frames in one send
+        right.sendall(frame[:5])
+        right.sendall(frame[5:] + frame + frame)
+        assert [decoder.receive(left) for _ in range(3)] == \
+            [{"messageType": "connect"}] * 3
+        right.close()
+        with pytest.raises(ConnectionError):
+            decoder.receive(left)
+
+def test_legacy_json_functions():
+    import networking
+    left, right = socket.socketpair()
+    with left, right:
+        networking.send_json_norec(right, '{"messageType": "response"}')
+        protocol.send_message(right, {"messageType": "connect"})
+        # Both frames may arrive in one read; the second stays buffered
+        assert networking.recv_json(left) == {"messageType": "response"}
+        assert networking.recv_json(left) == {"messageType": "connect"}
+
+def test_client_connect():
+    async def scenario():
+        server = await FakeServer().start()
+        client = Client("127.0.0.1", server.port)
+        start = time.perf_counter()
+        await client.connect("Alice")
+        elapsed = time.perf_counter() - start
+        assert client.id == 7
+        assert client.players["data"] == [{"id": 7}, {"id": 8}]
+        assert [m["messageType"] for m in server.received] == \
+            ["connect", "client-info", "client-list"]
+        assert server.received[0]["data"]["configuration"]["id"] == "Alice"
+        # The waiting message nobody asked for is queued
+        assert client.poll() == [{"messageType": "response", "data": "Waiting"}]
+        await client.close()
+        await server.close()
+        return elapsed
+    assert run(scenario()) < 1
+
+def test_client_queues_messages():
+    async def scenario():
+        server = await FakeServer().start()
+        client = Client("127.0.0.1", server.port)
+        await client.connect("Bob")
+        client.poll()
+        assert client.get_message() is None
+
+        server.broadcast({"messageType": "game-state", "data": {"state": 1}})
+        server.broadcast({"messageType": "game-finished"})
+        assert (await client.receive())["data"] == {"state": 1}
+        assert (await client.receive())["messageType"] == "game-finished"
+        assert client.get_message() is None
+
+        await client.send({"messageType": "game-state", "data": {"state": 2}})
+        await asyncio.sleep(0.05)
+        assert server.received[-1]["data"] == {"state": 2}
+        await client.close()
+        await server.close()
+    run(scenario())
+
+def test_client_compact_format():
+    move = {"messageType": "game-state", "data": {"state": {
+        "source": 7, "dest": "discard", "color": "Red", "value": "reverse",
+        "cardID": 12, "reverseOrder": True, "nextPlayer": 8, "sender": 7}}}
+
+    async def scenario(server_format, formats):
+        server = await FakeServer(format=server_format).start()
+        client = Client("127.0.0.1", server.port, formats=formats)
+        await client.connect("Bob")
+        client.poll()
+        await client.send(move)
+        server.broadcast(move)
+        assert await client.receive() == move
+        await asyncio.sleep(0.05)
+        assert server.received[-1] == move
+        await client.close()
+        await server.close()
+        return client.format
+    assert run(scenario("compact", compact.FORMATS)) == "compact"
+    # Either side not knowing the format falls back to JSON
+    assert run(scenario(None, compact.FORMATS)) == "json"
+    assert run(scenario("compact", ["json"])) == "json"
+
+def test_client_refused():
+    async def scenario():
+        server = await FakeServer(refuse=True).start()
+        client = Client("127.0.0.1", server.port)
+        with pytest.raises(NetworkError):
+            await client.connect("Carol")
+        await client.close()
+        await server.close()
+    run(scenario())
+
+def test_client_keepalive():
+    async def scenario():
+        server = await FakeServer().start()
+        client = Client("127.0.0.1", server.port, keepalive_interval=0.05)
+        await client.connect("Dave")
+        await asyncio.sleep(0.3)
+        requests = [m for m in server.received
+                    if m["messageType"] == "client-list"]
+        assert len(requests) >= 3
+        # Keepalive replies update players but are not queued
+        assert all(m["messageType"] != "client-list" for m in client.poll())
+        await client.close()
+        await server.close()
+    run(scenario())
+
+def test_client_server_closes():
+    async def scenario():
+        server = await FakeServer().start()
+        client = Client("127.0.0.1", server.port)
+        await client.connect("Erin")
+        client.poll()
+        await server.close()
+        assert (await client.receive())["messageType"] == "disconnect"
+        assert client.closed
+        with pytest.raises(Disconnected):
+            await client.send({"messageType": "client-list"})
+        await client.close()
+    run(scenario())
+
+def test_server_connect_refused(monkeypatch):
+    import networking
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(FakeServer(refuse=True).start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        monkeypatch.setattr(networking, "HOST", "127.0.0.1")
+        monkeypatch.setattr(networking, "PORT", server.port)
+        for name in ("CLIENT", "servConnect", "playersDone"):
+            monkeypatch.setattr(networking, name, getattr(networking, name))
+        networking.connect()
+        assert networking.servConnect == 1
+        networking.serverConnect("Grace")
+        assert not networking.playersDone
+        networking.disconnect()
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+def test_threaded_client():
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(FakeServer().start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        client = ThreadedClient("127.0.0.1", server.port)
+        client.connect("Frank")
+        assert client.id == 7
+        client.poll()
+        assert client.get_message() is None
+
+        loop.call_soon_threadsafe(server.broadcast, {"messageType": "game-state"})
+        assert client.wait_message(timeout=5) == {"messageType": "game-state"}
+        client.send({"messageType": "game-finished"}).result(5)
+        client.close()
+        assert not client.thread.is_alive()
+        # Sending after the client's loop was closed does not raise
+        with pytest.raises(Disconnected):
+            client.send({"messageType": "game-finished"}).result(5)
+        assert client.get_message()["messageType"] == "disconnect"
+        assert client.get_message() is None
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+def test_threaded_client_send_errors():
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(FakeServer().start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        client = ThreadedClient("127.0.0.1", server.port, loop=loop)
+        client.connect("Heidi")
+        client.poll()
+        client.close()
+        with pytest.raises(Disconnected):
+            client.send({"messageType": "game-finished"}).result(5)
+        assert client.wait_message(timeout=5)["messageType"] == "disconnect"
+        # Only one disconnect message is queued for the closed connection
+        with pytest.raises(Disconnected):
+            client.send({"messageType": "game-finished"}).result(5)
+        time.sleep(0.1)
+        assert client.get_message() is None
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
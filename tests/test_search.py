@@ -0,0 +1,79 @@
+from cardgame.cards import Card
+from cardgame.search import MonteCarloPolicy, MonteCarloSearch, determinize, \
+    get_moves
+from cardgame.simulation import Game, GreedyPolicy, POLICIES, RandomPolicy
+
+
+def rig(game, hands, top):
+    for player, hand in zip(game.players, hands):
+        player.hand.cards = hand
+    game.discard_deck.cards = [top]
+
+
+def test_get_moves():
+    game = Game([GreedyPolicy()] * 2, seed=0)
+    rig(game, [[Card(0, "5", "Red"), Card(1, "5", "Red"), Card(2, "wild", "wild"),
+                Card(3, "2", "Green")], []], Card(4, "9", "Red"))
+    moves = get_moves(game)
+    assert moves[0] == (0, None)
+    assert [color for card_id, color in moves[1:]] == \
+        ["Red", "Green", "Yellow", "Blue"]
+
+    rig(game, [[Card(3, "2", "Green")], []], Card(4, "9", "Red"))
+    assert get_moves(game) == [(None, None)]
+
+def test_game_clone():
+    game = Game([RandomPolicy(), RandomPolicy()], seed=2)
+    copy = game.clone(seed=1)
+    copy.play()
+    assert game.turns == 0 and game.winner is None
+    assert len(game.deck) + len(game.discard_deck) + \
+        sum(len(player.hand) for player in game.players) == 108
+    assert [card.id for card in game.players[0].hand.cards] != \
+        [card.id for card in copy.players[0].hand.cards]
+
+def test_determinize():
+    game = Game([RandomPolicy()] * 3, seed=4)
+    deal = determinize(game, 1, seed=0)
+    ids = lambda cards: [card.id for card in cards]
+    assert ids(deal.players[1].hand.cards) == ids(game.players[1].hand.cards)
+    assert ids(deal.discard_deck.cards) == ids(game.discard_deck.cards)
+    assert [len(player.hand) for player in deal.players] == [7, 7, 7]
+    assert len(deal.deck) == len(game.deck)
+    assert ids(deal.players[0].hand.cards) != ids(game.players[0].hand.cards)
+    unseen = ids(game.deck.cards) + ids(game.players[0].hand.cards) + \
+        ids(game.players[2].hand.cards)
+    assert sorted(unseen) == sorted(ids(deal.deck.cards) +
+        ids(deal.players[0].hand.cards) + ids(deal.players[2].hand.cards))
+
+def test_search_rollout_budget():
+    game = Game([GreedyPolicy()] * 3, seed=5)
+    search = MonteCarloSearch(time_budget=60, rollouts=6)
+    results = search.evaluate(game, seed=1)
+    assert [move for move, wins, rollouts in results] == get_moves(game)
+    assert all(rollouts == 6 and 0 <= wins <= 6
+               for move, wins, rollouts in results)
+    assert search.evaluate(game, seed=1) == results
+    assert game.turns == 0
+
+def test_search_workers_same_results():
+    game = Game([GreedyPolicy()] * 2, seed=6)
+    single = MonteCarloSearch(time_budget=60, rollouts=10).evaluate(game, seed=3)
+    pooled = MonteCarloSearch(time_budget=60, rollouts=10, workers=2)
+    try:
+        assert pooled.evaluate(game, seed=3) == single
+    finally:
+        pooled.close()
+
+def test_policy_falls_back_without_time():
+    game = Game([MonteCarloPolicy(time_budget=0), GreedyPolicy()], seed=7)
+    assert game.policies[0].search.best_move(game) is None
+    game.play()
+    assert game.winner is not None
+
+def test_policy_plays_games():
+    game = Game([MonteCarloPolicy(time_budget=60, rollouts=2), GreedyPolicy()],
+                seed=8)
+    game.play()
+    assert game.winner is not None
+    assert POLICIES["montecarlo"] is MonteCarloPolicy
@@ -0,0 +1,171 @@
+import asyncio
+import pytest
+from benchmarks import bench_networking, bench_server
+from network import compact
+from network.client import Client, Disconnected
+from network.server import Server
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 10))
+
+async def join(server, count, formats=compact.FORMATS, **kwargs):
+    clients = [Client("127.0.0.1", server.port, formats=formats, **kwargs)
+               for _ in range(count)]
+    await asyncio.gather(*(client.connect(f"P{i}")
+                           for i, client in enumerate(clients)))
+    for client in clients:
+        client.poll()
+    return clients
+
+async def close(server, clients):
+    for client in clients:
+        await client.close()
+    await server.close()
+
+
+def test_matchmaking():
+    async def scenario():
+        server = await Server(port=0, max_players=2).start()
+        clients = await join(server, 4)
+        rooms = {tuple(player["id"] for player in client.players["data"])
+                 for client in clients}
+        assert len(rooms) == 2
+        assert sorted(sum(rooms, ())) == sorted(client.id for client in clients)
+        for client in clients:
+            players = client.players["data"]
+            assert [player["isLobbyLeader"] for player in players] == \
+                [True, False]
+            assert {player["clientInfo"]["id"] for player in players} <= \
+                {"P0", "P1", "P2", "P3"}
+            assert client.format == compact.COMPACT
+        assert server.stats["games"] == 2
+        await close(server, clients)
+    run(scenario())
+
+def test_relay_between_formats():
+    setup = {"messageType": "game-state", "data": {"state": {
+        "turn": 1, "order": [1, 2],
+        "deck": {"discardDeck": None, "cards": [
+            {"id": 5, "value": "7", "color": "Blue"},
+            {"id": 6, "value": "wild", "color": "wild"}]}}}}
+
+    def move(card_id, color, value, sender):
+        return {"messageType": "game-state", "data": {"state": {
+            "source": sender, "dest": "discard", "color": color,
+            "value": value, "cardID": card_id, "reverseOrder": False,
+            "nextPlayer": 3 - sender, "sender": sender}}}
+
+    async def scenario():
+        server = await Server(port=0, max_players=2).start()
+        a = Client("127.0.0.1", server.port, formats=[compact.COMPACT])
+        b = Client("127.0.0.1", server.port, formats=[compact.JSON])
+        await asyncio.gather(a.connect("A"), b.connect("B"))
+        a.poll()
+        b.poll()
+        assert (a.format, b.format) == (compact.COMPACT, compact.JSON)
+        messages = [setup, move(5, "Blue", "7", a.id),
+                    move(6, "Red", "wild", a.id),
+                    {"messageType": "game-finished"}]
+        for message in messages:
+            await a.send(message)
+            assert await b.receive() == message
+            await b.send(message)
+            assert await a.receive() == message
+        await close(server, [a, b])
+    run(scenario())
+
+def test_leaving_disconnects_the_room():
+    async def scenario():
+        server = await Server(port=0, max_players=2).start()
+        a, b = await join(server, 2)
+        await a.close()
+        message = await b.receive()
+        assert message["messageType"] == "disconnect"
+        assert not server.lobbies and list(server.clients) == [b.id]
+        await close(server, [b])
+    run(scenario())
+
+def test_idle_clients_time_out():
+    async def scenario():
+        server = await Server(port=0, max_players=1, timeout=0.2).start()
+        [client] = await join(server, 1, keepalive_interval=60)
+        message = await client.receive()
+        assert message == {"messageType": "disconnect", "data": "Timed out"}
+        await close(server, [client])
+    run(scenario())
+
+def test_waiting_for_the_game_is_not_timed_out():
+    async def scenario():
+        server = await Server(port=0, max_players=2, timeout=0.3).start()
+        a = Client("127.0.0.1", server.port, keepalive_interval=0.05)
+        b = Client("127.0.0.1", server.port, keepalive_interval=0.05)
+        waiting = asyncio.create_task(a.connect("A", timeout=0.2))
+        await asyncio.sleep(0.6)
+        assert not waiting.done()
+        await b.connect("B", timeout=0.2)
+        await waiting
+        assert a.players == b.players
+        await close(server, [a, b])
+    run(scenario())
+
+def test_closing_while_waiting_for_the_game():
+    async def scenario():
+        server = await Server(port=0, max_players=2).start()
+        client = Client("127.0.0.1", server.port)
+        waiting = asyncio.create_task(client.connect("A"))
+        await asyncio.sleep(0.1)
+        await client.close()
+        with pytest.raises(Disconnected):
+            await waiting
+        await asyncio.sleep(0.1)
+        assert not server.lobbies and not server.clients
+        await server.close()
+    run(scenario())
+
+def test_waiting_clients_are_not_timed_out():
+    async def scenario():
+        server = await Server(port=0, max_players=2, timeout=0.2).start()
+        a = Client("127.0.0.1", server.port, keepalive_interval=60)
+        b = Client("127.0.0.1", server.port, keepalive_interval=60)
+        waiting = asyncio.create_task(a.connect("A"))
+        await asyncio.sleep(0.5)
+        await b.connect("B")
+        await waiting
+        a.poll()
+        # Silent once the game started: one of them times out first
+        message = await a.receive()
+        assert message["messageType"] == "disconnect"
+        assert message["data"].endswith("Timed out")
+        await close(server, [a, b])
+    run(scenario())
+
+def test_clients_without_formats():
+    async def scenario():
+        server = await Server(port=0, max_players=1).start()
+        [client] = await join(server, 1, formats=None)
+        assert client.format == compact.JSON
+        await close(server, [client])
+    run(scenario())
+
+def test_load_generator():
+    async def scenario():
+        server = await Server(port=0, max_players=2).start()
+        result = await bench_server.run(4, 2, 10, host="127.0.0.1",
+                                        port=server.port)
+        await server.close()
+        return result
+    result = run(scenario())
+    assert result["error_count"] == 0
+    assert result["games"] == 2 and result["moves"] == 20
+    assert result["histograms"]["move"]["count"] == 20
+
+def test_networking_load_test():
+    result = bench_networking.run(2, 2, 6)
+    assert result["error_count"] == 0 and result["unfinished"] == 0
+    assert result["games_started"] == 2 and result["moves"] == 12
+    histograms = result["histograms"]
+    assert histograms["connect"]["count"] == \
+        histograms["players_done"]["count"] == 4
+    # Every move but the last of each game is answered
+    assert histograms["move_rtt"]["count"] == 10
@@ -0,0 +1,214 @@
+import random
+import subprocess
+import sys
+import pytest
+from cardgame.cards import Card
+from cardgame.simulation import Game, Policy, RandomPolicy, GreedyPolicy, \
+    generate_uno_cards, most_common_color, play_games
+from cardgame.transposition import state_hash
+
+
+class DrawPolicy(Policy):
+    """Never plays a card."""
+    def choose_card(self, game, player, playable):
+        return None
+
+
+class FirstPolicy(Policy):
+    """Plays the first playable card as blue."""
+    def choose_card(self, game, player, playable):
+        return playable[0]
+
+    def choose_color(self, game, player, card):
+        return "Blue"
+
+
+def rig(game, hands, top):
+    """Gives each player the given hand and puts top on the discard pile."""
+    for player, hand in zip(game.players, hands):
+        player.hand.cards = hand
+    game.discard_deck.cards = [top]
+
+
+def count_cards(game):
+    return len(game.deck) + len(game.discard_deck) + \
+        sum(len(player.hand) for player in game.players)
+
+
+def test_no_pygame():
+    code = "import sys, cardgame.simulation; assert 'pygame' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_generate_uno_cards():
+    cards = generate_uno_cards()
+    assert len(cards) == 108
+    assert len(set(card.id for card in cards)) == 108
+    assert sum(card.value == "wild_draw" for card in cards) == 4
+    assert sum(card.color == "Red" for card in cards) == 25
+
+def test_generate_uno_cards_are_new():
+    first = generate_uno_cards()
+    second = generate_uno_cards()
+    first[-1].color = "Blue"
+    assert second[-1].color == "wild"
+
+def test_game_deal():
+    game = Game([RandomPolicy(), RandomPolicy(), RandomPolicy()])
+    assert all(len(player.hand) == 7 for player in game.players)
+    assert len(game.discard_deck) == 1
+    assert count_cards(game) == 108
+
+def test_game_needs_two_players():
+    with pytest.raises(ValueError):
+        Game([RandomPolicy()])
+
+@pytest.mark.parametrize("policies", [
+    [RandomPolicy(), RandomPolicy()],
+    [GreedyPolicy(), RandomPolicy(), RandomPolicy(), GreedyPolicy()]])
+def test_game_play(policies):
+    game = Game(policies)
+    winner = game.play()
+    assert winner is not None
+    assert len(game.players[winner].hand) == 0
+    assert count_cards(game) == 108
+
+def test_game_max_turns():
+    game = Game([DrawPolicy(), DrawPolicy()], max_turns=50)
+    assert game.play() is None
+    assert game.turns == 50
+
+def test_game_skip():
+    game = Game([FirstPolicy()] * 3)
+    rig(game, [[Card(0, "skip", "Red"), Card(1, "2", "Red")], [], []],
+        Card(2, "5", "Red"))
+    game.step()
+    assert game.current == 2
+
+def test_game_reverse():
+    game = Game([FirstPolicy()] * 3)
+    rig(game, [[Card(0, "reverse", "Red"), Card(1, "2", "Red")], [], []],
+        Card(2, "5", "Red"))
+    game.step()
+    assert game.direction == -1
+    assert game.current == 2
+
+def test_game_reverse_two_players():
+    game = Game([FirstPolicy()] * 2)
+    rig(game, [[Card(0, "reverse", "Red"), Card(1, "2", "Red")], []],
+        Card(2, "5", "Red"))
+    game.step()
+    assert game.current == 0
+
+def test_game_wild_draw():
+    game = Game([FirstPolicy()] * 3)
+    rig(game, [[Card(0, "wild_draw", "wild"), Card(1, "2", "Red")], [], []],
+        Card(2, "5", "Red"))
+    game.step()
+    assert len(game.players[1].hand) == 4
+    assert game.current == 2
+    assert game.get_top_card().color == "Blue"
+
+def test_game_draw_when_no_match():
+    game = Game([FirstPolicy()] * 2)
+    rig(game, [[Card(0, "2", "Green")], []], Card(2, "5", "Red"))
+    game.step()
+    assert len(game.players[0].hand) == 2
+    assert game.current == 1
+
+def test_game_win():
+    game = Game([FirstPolicy()] * 2)
+    rig(game, [[Card(0, "5", "Green")], []], Card(2, "5", "Red"))
+    game.step()
+    assert game.winner == 0
+    assert game.is_over()
+
+def test_game_reshuffle_resets_wild_color():
+    game = Game([FirstPolicy()] * 2)
+    wild = Card(0, "wild", "Blue")
+    game.deck.cards = []
+    rig(game, [[], []], Card(2, "5", "Red"))
+    game.discard_deck.cards = [wild, Card(2, "5", "Red")]
+    game.draw(game.players[0], 1)
+    assert game.players[0].hand.cards == [wild]
+    assert wild.color == "wild"
+
+def test_most_common_color():
+    cards = [Card(0, "1", "Green"), Card(1, "2", "Green"), Card(2, "3", "Red"),
+             Card(3, "wild", "wild")]
+    assert most_common_color(cards) == "Green"
+    assert most_common_color([]) == "Red"
+
+def test_play_games():
+    result = play_games(20, [RandomPolicy(), GreedyPolicy()])
+    assert result["games"] == 20
+    assert sum(result["wins"]) + result["unfinished"] == 20
+
+def test_game_seed_replays_exactly():
+    def play(seed):
+        game = Game([RandomPolicy(), GreedyPolicy(), RandomPolicy()], seed=seed)
+        game.play()
+        return game.winner, game.turns, [card.id for card in game.deck.cards]
+    assert play(11) == play(11)
+    assert play(11) != play(12)
+
+def test_game_rng_plumbing():
+    game = Game([RandomPolicy(), RandomPolicy()], seed=1)
+    assert game.deck.rng is game.rng
+    assert all(player.rng is game.rng for player in game.players)
+
+def test_game_does_not_use_global_random():
+    random.seed(0)
+    state = random.getstate()
+    Game([RandomPolicy(), RandomPolicy()], seed=3).play()
+    assert random.getstate() == state
+
+def test_play_games_seed():
+    policies = [RandomPolicy(), GreedyPolicy()]
+    assert play_games(10, policies, seed=4) == play_games(10, policies, seed=4)
+
+def test_game_hash_is_incremental():
+    game = Game([RandomPolicy(), GreedyPolicy(), RandomPolicy()], seed=9)
+    while not game.is_over():
+        game.step()
+        assert game.hash == state_hash(game)
+
+def test_game_hash_tracks_wild_color():
+    game = Game([FirstPolicy()] * 2)
+    rig(game, [[Card(0, "wild", "wild"), Card(1, "2", "Red")], []],
+        Card(2, "5", "Red"))
+    game.rehash()
+    game.step()
+    assert game.hash == state_hash(game)
+
+def test_game_without_hashing():
+    game = Game([RandomPolicy(), RandomPolicy()], seed=9, hashing=False)
+    game.play()
+    assert game.hash is None
+    assert game.clone(hashing=True).hash == state_hash(game)
+
+def test_game_snapshot_restore():
+    game = Game([RandomPolicy(), GreedyPolicy(), RandomPolicy()], seed=10)
+    for _ in range(5):
+        game.step()
+    snapshot = game.snapshot()
+    hands = [list(player.hand.cards) for player in game.players]
+    card = game.players[0].hand.cards[0]
+
+    winner = game.play()
+    turns = game.turns
+    game.restore(snapshot)
+    assert [list(player.hand.cards) for player in game.players] == hands
+    assert game.players[0].hand.cards[0] is card
+    assert game.turns == 5 and game.winner is None
+    assert game.hash == state_hash(game)
+    assert game.play() == winner and game.turns == turns
+
+def test_game_snapshot_without_rng():
+    game = Game([RandomPolicy(), RandomPolicy()], seed=11)
+    snapshot = game.snapshot(rng=False)
+    assert snapshot.rng_state is None
+    state = game.rng.getstate()
+    game.play()
+    game.restore(snapshot)
+    assert game.turns == 0
+    assert game.rng.getstate() != state
@@ -0,0 +1,71 @@
+import json
+import pytest
+from cardgame.tournament import Tournament, play_game, wilson_interval
+
+
+def test_play_game_deterministic():
+    first = play_game(["greedy", "random"], 3, 7)
+    second = play_game(["greedy", "random"], 3, 7)
+    assert first == second
+    assert first["index"] == 7
+    assert first["winner"] in (0, 1)
+
+def test_wilson_interval():
+    low, high = wilson_interval(50, 100)
+    assert low < 0.5 < high
+    assert high - low == pytest.approx(0.19, abs=0.01)
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    assert wilson_interval(0, 10)[0] == 0.0
+    assert wilson_interval(10, 10)[1] == 1.0
+
+def test_tournament_unknown_policy():
+    with pytest.raises(ValueError):
+        Tournament(["greedy", "nobody"], 10)
+
+def test_tournament_run():
+    tournament = Tournament(["greedy", "random"], 40, workers=1, chunk_size=15)
+    results = list(tournament.results())
+    assert sorted(result["index"] for result in results) == list(range(40))
+    summary = tournament.get_summary()
+    assert summary["games"] == 40
+    wins = sum(policy["wins"] for policy in summary["policies"])
+    assert wins + summary["unfinished"] == 40
+    for policy in summary["policies"]:
+        assert policy["ci_low"] <= policy["win_rate"] <= policy["ci_high"]
+
+def test_tournament_workers_same_results():
+    single = Tournament(["greedy", "random", "random"], 30, seed=5, workers=1,
+                        chunk_size=10).run()
+    pooled = Tournament(["greedy", "random", "random"], 30, seed=5, workers=2,
+                        chunk_size=10).run()
+    assert single == pooled
+
+def test_tournament_checkpoint(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    tournament = Tournament(["greedy", "random"], 30, workers=1, chunk_size=10,
+                            checkpoint=path)
+    results = tournament.results()
+    for _ in range(10):
+        next(results)
+    results.close()
+
+    with open(path) as f:
+        assert json.load(f)["done"] == [[0, 10]]
+
+    resumed = Tournament(["greedy", "random"], 30, workers=1, chunk_size=10,
+                         checkpoint=path)
+    assert len(resumed.done) == 10
+    assert sorted(result["index"] for result in resumed.results()) == \
+        list(range(10, 30))
+    assert resumed.get_summary() == \
+        Tournament(["greedy", "random"], 30, workers=1).run()
+
+def test_tournament_checkpoint_mismatch(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    Tournament(["greedy", "random"], 5, workers=1, checkpoint=path).run()
+    with pytest.raises(ValueError):
+        Tournament(["random", "random"], 5, workers=1, checkpoint=path)
+    with pytest.raises(ValueError):
+        Tournament(["greedy", "random"], 10, workers=1, checkpoint=path)
+    with pytest.raises(ValueError):
+        Tournament(["greedy", "random"], 5, seed=1, workers=1, checkpoint=path)
@@ -0,0 +1,90 @@
+import pytest
+from cardgame.cards import Card
+from cardgame.search import MonteCarloSearch
+from cardgame.simulation import Game, GreedyPolicy
+from cardgame.transposition import TranspositionCache, hash_hand, \
+    position_hash
+
+
+def test_hash_hand_is_a_multiset_hash():
+    red = [Card(0, "5", "Red"), Card(1, "5", "Red"), Card(2, "7", "Blue")]
+    same = [Card(9, "7", "Blue"), Card(8, "5", "Red"), Card(7, "5", "Red")]
+    assert hash_hand(red) == hash_hand(same)
+    assert hash_hand(red) != hash_hand(red[1:])
+    assert hash_hand(red[:1]) != hash_hand(red[:2])
+    assert hash_hand([]) == 0
+
+def test_position_hash():
+    game = Game([GreedyPolicy()] * 3, seed=1)
+    h = position_hash(game)
+    assert position_hash(game, 0) == h
+    assert position_hash(game.clone()) == h
+    assert position_hash(game, 1) != h
+
+    game.direction = -1
+    assert position_hash(game) != h
+    game.direction = 1
+
+    game.players[1].draw(1)
+    assert position_hash(game) != h
+
+def test_cache_lru():
+    cache = TranspositionCache(max_size=2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"
+    cache.put(3, "c")
+    assert 2 not in cache and 1 in cache and 3 in cache
+    assert cache.get(2) is None
+    stats = cache.get_stats()
+    assert stats == dict(size=2, hits=1, misses=1, evictions=1, hit_rate=0.5)
+
+def test_cache_persistence(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TranspositionCache(path=path)
+    cache.put(2**63 + 5, [[33, None, 3, 4]])
+    cache.put(7, [[None, None, 0, 1]])
+    cache.save()
+
+    loaded = TranspositionCache(path=path)
+    assert list(loaded.entries.items()) == list(cache.entries.items())
+
+    with open(path, "w") as f:
+        f.write('{"seed": 1, "entries": []}')
+    with pytest.raises(ValueError):
+        TranspositionCache(path=path)
+
+def test_search_uses_cache():
+    cache = TranspositionCache()
+    search = MonteCarloSearch(time_budget=60, rollouts=4, cache=cache)
+    game = Game([GreedyPolicy()] * 2, seed=3)
+    results = search.evaluate(game, seed=1)
+    assert cache.get_stats()["misses"] == 1 and len(cache) == 1
+
+    # Same cards in the hand under other ids: same position
+    other = game.clone()
+    hand = other.players[0].hand
+    hand.cards = [Card(200 + i, card.value, card.color)
+                  for i, card in enumerate(hand.cards)]
+    cached = search.evaluate(other, seed=2)
+    assert cache.get_stats()["hits"] == 1
+    assert [result[1:] for result in cached] == \
+        [result[1:] for result in results]
+    assert all(card_id is None or hand.getCard(card_id)
+               for (card_id, color), wins, rollouts in cached)
+
+def test_search_refines_partial_cache_entries():
+    cache = TranspositionCache()
+    game = Game([GreedyPolicy()] * 2, seed=3)
+    partial = MonteCarloSearch(time_budget=60, rollouts=1, cache=cache)
+    first = partial.evaluate(game, seed=1)
+    assert all(rollouts == 1 for move, wins, rollouts in first)
+
+    search = MonteCarloSearch(time_budget=60, rollouts=4, cache=cache)
+    refined = search.evaluate(game, seed=2)
+    assert all(rollouts == 4 for move, wins, rollouts in refined)
+    assert cache.get_stats()["hits"] == 1
+    assert [rollouts for move, wins, rollouts in
+            search.evaluate(game, seed=3)] == \
+        [rollouts for move, wins, rollouts in refined]
+    assert cache.get_stats()["hits"] == 2 and len(cache) == 1